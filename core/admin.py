@@ -3,7 +3,7 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import Group
 from django.utils.translation import gettext_lazy as _
 
-from .models import User
+from .models import OutboxEmail, User
 
 
 @admin.register(User)
@@ -60,3 +60,10 @@ class UserAdmin(BaseUserAdmin):
     list_display = ("email", "first_name", "last_name", "is_active", "is_staff")
     ordering = ["-date_joined"]
     search_fields = ("first_name", "last_name", "email")
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ("id", "recipients", "status", "attempts", "next_attempt_at")
+    list_filter = ("status",)
+    readonly_fields = ("from_email", "recipients", "message", "created_at", "sent_at")
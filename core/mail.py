@@ -0,0 +1,135 @@
+"""
+The email outbox.
+
+``OutboxEmailBackend`` is the EMAIL_BACKEND, it only writes the messages it
+is given to the OutboxEmail table, in the caller's transaction, so nothing
+is sent for a rolled back request and no request waits for an SMTP server.
+The send_outbox_emails worker delivers them with OUTBOX_EMAIL_BACKEND.
+"""
+
+import random
+import smtplib
+from datetime import timedelta
+from email import message_from_bytes, policy
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+MAX_ATTEMPTS = 8
+RETRY_DELAY = timedelta(seconds=30)
+MAX_RETRY_DELAY = timedelta(hours=1)
+
+
+class OutboxEmailBackend(BaseEmailBackend):
+    def send_messages(self, email_messages):
+        emails = [
+            OutboxEmail(
+                from_email=message.from_email,
+                recipients=message.recipients(),
+                message=message.message().as_bytes(linesep="\r\n"),
+            )
+            for message in email_messages
+            if message.recipients()
+        ]
+        OutboxEmail.objects.bulk_create(emails)
+        return len(emails)
+
+
+class RawMessage:
+    """
+    A rendered MIME message, in place of the SafeMIME objects
+    EmailMessage.message() returns.
+    """
+
+    def __init__(self, content):
+        self.content = content
+
+    def as_bytes(self, unixfrom=False, linesep="\n"):
+        return self.content.replace(b"\r\n", linesep.encode())
+
+    def as_string(self, unixfrom=False, linesep="\n"):
+        return self.as_bytes(unixfrom, linesep).decode()
+
+
+class StoredEmailMessage(EmailMessage):
+    """
+    An EmailMessage that sends the message stored in the outbox as it is,
+    with the same Message-ID and Date on every attempt.
+    """
+
+    def __init__(self, email: OutboxEmail):
+        content = bytes(email.message)
+        parsed = message_from_bytes(content, policy=policy.SMTP)
+        super().__init__(
+            subject=parsed["Subject"] or "",
+            from_email=email.from_email,
+            to=email.recipients,
+        )
+        self.content = content
+
+    def message(self):
+        return RawMessage(self.content)
+
+
+def get_retry_delay(attempts):
+    delay = min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+    # spread out the retries of messages that failed together
+    return delay * random.uniform(0.8, 1.2)
+
+
+def send_outbox_batch(connection, batch_size):
+    """
+    Send the next due outbox emails over ``connection`` and return how many
+    there were.
+
+    The emails stay locked until their outcome is saved, so several workers
+    can drain the outbox without sending an email twice.
+    """
+    with transaction.atomic():
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutboxEmail.PENDING, next_attempt_at__lte=timezone.now())
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        for email in emails:
+            email.attempts += 1
+            try:
+                # a no-op while the connection is open
+                connection.open()
+                connection.send_messages([StoredEmailMessage(email)])
+            except Exception as error:
+                email.last_error = repr(error)
+                if (
+                    isinstance(error, smtplib.SMTPRecipientsRefused)
+                    or email.attempts >= MAX_ATTEMPTS
+                ):
+                    email.status = OutboxEmail.FAILED
+                else:
+                    email.next_attempt_at = timezone.now() + get_retry_delay(
+                        email.attempts
+                    )
+                # reconnect for the next email, the connection may be broken
+                connection.close()
+            else:
+                email.status = OutboxEmail.SENT
+                email.sent_at = timezone.now()
+                email.last_error = ""
+        OutboxEmail.objects.bulk_update(
+            emails,
+            ["status", "attempts", "next_attempt_at", "last_error", "sent_at"],
+        )
+    return len(emails)
+
+
+def get_outbox_connection():
+    # send_outbox_batch holds the batch's row locks while it sends
+    return get_connection(
+        settings.OUTBOX_EMAIL_BACKEND,
+        fail_silently=False,
+        timeout=settings.OUTBOX_EMAIL_TIMEOUT,
+    )
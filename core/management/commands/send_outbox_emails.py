@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.mail import get_outbox_connection, send_outbox_batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends the emails waiting in the outbox in batches over one SMTP "
+        "connection, retrying failed ones with an exponential backoff."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Emails locked and sent per batch (default: 50).",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5,
+            help="Seconds to wait when the outbox is empty (default: 5).",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once no email is due instead of waiting for more.",
+        )
+
+    def handle(self, *args, **options):
+        connection = get_outbox_connection()
+        try:
+            while True:
+                sent = send_outbox_batch(connection, options["batch_size"])
+                if sent:
+                    self.stdout.write(f"Processed {sent} outbox emails.")
+                    continue
+                # don't keep the SMTP server's connection while idle
+                connection.close()
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
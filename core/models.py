@@ -2,6 +2,7 @@ from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
 from django.core.validators import MinLengthValidator
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from .managers import UserManager
@@ -21,6 +22,9 @@ class User(AbstractUser):
     mobile_number = models.CharField(
         max_length=11, validators=[MinLengthValidator(11), validate_mobile_number]
     )
+    # bumped when the claims of the user's tokens change, tokens issued with
+    # an older version are refused
+    auth_version = models.PositiveIntegerField(default=0, editable=False)
 
     objects = UserManager()
     USERNAME_FIELD = "email"
@@ -31,3 +35,75 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.get_full_name()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            # auth_version is only ever bumped in the database, saving an
+            # instance loaded before a bump must not undo it
+            deferred_fields = self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.attname not in deferred_fields
+                and field.name != "auth_version"
+            ]
+        super().save(*args, **kwargs)
+
+
+class ClaimsUser(User):
+    """
+    A user built from the claims of an access token, see
+    store.authentication. Only the claimed fields are loaded, reading any
+    other field loads the rest of the row.
+    """
+
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        deferred_fields = self.get_deferred_fields()
+        if fields is not None and deferred_fields:
+            # one query for every deferred field rather than one per field
+            fields = {*fields, *deferred_fields}
+        super().refresh_from_db(using, fields, from_queryset)
+
+
+class OutboxEmail(models.Model):
+    """
+    An email waiting in the outbox for the send_outbox_emails worker, written
+    by core.mail.OutboxEmailBackend in the transaction that sent it.
+    """
+
+    PENDING = "Pending"
+    SENT = "Sent"
+    FAILED = "Failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    ]
+
+    from_email = models.TextField()
+    recipients = models.JSONField()
+    # the complete MIME message, as it is handed to the SMTP server
+    message = models.BinaryField()
+    status = models.CharField(max_length=7, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at", "id"],
+                condition=models.Q(status="Pending"),
+                name="outbox_email_pending_idx",
+            )
+        ]
+
+    def __str__(self):
+        return f"Email {self.pk} to {', '.join(self.recipients)} - {self.status}"
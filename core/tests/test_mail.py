@@ -0,0 +1,114 @@
+import smtplib
+import socket
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.core.mail import EmailMessage, get_connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.mail import MAX_ATTEMPTS, get_outbox_connection, send_outbox_batch
+from core.models import OutboxEmail
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        EmailMessage(
+            subject="Order Completed on FoodVille",
+            body="Your order has been successfully completed.",
+            from_email="orders@example.com",
+            to=["customer@example.com"],
+            connection=get_connection("core.mail.OutboxEmailBackend"),
+        ).send()
+        self.email = OutboxEmail.objects.get()
+
+    def get_failing_connection(self, error):
+        connection = mock.Mock()
+        connection.send_messages.side_effect = error
+        return connection
+
+    def test_messages_wait_in_the_outbox(self):
+        self.assertEqual(self.email.status, OutboxEmail.PENDING)
+        self.assertEqual(self.email.recipients, ["customer@example.com"])
+        self.assertEqual(mail.outbox, [])
+
+    def test_due_emails_are_sent_as_stored(self):
+        connection = get_connection("django.core.mail.backends.locmem.EmailBackend")
+        self.assertEqual(send_outbox_batch(connection, 10), 1)
+
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.status, OutboxEmail.SENT)
+        self.assertEqual(self.email.attempts, 1)
+        self.assertIsNotNone(self.email.sent_at)
+        (sent,) = mail.outbox
+        self.assertEqual(sent.to, ["customer@example.com"])
+        self.assertEqual(
+            sent.message().as_bytes(linesep="\r\n"), bytes(self.email.message)
+        )
+        # nothing left to send
+        self.assertEqual(send_outbox_batch(connection, 10), 0)
+
+    def test_failed_emails_are_retried_later(self):
+        connection = self.get_failing_connection(
+            smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        )
+        before = timezone.now()
+        self.assertEqual(send_outbox_batch(connection, 10), 1)
+
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.status, OutboxEmail.PENDING)
+        self.assertEqual(self.email.attempts, 1)
+        self.assertIn("SMTPServerDisconnected", self.email.last_error)
+        # 30 seconds, give or take a fifth
+        self.assertGreaterEqual(
+            self.email.next_attempt_at, before + timedelta(seconds=24)
+        )
+        self.assertLessEqual(
+            self.email.next_attempt_at, timezone.now() + timedelta(seconds=36)
+        )
+        connection.close.assert_called()
+        # not due yet
+        self.assertEqual(send_outbox_batch(connection, 10), 0)
+
+    def test_emails_fail_after_the_last_attempt(self):
+        OutboxEmail.objects.update(attempts=MAX_ATTEMPTS - 1)
+        connection = self.get_failing_connection(smtplib.SMTPDataError(451, "Later"))
+        send_outbox_batch(connection, 10)
+
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.status, OutboxEmail.FAILED)
+        self.assertEqual(self.email.attempts, MAX_ATTEMPTS)
+
+    def test_refused_recipients_are_not_retried(self):
+        connection = self.get_failing_connection(
+            smtplib.SMTPRecipientsRefused({"customer@example.com": (550, b"No")})
+        )
+        send_outbox_batch(connection, 10)
+
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.status, OutboxEmail.FAILED)
+        self.assertEqual(self.email.attempts, 1)
+
+    def test_unresponsive_smtp_servers_time_out(self):
+        # accepts connections but never greets the client
+        server = socket.socket()
+        self.addCleanup(server.close)
+        server.bind(("127.0.0.1", 0))
+        server.listen()
+        host, port = server.getsockname()
+
+        with override_settings(
+            OUTBOX_EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            OUTBOX_EMAIL_TIMEOUT=1,
+            EMAIL_HOST=host,
+            EMAIL_PORT=port,
+            EMAIL_USE_TLS=False,
+        ):
+            connection = get_outbox_connection()
+            self.assertEqual(connection.timeout, 1)
+            self.assertEqual(send_outbox_batch(connection, 10), 1)
+
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.status, OutboxEmail.PENDING)
+        self.assertIn("timed out", self.email.last_error)
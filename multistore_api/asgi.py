@@ -13,4 +13,11 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'multistore_api.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# imported once get_asgi_application() has set Django up
+from store.sse import OrderEventsMiddleware  # noqa: E402
+
+# the order event streams are served without going through Django's
+# request handling, which would tie a thread to every open stream
+application = OrderEventsMiddleware(django_application)
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 import os
+import sys
 from datetime import timedelta
 from pathlib import Path
 
@@ -32,6 +33,8 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+TESTING = "test" in sys.argv[1:2]
+
 ALLOWED_HOSTS = ["*"]
 CORS_ALLOWED_ORIGINS = ["http://localhost:3000"]
 BASE_URL = os.getenv("BASE_URL")
@@ -46,6 +49,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "debug_toolbar",
     "rest_framework",
     "djoser",
@@ -105,6 +109,32 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+REDIS_URL = os.getenv("REDIS_URL")
+CACHES = {
+    "default": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+        if REDIS_URL
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    )
+}
+# seconds a cached catalog response is kept, invalidation is version based
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", 60 * 15))
+# seconds the response to a request with an Idempotency-Key is replayed for
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", 60 * 60 * 24))
+# seconds the groups and store of a user are cached for, they are cached
+# under the user's auth version, which changes to them bump
+ACCESS_CACHE_TIMEOUT = int(os.getenv("ACCESS_CACHE_TIMEOUT", 60 * 60))
+# seconds the auth version of a user is cached for, at most as long as a token
+# claiming an outdated version can still be accepted
+AUTH_VERSION_CACHE_TIMEOUT = int(os.getenv("AUTH_VERSION_CACHE_TIMEOUT", 60))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -144,6 +174,8 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 
 MEDIA_URL = "media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+# threads per process rendering the resized variants of uploaded images
+IMAGE_VARIANT_WORKERS = int(os.getenv("IMAGE_VARIANT_WORKERS", 2))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
@@ -154,6 +186,14 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 AUTH_USER_MODEL = "core.User"
 
 # email settings
+# emails are queued in the outbox and sent by the send_outbox_emails worker,
+# with OUTBOX_EMAIL_BACKEND
+EMAIL_BACKEND = "core.mail.OutboxEmailBackend"
+OUTBOX_EMAIL_BACKEND = os.getenv(
+    "OUTBOX_EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend"
+)
+# seconds, an unresponsive SMTP server must not hold a batch's row locks
+OUTBOX_EMAIL_TIMEOUT = int(os.getenv("OUTBOX_EMAIL_TIMEOUT", 10))
 EMAIL_HOST = os.getenv("EMAIL_HOST")
 EMAIL_PORT = os.getenv("EMAIL_PORT")
 EMAIL_HOST_USER = os.getenv("EMAIL_HOST_USER")
@@ -166,21 +206,31 @@ DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 REST_FRAMEWORK = {
     "COERCE_DECIMAL_TO_STRING": False,
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "store.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_FILTER_BACKENDS": ("django_filters.rest_framework.DjangoFilterBackend",),
+    "PAGE_SIZE": int(os.getenv("PAGE_SIZE", 20)),
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
 }
 
+# PAGE_SIZE is consumed by the per-view cursor paginators
+SILENCED_SYSTEM_CHECKS = ["rest_framework.W001"]
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1) if DEBUG else timedelta(minutes=15),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=30),
     "SIGNING_KEY": SECRET_KEY,
     "AUTH_HEADER_TYPES": ("JWT",),
+    "TOKEN_OBTAIN_SERIALIZER": "store.authentication.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "store.authentication.ClaimsTokenRefreshSerializer",
 }
 
+# seconds an order events token is accepted for, it is sent in the URL of the
+# event stream and ends up in access logs
+ORDER_EVENTS_TOKEN_LIFETIME = int(os.getenv("ORDER_EVENTS_TOKEN_LIFETIME", 60))
+
 DJOSER = {
     "EMAIL_FRONTEND_PROTOCOL": "http" if DEBUG else "https",
     "EMAIL_FRONTEND_DOMAIN": os.getenv("FRONTEND_DOMAIN"),
@@ -195,7 +245,11 @@ DJOSER = {
 }
 
 # for debug toolbar visibility
-DEBUG_TOOLBAR_CONFIG = {"SHOW_TOOLBAR_CALLBACK": lambda request: DEBUG}
+DEBUG_TOOLBAR_CONFIG = {
+    "SHOW_TOOLBAR_CALLBACK": lambda request: DEBUG and not TESTING,
+    # the toolbar is never shown to the test client, see above
+    "IS_RUNNING_TESTS": False,
+}
 
 
 # PRODUCTION OVERRIDES
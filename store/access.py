@@ -0,0 +1,123 @@
+"""
+Authorization context of the users: their groups and the store they own.
+
+The context is cached across requests and remembered on the user for the
+rest of the request, so the store owner checks and the lookups of the
+owner's store run no query. It is cached under the user's auth version,
+which the Store and group membership signals bump when it changes, along
+with refusing the tokens claiming it (see store.authentication).
+"""
+
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from rest_framework.exceptions import PermissionDenied
+
+STORE_OWNER = "Store Owner"
+
+
+class AccessContext:
+    def __init__(self, groups=(), store_id=None):
+        self.groups = frozenset(groups)
+        self.store_id = store_id
+
+    @property
+    def is_store_owner(self):
+        return STORE_OWNER in self.groups
+
+
+def access_context_key(user_id, auth_version):
+    return f"access:{user_id}:{auth_version}"
+
+
+def get_access_context(user) -> AccessContext:
+    """
+    Return the authorization context of a user, empty for anonymous users.
+    """
+    if not user.is_authenticated:
+        return AccessContext()
+    context = getattr(user, "_access_context", None)
+    if context is not None:
+        return context
+
+    # a context read before a change was committed is cached under the
+    # version the change bumps, and never read again
+    key = access_context_key(user.pk, user.auth_version)
+    entry = cache.get(key)
+    if entry is None:
+        # a row per group, with the store of the user on every row
+        rows = list(
+            get_user_model()
+            .objects.filter(pk=user.pk)
+            .order_by()
+            .values_list("groups__name", "store")
+        )
+        groups = {name for name, _ in rows if name is not None}
+        store_id = next((store_id for _, store_id in rows), None)
+        entry = (sorted(groups), store_id)
+        cache.set(key, entry, settings.ACCESS_CACHE_TIMEOUT)
+    context = AccessContext(*entry)
+    user._access_context = context
+    return context
+
+
+def auth_version_key(user_id):
+    return f"access:version:{user_id}"
+
+
+def get_auth_version(user_id):
+    """
+    Return the cached auth version of a user, None if they don't exist.
+    """
+    key = auth_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = (
+            get_user_model()
+            .objects.filter(pk=user_id)
+            .values_list("auth_version", flat=True)
+            .first()
+        )
+        if version is not None:
+            # a version read before a bump was committed may be cached after
+            # the bump dropped it, so it is only kept briefly
+            cache.add(key, version, settings.AUTH_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+def invalidate_access_context(user_id):
+    """
+    Bump the auth version of a user, which refuses the tokens claiming their
+    old context and moves their cached context to a new key, and drop the
+    cached version now and again once the current transaction commits, in
+    case a request cached it in between.
+    """
+    get_user_model().objects.filter(pk=user_id).update(
+        auth_version=F("auth_version") + 1
+    )
+    key = auth_version_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(partial(cache.delete, key))
+
+
+class AccessContextMixin:
+    """
+    The requester's authorization context, for views.
+    """
+
+    def get_access_context(self):
+        return get_access_context(self.request.user)
+
+    def get_owned_store_id(self, detail=None):
+        """
+        Return the ID of the requester's store, or deny the request if they
+        don't own one.
+        """
+        context = self.get_access_context()
+        if not context.is_store_owner or context.store_id is None:
+            raise PermissionDenied(detail or {"store": "You must own a store!"})
+        return context.store_id
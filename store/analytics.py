@@ -0,0 +1,292 @@
+"""
+Hourly and daily sales rollups of the stores and their products.
+
+Orders count towards the periods they were created in once they are
+Completed (revenue, items sold) or Rejected, and feedbacks towards the
+periods of their orders. The Order and Feedback signals apply every change
+to the rollups as it happens, each with a single upsert that adds the
+change to the stored totals, so the analytics endpoint only ever reads the
+rollups. ``rebuild_sales_rollups`` recomputes them from the orders.
+"""
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Sum
+
+from .models import Order, ProductSalesRollup, StoreSalesRollup
+from .projections import make_datetime_mapper
+
+GRANULARITIES = [StoreSalesRollup.HOUR, StoreSalesRollup.DAY]
+
+# start of the order's period, in the configured time zone
+PERIOD_START = (
+    "date_trunc(periods.granularity, o.created_at AT TIME ZONE %(time_zone)s) "
+    "AT TIME ZONE %(time_zone)s"
+)
+
+ORDER_OUTCOME_SQL = f"""
+WITH periods AS (
+    SELECT unnest(%(granularities)s::varchar[]) AS granularity
+), order_periods AS (
+    SELECT o.store_id, periods.granularity, {PERIOD_START} AS period_start,
+           o.total_price
+    FROM store_order o CROSS JOIN periods
+    WHERE o.id = %(order)s
+), sold AS (
+    SELECT product_id, SUM(quantity) AS quantity, SUM(price_per_item) AS revenue
+    FROM store_orderitem
+    WHERE order_id = %(order)s
+    GROUP BY product_id
+), store_rollups AS (
+    INSERT INTO store_storesalesrollup (
+        store_id, granularity, period_start, revenue, completed_orders,
+        rejected_orders, items_sold, rating_sum, rating_count
+    )
+    SELECT store_id, granularity, period_start,
+           %(completed)s * total_price, %(completed)s, %(rejected)s,
+           %(completed)s * (SELECT COALESCE(SUM(quantity), 0) FROM sold), 0, 0
+    FROM order_periods
+    ON CONFLICT (store_id, granularity, period_start) DO UPDATE
+    SET revenue = store_storesalesrollup.revenue + EXCLUDED.revenue,
+        completed_orders =
+            store_storesalesrollup.completed_orders + EXCLUDED.completed_orders,
+        rejected_orders =
+            store_storesalesrollup.rejected_orders + EXCLUDED.rejected_orders,
+        items_sold = store_storesalesrollup.items_sold + EXCLUDED.items_sold
+)
+INSERT INTO store_productsalesrollup (
+    product_id, store_id, granularity, period_start, revenue, completed_orders,
+    items_sold
+)
+SELECT sold.product_id, order_periods.store_id, order_periods.granularity,
+       order_periods.period_start, %(completed)s * sold.revenue, %(completed)s,
+       %(completed)s * sold.quantity
+FROM order_periods CROSS JOIN sold
+WHERE %(completed)s <> 0
+ON CONFLICT (product_id, granularity, period_start) DO UPDATE
+SET revenue = store_productsalesrollup.revenue + EXCLUDED.revenue,
+    completed_orders =
+        store_productsalesrollup.completed_orders + EXCLUDED.completed_orders,
+    items_sold = store_productsalesrollup.items_sold + EXCLUDED.items_sold
+"""
+
+ORDER_RATING_SQL = f"""
+WITH periods AS (
+    SELECT unnest(%(granularities)s::varchar[]) AS granularity
+)
+INSERT INTO store_storesalesrollup (
+    store_id, granularity, period_start, revenue, completed_orders,
+    rejected_orders, items_sold, rating_sum, rating_count
+)
+SELECT o.store_id, periods.granularity, {PERIOD_START}, 0, 0, 0, 0,
+       %(rating)s, %(count)s
+FROM store_order o CROSS JOIN periods
+WHERE o.id = %(order)s
+ON CONFLICT (store_id, granularity, period_start) DO UPDATE
+SET rating_sum = store_storesalesrollup.rating_sum + EXCLUDED.rating_sum,
+    rating_count = store_storesalesrollup.rating_count + EXCLUDED.rating_count
+"""
+
+REBUILD_STORE_ROLLUPS_SQL = f"""
+WITH periods AS (
+    SELECT unnest(%(granularities)s::varchar[]) AS granularity
+)
+INSERT INTO store_storesalesrollup (
+    store_id, granularity, period_start, revenue, completed_orders,
+    rejected_orders, items_sold, rating_sum, rating_count
+)
+SELECT o.store_id, periods.granularity, {PERIOD_START},
+       COALESCE(SUM(o.total_price) FILTER (WHERE o.status = %(completed)s), 0),
+       COUNT(*) FILTER (WHERE o.status = %(completed)s),
+       COUNT(*) FILTER (WHERE o.status = %(rejected)s),
+       COALESCE(SUM(items.quantity) FILTER (WHERE o.status = %(completed)s), 0),
+       COALESCE(SUM(feedbacks.rating_sum), 0),
+       COALESCE(SUM(feedbacks.rating_count), 0)
+FROM store_order o
+CROSS JOIN periods
+LEFT JOIN LATERAL (
+    SELECT SUM(quantity) AS quantity FROM store_orderitem WHERE order_id = o.id
+) items ON TRUE
+LEFT JOIN LATERAL (
+    SELECT SUM(rating) AS rating_sum, COUNT(*) AS rating_count
+    FROM store_feedback WHERE order_id = o.id
+) feedbacks ON TRUE
+WHERE %(store)s::bigint IS NULL OR o.store_id = %(store)s::bigint
+GROUP BY 1, 2, 3
+HAVING COUNT(*) FILTER (WHERE o.status IN (%(completed)s, %(rejected)s)) > 0
+    OR SUM(feedbacks.rating_count) > 0
+"""
+
+REBUILD_PRODUCT_ROLLUPS_SQL = f"""
+WITH periods AS (
+    SELECT unnest(%(granularities)s::varchar[]) AS granularity
+)
+INSERT INTO store_productsalesrollup (
+    product_id, store_id, granularity, period_start, revenue, completed_orders,
+    items_sold
+)
+SELECT i.product_id, o.store_id, periods.granularity, {PERIOD_START},
+       SUM(i.price_per_item), COUNT(DISTINCT o.id), SUM(i.quantity)
+FROM store_orderitem i
+JOIN store_order o ON o.id = i.order_id
+CROSS JOIN periods
+WHERE o.status = %(completed)s
+    AND (%(store)s::bigint IS NULL OR o.store_id = %(store)s::bigint)
+GROUP BY 1, 2, 3, 4
+"""
+
+
+def get_outcome(status):
+    return int(status == Order.COMPLETED), int(status == Order.REJECTED)
+
+
+def record_order_status_change(order_id, previous_status, status):
+    """
+    Move an order between the rollups when its status changes from or to
+    Completed or Rejected. ``previous_status`` is None for new orders and
+    ``status`` is None for deleted ones.
+    """
+    previous_completed, previous_rejected = get_outcome(previous_status)
+    completed, rejected = get_outcome(status)
+    completed -= previous_completed
+    rejected -= previous_rejected
+    if not completed and not rejected:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            ORDER_OUTCOME_SQL,
+            {
+                "granularities": GRANULARITIES,
+                "time_zone": settings.TIME_ZONE,
+                "order": order_id,
+                "completed": completed,
+                "rejected": rejected,
+            },
+        )
+
+
+def record_order_rating(order_id, rating_delta, count_delta):
+    """
+    Apply a rating change of an order's feedbacks to the rollups.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            ORDER_RATING_SQL,
+            {
+                "granularities": GRANULARITIES,
+                "time_zone": settings.TIME_ZONE,
+                "order": order_id,
+                "rating": rating_delta,
+                "count": count_delta,
+            },
+        )
+
+
+@transaction.atomic
+def rebuild_sales_rollups(store_id=None):
+    """
+    Recompute the rollups of a store, or of every store, from its orders
+    and return how many store and product rollups there are.
+
+    Orders and feedbacks can't be written while the rollups are rebuilt, so
+    no change is lost or counted twice.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("LOCK TABLE store_order, store_feedback IN SHARE MODE")
+    for model in (StoreSalesRollup, ProductSalesRollup):
+        queryset = model.objects.all()
+        if store_id is not None:
+            queryset = queryset.filter(store_id=store_id)
+        queryset.delete()
+
+    params = {
+        "granularities": GRANULARITIES,
+        "time_zone": settings.TIME_ZONE,
+        "store": store_id,
+        "completed": Order.COMPLETED,
+        "rejected": Order.REJECTED,
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(REBUILD_STORE_ROLLUPS_SQL, params)
+        store_rollups = cursor.rowcount
+        cursor.execute(REBUILD_PRODUCT_ROLLUPS_SQL, params)
+        return store_rollups, cursor.rowcount
+
+
+def get_average_rating(rating_sum, rating_count):
+    # same as the store rating
+    return rating_sum / rating_count if rating_count else 0.0
+
+
+def get_store_sales(store_id, granularity, start, end, top_products=10):
+    """
+    Return the sales of a store in each period of [start, end) that had any,
+    their totals and the best selling products, from the rollups alone.
+    """
+    periods = list(
+        StoreSalesRollup.objects.filter(
+            store_id=store_id,
+            granularity=granularity,
+            period_start__gte=start,
+            period_start__lt=end,
+        )
+        .order_by("period_start")
+        .values(
+            "period_start",
+            "revenue",
+            "completed_orders",
+            "rejected_orders",
+            "items_sold",
+            "rating_sum",
+            "rating_count",
+        )
+    )
+    totals = {
+        field: sum(period[field] for period in periods)
+        for field in (
+            "revenue",
+            "completed_orders",
+            "rejected_orders",
+            "items_sold",
+            "rating_sum",
+            "rating_count",
+        )
+    }
+    to_datetime = make_datetime_mapper()
+    for period in periods:
+        period["period_start"] = to_datetime(period["period_start"])
+    for row in (*periods, totals):
+        row["average_rating"] = get_average_rating(
+            row.pop("rating_sum"), row.pop("rating_count")
+        )
+
+    products = (
+        ProductSalesRollup.objects.filter(
+            store_id=store_id,
+            granularity=granularity,
+            period_start__gte=start,
+            period_start__lt=end,
+        )
+        .values("product_id", "product__name")
+        .annotate(
+            total_revenue=Sum("revenue"),
+            total_completed_orders=Sum("completed_orders"),
+            total_items_sold=Sum("items_sold"),
+        )
+        .filter(total_completed_orders__gt=0)
+        .order_by("-total_revenue", "product_id")[:top_products]
+    )
+    return {
+        "totals": totals,
+        "periods": periods,
+        "products": [
+            {
+                "id": product["product_id"],
+                "name": product["product__name"],
+                "revenue": product["total_revenue"],
+                "completed_orders": product["total_completed_orders"],
+                "items_sold": product["total_items_sold"],
+            }
+            for product in products
+        ],
+    }
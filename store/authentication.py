@@ -0,0 +1,140 @@
+"""
+JWT authentication from the claims of the tokens.
+
+Tokens are issued with the user's flags, groups, store and auth version, and
+requests carrying them are authenticated without loading the user: the
+request's user is a ClaimsUser holding the claimed fields, which loads the
+rest of its row only if a view reads it. Checking the auth version, from the
+cache, is what keeps this safe: deactivating a user or changing their roles
+bumps it, the tokens claiming the old values are then refused and the client
+has to refresh them, which reads the user again.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from core.models import ClaimsUser
+
+from .access import AccessContext, get_access_context, get_auth_version
+
+AUTH_VERSION_CLAIM = "auth_version"
+
+
+def get_user_claims(user):
+    context = get_access_context(user)
+    return {
+        AUTH_VERSION_CLAIM: user.auth_version,
+        "is_staff": user.is_staff,
+        "is_active": user.is_active,
+        "store_id": context.store_id,
+        "groups": sorted(context.groups),
+    }
+
+
+class ClaimsTokenMixin:
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim, value in get_user_claims(user).items():
+            token[claim] = value
+        return token
+
+
+class ClaimsAccessToken(ClaimsTokenMixin, AccessToken):
+    pass
+
+
+class OrderEventsToken(ClaimsTokenMixin, AccessToken):
+    """
+    Access token for the order event streams only, which take it from their
+    URL as EventSource can't send headers. Being in URLs, it ends up in
+    access logs, so it expires quickly and other views refuse it.
+    """
+
+    token_type = "order_events"
+    lifetime = timedelta(seconds=settings.ORDER_EVENTS_TOKEN_LIFETIME)
+
+
+class ClaimsRefreshToken(ClaimsTokenMixin, RefreshToken):
+    access_token_class = ClaimsAccessToken
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        # the access token claims the user as they are now, not as they were
+        # when the refresh token was issued
+        user_id = self.token_class(attrs["refresh"]).payload.get(
+            api_settings.USER_ID_CLAIM
+        )
+        user = (
+            get_user_model()
+            .objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+            .first()
+        )
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages["no_active_account"], "no_active_account"
+            )
+        data["access"] = str(ClaimsAccessToken.for_user(user))
+        return data
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Authenticate tokens carrying claims without a query once the user's auth
+    version is cached, and other tokens as JWTAuthentication does.
+    """
+
+    def get_user(self, validated_token):
+        if AUTH_VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+        if get_auth_version(user_id) != validated_token[AUTH_VERSION_CLAIM]:
+            raise InvalidToken("Token claims are outdated")
+        if not validated_token["is_active"]:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return get_claims_user(validated_token)
+
+
+def get_claims_user(validated_token):
+    claims = {
+        "id": validated_token[api_settings.USER_ID_CLAIM],
+        "is_staff": validated_token["is_staff"],
+        "is_active": validated_token["is_active"],
+        AUTH_VERSION_CLAIM: validated_token[AUTH_VERSION_CLAIM],
+    }
+    # the other fields are deferred
+    field_names = [
+        field.attname
+        for field in ClaimsUser._meta.concrete_fields
+        if field.attname in claims
+    ]
+    user = ClaimsUser.from_db(
+        DEFAULT_DB_ALIAS, field_names, [claims[name] for name in field_names]
+    )
+    user._access_context = AccessContext(
+        validated_token["groups"], validated_token["store_id"]
+    )
+    return user
@@ -0,0 +1,196 @@
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .models import CatalogStamp, Store
+
+ALL_STORES = "all"
+
+
+def catalog_version_key(store_id=ALL_STORES):
+    return f"catalog:version:{store_id}"
+
+
+def get_catalog_version(store_id=ALL_STORES):
+    """
+    Return the cached catalog version of a store, or of the whole catalog.
+
+    Missing versions start from the current time rather than from 1, so an
+    evicted version never comes back with a value old entries were keyed with.
+    """
+    key = catalog_version_key(store_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_catalog_version(store_id):
+    """
+    Invalidate every cached response of a store and of the whole catalog.
+    """
+    for key in (catalog_version_key(store_id), catalog_version_key()):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+def invalidate_catalog(store_id):
+    """
+    Bump the store's catalog version once the current transaction commits.
+    """
+    transaction.on_commit(partial(bump_catalog_version, store_id))
+
+
+def get_or_create_catalog_stamp():
+    """
+    Return the CatalogStamp row, created by a migration but not again after
+    e.g. a flush. Like missing catalog versions, a created row starts from
+    the current time, never from a version old ETags were made with.
+    """
+    stamp, _ = CatalogStamp.objects.get_or_create(
+        pk=CatalogStamp.ID, defaults={"version": time.time_ns()}
+    )
+    return stamp
+
+
+class CatalogCacheMixin:
+    """
+    Serve ``list`` and ``retrieve`` from the cache and answer conditional
+    requests for them.
+
+    Entries are keyed by the catalog version of the store the response
+    belongs to (see ``get_cache_store_id``), the requester's variant (see
+    ``get_cache_variant``), the host and the full request path, so bumping a
+    version invalidates them without deleting anything. The host is part of
+    the key as the responses hold absolute URLs.
+
+    ETag and Last-Modified come from the ``catalog_version`` and
+    ``catalog_updated_at`` of the store, or from the CatalogStamp for
+    responses depending on every store (see ``get_catalog_stamp``). They are
+    cached along with the response data, so neither a cache hit nor a 304 for
+    it touches the database.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cache_variant(self):
+        """
+        Return what sets the requester's response apart from other
+        requesters', or None to not cache the response at all.
+        """
+        return "public"
+
+    def get_cache_store_id(self):
+        """
+        Return the id of the store the response only depends on, if any.
+        """
+        return ALL_STORES
+
+    def get_cache_key(self, variant):
+        store_id = self.get_cache_store_id()
+        parts = [
+            self.basename,
+            self.action,
+            str(store_id),
+            str(get_catalog_version(store_id)),
+            variant,
+            self.request.get_host(),
+            self.request.get_full_path(),
+        ]
+        digest = hashlib.sha256("|".join(parts).encode()).hexdigest()
+        return f"catalog:response:{digest}"
+
+    def get_catalog_stamp(self):
+        """
+        Return a token that changes with every change to the response's
+        stores and the time of the latest change, or None if the store the
+        response belongs to doesn't exist.
+        """
+        store_id = self.get_cache_store_id()
+        if store_id == ALL_STORES:
+            stamp = get_or_create_catalog_stamp()
+            return f"{ALL_STORES}:{stamp.version}", stamp.updated_at
+
+        stamp = (
+            Store.objects.filter(pk=store_id)
+            .values_list("catalog_version", "catalog_updated_at")
+            .first()
+        )
+        if stamp is None:
+            return None
+        version, updated_at = stamp
+        return f"{store_id}:{version}", updated_at
+
+    def get_catalog_etag(self, token, variant):
+        parts = [
+            self.basename,
+            self.action,
+            token,
+            str(variant),
+            self.request.get_host(),
+            self.request.get_full_path(),
+        ]
+        return '"%s"' % hashlib.sha256("|".join(parts).encode()).hexdigest()[:40]
+
+    def add_validators(self, response, etag, last_modified):
+        response.headers["ETag"] = etag
+        if last_modified is not None:
+            response.headers["Last-Modified"] = http_date(last_modified.timestamp())
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    def get_not_modified_response(self, request, etag, last_modified):
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified and int(last_modified.timestamp()),
+        )
+        if response is not None:
+            self.add_validators(response, etag, last_modified)
+        return response
+
+    def get_cached_response(self, view_method, request, *args, **kwargs):
+        variant = self.get_cache_variant()
+        key = None
+        if variant is not None:
+            key = self.get_cache_key(variant)
+            entry = cache.get(key)
+            if entry is not None:
+                data, etag, last_modified = entry
+                return self.get_not_modified_response(
+                    request, etag, last_modified
+                ) or self.add_validators(Response(data), etag, last_modified)
+
+        stamp = self.get_catalog_stamp()
+        if stamp is None:
+            return view_method(request, *args, **kwargs)
+        token, last_modified = stamp
+        etag = self.get_catalog_etag(token, variant)
+        not_modified = self.get_not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        response = view_method(request, *args, **kwargs)
+        if response.status_code == 200:
+            if key is not None:
+                cache.set(
+                    key,
+                    (response.data, etag, last_modified),
+                    settings.CATALOG_CACHE_TIMEOUT,
+                )
+            self.add_validators(response, etag, last_modified)
+        return response
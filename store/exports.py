@@ -0,0 +1,137 @@
+"""
+Streamed exports of a store's order history.
+
+Orders are read item by item from a server-side cursor and turned into rows
+as the response is written, so an export holds one chunk of rows in memory
+however long the history is.
+"""
+
+from itertools import groupby
+
+from .models import OrderItem
+from .projections import full_name, make_datetime_mapper
+
+# rows fetched from the server-side cursor at a time
+CHUNK_SIZE = 2000
+
+ORDER_ITEM_COLUMNS = (
+    "order_id",
+    "created_at",
+    "updated_at",
+    "status",
+    "type",
+    "pick_up_datetime",
+    "customer_id",
+    "customer",
+    "customer_email",
+    "total_price",
+    "item_id",
+    "product_id",
+    "product",
+    "quantity",
+    "price_per_item",
+)
+
+
+def get_store_order_items(store_id, start=None, end=None):
+    """
+    Return the items of the store's orders created in [start, end), in order
+    of their orders.
+    """
+    items = OrderItem.objects.filter(order__store_id=store_id)
+    if start is not None:
+        items = items.filter(order__created_at__gte=start)
+    if end is not None:
+        items = items.filter(order__created_at__lt=end)
+    return items.order_by("order_id", "id").values_list(
+        "order_id",
+        "order__created_at",
+        "order__updated_at",
+        "order__status",
+        "order__type",
+        "order__pick_up_datetime",
+        "order__cart__user_id",
+        "order__cart__user__first_name",
+        "order__cart__user__last_name",
+        "order__cart__user__email",
+        "order__total_price",
+        "id",
+        "product_id",
+        "product__name",
+        "quantity",
+        "price_per_item",
+    )
+
+
+def iter_order_item_rows(items):
+    """
+    Yield a flat row of ORDER_ITEM_COLUMNS per order item, for CSV.
+    """
+    to_datetime = make_datetime_mapper()
+    for (
+        order_id,
+        created_at,
+        updated_at,
+        status,
+        type,
+        pick_up_datetime,
+        customer_id,
+        first_name,
+        last_name,
+        email,
+        total_price,
+        item_id,
+        product_id,
+        product,
+        quantity,
+        price_per_item,
+    ) in items.iterator(chunk_size=CHUNK_SIZE):
+        yield {
+            "order_id": order_id,
+            "created_at": to_datetime(created_at),
+            "updated_at": to_datetime(updated_at),
+            "status": status,
+            "type": type,
+            "pick_up_datetime": to_datetime(pick_up_datetime),
+            "customer_id": customer_id,
+            "customer": full_name(first_name, last_name),
+            "customer_email": email,
+            "total_price": total_price,
+            "item_id": item_id,
+            "product_id": product_id,
+            "product": product,
+            "quantity": quantity,
+            "price_per_item": price_per_item,
+        }
+
+
+def iter_orders(items):
+    """
+    Yield every order with its items nested, for NDJSON.
+    """
+    rows = iter_order_item_rows(items)
+    for _, order_rows in groupby(rows, key=lambda row: row["order_id"]):
+        first = next(order_rows)
+        yield {
+            "id": first["order_id"],
+            "created_at": first["created_at"],
+            "updated_at": first["updated_at"],
+            "status": first["status"],
+            "type": first["type"],
+            "pick_up_datetime": first["pick_up_datetime"],
+            "customer": {
+                "id": first["customer_id"],
+                "name": first["customer"],
+                "email": first["customer_email"],
+            },
+            "total_price": first["total_price"],
+            "items": [
+                {
+                    "id": row["item_id"],
+                    "product": {"id": row["product_id"], "name": row["product"]},
+                    "quantity": row["quantity"],
+                    "price_per_item": row["price_per_item"],
+                }
+                for row in (first, *order_rows)
+            ],
+        }
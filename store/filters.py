@@ -0,0 +1,89 @@
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter
+
+from .managers import StoreQuerySet
+from .models import Product, Store
+
+# Must match the configuration the search_vector triggers are built with.
+SEARCH_CONFIG = "english"
+SEARCH_TERM_PATTERN = re.compile(r"\w+")
+
+
+def search_catalog(queryset, value):
+    """
+    Filter a queryset with a ``search_vector`` column by the words in ``value``,
+    matching every word as a prefix, and annotate the ``search_rank`` of each row.
+    """
+    terms = SEARCH_TERM_PATTERN.findall(value)
+    if not terms:
+        return queryset
+    query = SearchQuery(
+        " & ".join(f"{term}:*" for term in terms),
+        search_type="raw",
+        config=SEARCH_CONFIG,
+    )
+    # ts_rank returns a real; casting keeps the value exact when it is
+    # round-tripped through a pagination cursor.
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=Cast(SearchRank(F("search_vector"), query), FloatField())
+    )
+
+
+class CatalogSearchFilterSet(filters.FilterSet):
+    q = filters.CharFilter(method="filter_q", label="Search")
+
+    def filter_q(self, queryset, name, value):
+        return search_catalog(queryset, value)
+
+
+class ProductFilter(CatalogSearchFilterSet):
+    class Meta:
+        model = Product
+        fields = ["store"]
+
+
+class StoreFilter(CatalogSearchFilterSet):
+    open_now = filters.BooleanFilter(method="filter_open_now", label="Open now")
+
+    class Meta:
+        model = Store
+        fields = []
+
+    def filter_open_now(self, queryset, name, value):
+        condition = StoreQuerySet.open_at()
+        return queryset.filter(condition if value else ~condition)
+
+
+class CatalogOrderingFilter(OrderingFilter):
+    """
+    Orders search results by relevance and everything else by the ordering
+    of the view's paginator. Only the view's ``ordering_fields`` are accepted
+    from the ``ordering`` query parameter, the paginator's ordering is kept
+    after them as a tie-breaker.
+
+    Every ordering ends with "id", the paginator's cursors keep the values of
+    all the fields, so the rows sharing a rank are paged by their IDs.
+    """
+
+    ordering_fields = ()
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        default_ordering = self.get_default_ordering(view)
+        if ordering == default_ordering:
+            if "search_rank" in queryset.query.annotations:
+                return ["-search_rank", "id"]
+            return ordering
+
+        ordered_fields = {term.lstrip("-") for term in ordering}
+        return list(ordering) + [
+            term for term in default_ordering if term.lstrip("-") not in ordered_fields
+        ]
+
+    def get_default_ordering(self, view):
+        return list(view.pagination_class.ordering)
@@ -0,0 +1,98 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+
+
+class IdempotencyKeyMismatch(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "This Idempotency-Key was already used with a different request."
+    default_code = "idempotency_key_mismatch"
+
+
+class IdempotencyKeyInProgress(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "A request with this Idempotency-Key is still in progress."
+    default_code = "idempotency_key_in_progress"
+
+
+def get_request_fingerprint(request):
+    content = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(
+        f"{request.method}|{request.path}|{content}".encode()
+    ).hexdigest()
+
+
+def replay(record: IdempotencyKey, fingerprint):
+    if record.fingerprint != fingerprint:
+        raise IdempotencyKeyMismatch()
+    if record.status_code is None:
+        raise IdempotencyKeyInProgress()
+    return Response(
+        json.loads(record.response),
+        status=record.status_code,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def idempotent(view_method):
+    """
+    Honor the Idempotency-Key header on a view action.
+
+    The key is recorded in the transaction that runs the action, so a
+    concurrent request with the same key waits on the key's unique constraint
+    and then replays the response of the first one, or runs on its own if the
+    first one failed. Only successful responses are kept, for
+    IDEMPOTENCY_KEY_TTL seconds.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        if key is None or not request.user.is_authenticated:
+            return view_method(self, request, *args, **kwargs)
+        if not key or len(key) > 255:
+            raise ValidationError(
+                {IDEMPOTENCY_KEY_HEADER: "Must be 1 to 255 characters long."}
+            )
+
+        fingerprint = get_request_fingerprint(request)
+        now = timezone.now()
+        with transaction.atomic():
+            IdempotencyKey.objects.filter(
+                user=request.user, key=key, expires_at__lte=now
+            ).delete()
+            record, created = IdempotencyKey.objects.get_or_create(
+                user=request.user,
+                key=key,
+                defaults={
+                    "fingerprint": fingerprint,
+                    "expires_at": now
+                    + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                },
+            )
+            if not created:
+                return replay(record, fingerprint)
+
+            response = view_method(self, request, *args, **kwargs)
+            if status.is_success(response.status_code):
+                record.status_code = response.status_code
+                record.response = JSONRenderer().render(response.data).decode()
+                record.save(update_fields=["status_code", "response"])
+            else:
+                record.delete()
+        return response
+
+    return wrapper
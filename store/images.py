@@ -0,0 +1,225 @@
+"""
+Resized variants of the uploaded store and product images.
+
+Uploads are saved as they are, the variants are rendered after the upload's
+transaction commits by a small pool of worker threads (Pillow releases the
+GIL while decoding, resizing and encoding) and recorded in the
+``image_variants`` of the row. Until then, and whenever they were rendered
+from another image than the current one, the row has no variants and
+clients fall back to ``image``.
+
+The queue of the pool is in memory, the renders still queued when a process
+stops are lost. The render_image_variants command, run every few minutes by
+the image-variants service, renders the variants rows are still missing.
+"""
+
+import base64
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# name: the box the image is scaled down to fit in
+VARIANT_SIZES = {
+    "thumbnail": (160, 160),
+    "card": (480, 480),
+    "detail": (1200, 1200),
+}
+# extension: Pillow format and save options
+VARIANT_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+PLACEHOLDER_SIZE = (16, 16)
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_VARIANT_WORKERS,
+            thread_name_prefix="image-variants",
+        )
+    return _executor
+
+
+def get_default_image(model):
+    return model._meta.get_field("image").default
+
+
+def get_variant_name(name, variant, extension):
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, "variants", stem, f"{variant}.{extension}")
+
+
+def has_current_variants(instance):
+    variants = instance.image_variants
+    return bool(variants) and variants.get("source") == instance.image.name
+
+
+def open_image(file, size=None):
+    image = Image.open(file)
+    if size is not None:
+        # JPEGs can be decoded at a fraction of their size straight away
+        image.draft("RGB", size)
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image.convert("RGBA"), mask=image.convert("RGBA"))
+        return background
+    return image.convert("RGB")
+
+
+def encode(image, extension):
+    format, options = VARIANT_FORMATS[extension]
+    buffer = BytesIO()
+    image.save(buffer, format, **options)
+    return buffer.getvalue()
+
+
+def render_variants(name, storage):
+    """
+    Render and store the variants of the image ``name`` and return what
+    ``image_variants`` records of them.
+    """
+    largest = max(VARIANT_SIZES.values())
+    with storage.open(name) as file:
+        original = open_image(file, largest)
+
+    variants = {"source": name}
+    for variant, size in VARIANT_SIZES.items():
+        image = original.copy()
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+        variants[variant] = {"width": image.width, "height": image.height}
+        for extension in VARIANT_FORMATS:
+            variant_name = get_variant_name(name, variant, extension)
+            if storage.exists(variant_name):
+                storage.delete(variant_name)
+            variants[variant][extension] = storage.save(
+                variant_name, ContentFile(encode(image, extension))
+            )
+
+    placeholder = original.copy()
+    placeholder.thumbnail(PLACEHOLDER_SIZE, Image.Resampling.BILINEAR)
+    variants["placeholder"] = "data:image/webp;base64," + base64.b64encode(
+        encode(placeholder, "webp")
+    ).decode("ascii")
+    return variants
+
+
+def delete_variants(model, variants, storage):
+    """
+    Delete the stored variants of an image, unless it is the model's default
+    image that every row without an upload shares.
+    """
+    if not variants or variants.get("source") == get_default_image(model):
+        return
+    for variant in VARIANT_SIZES:
+        for extension in VARIANT_FORMATS:
+            name = variants.get(variant, {}).get(extension)
+            if name:
+                storage.delete(name)
+
+
+def update_image_variants(model_label, pk, name, render=True):
+    """
+    Render the variants of a row's image and save them if the row still has
+    that image. Unless ``render``, only variants another row already has are
+    saved.
+    """
+    model = apps.get_model(model_label)
+    storage = model._meta.get_field("image").storage
+    instance = model.objects.filter(pk=pk, image=name).first()
+    if instance is None or has_current_variants(instance):
+        return
+
+    # rows sharing an image (the default one) share its variants
+    variants = (
+        model.objects.filter(image=name, image_variants__source=name)
+        .values_list("image_variants", flat=True)
+        .first()
+    )
+    if not variants:
+        if not render:
+            return
+        variants = render_variants(name, storage)
+    with transaction.atomic():
+        instance = (
+            model.objects.select_for_update().filter(pk=pk, image=name).first()
+        )
+        if instance is None:
+            # replaced or deleted in the meantime
+            if name != get_default_image(model):
+                delete_variants(model, variants, storage)
+            return
+        previous = instance.image_variants
+        instance.image_variants = variants
+        # goes through post_save so the store's catalog is invalidated
+        instance.save(update_fields=["image_variants"])
+    if previous and previous.get("source") != name:
+        delete_variants(model, previous, storage)
+
+
+def run_image_variant_update(model_label, pk, name, render=True):
+    try:
+        update_image_variants(model_label, pk, name, render)
+    except Exception:
+        logger.exception(
+            "Couldn't render the variants of %s %s image %s", model_label, pk, name
+        )
+    finally:
+        close_old_connections()
+
+
+def schedule_image_variants(instance):
+    """
+    Render the variants of an instance's image in the worker pool once the
+    current transaction commits, unless they are current already.
+
+    The variants of the default image are only rendered by the
+    render_image_variants command, as renders of it running concurrently
+    would overwrite each other's files; other rows just reuse them.
+    """
+    if not instance.image or has_current_variants(instance):
+        return
+    name = instance.image.name
+    task = partial(
+        run_image_variant_update,
+        instance._meta.label,
+        instance.pk,
+        name,
+        render=name != get_default_image(type(instance)),
+    )
+    transaction.on_commit(lambda: get_executor().submit(task))
+
+
+def get_variant_urls(name, variants, storage, prefix=""):
+    """
+    Return the URLs of the variants of the image ``name``, or None if they
+    haven't been rendered from it.
+    """
+    if not variants or variants.get("source") != name:
+        return None
+    urls = {"placeholder": variants["placeholder"]}
+    for variant in VARIANT_SIZES:
+        urls[variant] = {
+            "width": variants[variant]["width"],
+            "height": variants[variant]["height"],
+            **{
+                extension: f"{prefix}{storage.url(variants[variant][extension])}"
+                for extension in VARIANT_FORMATS
+            },
+        }
+    return urls
@@ -0,0 +1,242 @@
+"""
+Bulk import of a store's products from CSV or NDJSON files.
+
+Files are read a line at a time and imported in chunks of ``CHUNK_SIZE``
+rows: every chunk is validated in Python against the store's product names
+and categories, which are read once, and inserted with one bulk_create.
+Invalid rows are skipped and reported, the others are imported.
+"""
+
+import codecs
+import csv
+import json
+
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+from rest_framework.exceptions import ValidationError
+
+from .images import get_default_image
+from .models import Category, Product, Store
+from .serializers import ProductImportRowSerializer, ProductImportSerializer
+from .signals import touch_store_catalog, update_store_product_counts
+
+CHUNK_SIZE = 1000
+COLUMNS = set(ProductImportRowSerializer().fields)
+REQUIRED_COLUMNS = {"name", "description", "price", "category"}
+
+
+def read_csv(lines):
+    reader = csv.DictReader(lines)
+    columns = set(reader.fieldnames or ())
+    missing = REQUIRED_COLUMNS - columns
+    if missing:
+        raise ValidationError(
+            {"file": f"Missing columns: {', '.join(sorted(missing))}."}
+        )
+    for row in reader:
+        # a blank optional column takes its default
+        yield reader.line_num, {
+            column: value
+            for column, value in row.items()
+            if column in COLUMNS and value not in ("", None)
+        }
+
+
+def read_ndjson(lines):
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, None
+            continue
+        yield line_number, row if isinstance(row, dict) else None
+
+
+READERS = {
+    ProductImportSerializer.CSV: read_csv,
+    ProductImportSerializer.NDJSON: read_ndjson,
+}
+
+
+def read_rows(file, format):
+    """
+    Yield the line number and content of every row of a product file, the
+    content is None for NDJSON lines that aren't JSON objects.
+    """
+    lines = codecs.iterdecode(file, "utf-8-sig")
+    try:
+        yield from READERS[format](lines)
+    except (UnicodeDecodeError, csv.Error) as error:
+        raise ValidationError({"file": f"Couldn't read the file: {error}"})
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+NAME_TAKEN = "A product with that name already exists in your store"
+
+
+class ProductImport:
+    def __init__(self, store_id):
+        self.store_id = store_id
+        self.row_serializer = ProductImportRowSerializer()
+        self.names = {
+            name: None
+            for name in Product.objects.filter(store_id=store_id)
+            .values_list(Lower("name"), flat=True)
+            .iterator()
+        }
+        self.categories = {
+            category.name.lower(): category
+            for category in Category.objects.filter(store_id=store_id)
+        }
+        # every product without an upload shares the variants of the default
+        # image, so they don't have to be rendered again
+        default_image = get_default_image(Product)
+        self.default_image_variants = (
+            Product.objects.filter(
+                image=default_image, image_variants__source=default_image
+            )
+            .values_list("image_variants", flat=True)
+            .first()
+        ) or {}
+        self.created = 0
+        self.created_available = 0
+        self.errors = []
+
+    def validate(self, line_number, row):
+        if row is None:
+            self.errors.append(
+                {"line": line_number, "errors": ["Expected a JSON object."]}
+            )
+            return None
+        try:
+            attrs = self.row_serializer.run_validation(row)
+        except ValidationError as error:
+            self.errors.append({"line": line_number, "errors": error.detail})
+            return None
+
+        name = attrs["name"].lower()
+        if name in self.names:
+            duplicate = self.names[name]
+            message = (
+                NAME_TAKEN
+                if duplicate is None
+                else f"The name is already used on line {duplicate}."
+            )
+            self.errors.append({"line": line_number, "errors": {"name": [message]}})
+            return None
+        self.names[name] = line_number
+        return attrs
+
+    def import_chunk(self, rows):
+        valid = [
+            attrs
+            for attrs in (self.validate(line_number, row) for line_number, row in rows)
+            if attrs is not None
+        ]
+        new_categories = {}
+        for attrs in valid:
+            key = attrs["category"].lower()
+            if key not in self.categories and key not in new_categories:
+                new_categories[key] = Category(
+                    store_id=self.store_id, name=attrs["category"]
+                )
+        if new_categories:
+            # categories created in the meantime are used as they are
+            Category.objects.bulk_create(
+                new_categories.values(), ignore_conflicts=True
+            )
+            self.categories.update(
+                (category.key, category)
+                for category in Category.objects.annotate(key=Lower("name")).filter(
+                    store_id=self.store_id, key__in=new_categories
+                )
+            )
+
+        products = self.create_products(valid)
+        self.created += len(products)
+        self.created_available += sum(product.is_available for product in products)
+
+    def create_products(self, valid):
+        """
+        Insert the products of the valid rows, except the ones whose name a
+        product created in the meantime took, which are reported.
+        """
+        while valid:
+            try:
+                with transaction.atomic():
+                    return Product.objects.bulk_create(
+                        Product(
+                            store_id=self.store_id,
+                            category=self.categories[attrs["category"].lower()],
+                            name=attrs["name"],
+                            description=attrs["description"],
+                            price=attrs["price"],
+                            is_available=attrs["is_available"],
+                            image_variants=self.default_image_variants,
+                        )
+                        for attrs in valid
+                    )
+            except IntegrityError:
+                taken = set(
+                    Product.objects.annotate(key=Lower("name"))
+                    .filter(
+                        store_id=self.store_id,
+                        key__in=[attrs["name"].lower() for attrs in valid],
+                    )
+                    .values_list("key", flat=True)
+                )
+                if not taken:
+                    raise
+            remaining = []
+            for attrs in valid:
+                name = attrs["name"].lower()
+                if name in taken:
+                    self.errors.append(
+                        {"line": self.names[name], "errors": {"name": [NAME_TAKEN]}}
+                    )
+                    self.names[name] = None
+                else:
+                    remaining.append(attrs)
+            valid = remaining
+        return []
+
+    def run(self, rows):
+        for chunk in chunked(rows, CHUNK_SIZE):
+            self.import_chunk(chunk)
+        # bulk_create skips the signals that keep these up to date
+        if self.created:
+            update_store_product_counts(
+                self.store_id, self.created, self.created_available
+            )
+            touch_store_catalog(self.store_id)
+        return {
+            "created": self.created,
+            "failed": len(self.errors),
+            "errors": sorted(self.errors, key=lambda error: error["line"]),
+        }
+
+
+@transaction.atomic
+def import_products(store_id, file, format) -> dict:
+    """
+    Import the products of a CSV or NDJSON ``file`` into the store and return
+    how many were created along with the errors of the rows that weren't.
+
+    Rows have the fields of ProductImportRowSerializer, categories are
+    matched by name and created when missing. The store is locked for the
+    import, so imports into the same store run one after the other.
+    """
+    Store.objects.select_for_update().values_list("pk").get(pk=store_id)
+    return ProductImport(store_id).run(read_rows(file, format))
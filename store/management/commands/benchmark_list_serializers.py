@@ -0,0 +1,106 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+
+from store.models import Order, Product, Store
+from store.projections import OrderProjection, ProductProjection, StoreProjection
+from store.serializers import (
+    ListAndRetrieveProductSerializer,
+    OrderSerializer,
+    StoreSerializer,
+)
+
+BENCHMARKS = {
+    "stores": (
+        Store.objects.prefetch_related("user__groups")
+        .select_related("user", "address")
+        .annotate_is_open(),
+        StoreSerializer,
+        StoreProjection,
+    ),
+    "products": (
+        Product.objects.select_related("store__address", "category"),
+        ListAndRetrieveProductSerializer,
+        ProductProjection,
+    ),
+    "orders": (
+        Order.objects.select_related("cart__user", "store__address").prefetch_related(
+            "items__product", "feedbacks__customer"
+        ),
+        OrderSerializer,
+        OrderProjection,
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the list serializers against their values() projections on the "
+        "same rows and checks that both render the same JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "endpoints",
+            nargs="*",
+            help=f"What to benchmark among {', '.join(BENCHMARKS)}, everything by default.",
+        )
+        parser.add_argument(
+            "--rows", type=int, default=100, help="Rows per run (default: 100)."
+        )
+        parser.add_argument(
+            "--runs", type=int, default=20, help="Runs of each side (default: 20)."
+        )
+
+    def handle(self, *args, **options):
+        rows, runs = options["rows"], options["runs"]
+        if rows < 1 or runs < 1:
+            raise CommandError("--rows and --runs must be positive.")
+        unknown = set(options["endpoints"]) - set(BENCHMARKS)
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}.")
+
+        renderer = JSONRenderer()
+        for name in options["endpoints"] or BENCHMARKS:
+            queryset, serializer_class, projection_class = BENCHMARKS[name]
+            queryset = queryset.order_by("-updated_at", "-created_at", "id")
+
+            def serialize():
+                return serializer_class(queryset[:rows], many=True).data
+
+            def project():
+                projection = projection_class()
+                return projection.represent(projection.project(queryset)[:rows])
+
+            serialized = renderer.render(serialize())
+            projected = renderer.render(project())
+            if serialized != projected:
+                raise CommandError(
+                    f"The {name} projection doesn't match its serializer."
+                )
+
+            serializer_time, serializer_queries = self.measure(serialize, runs)
+            projection_time, projection_queries = self.measure(project, runs)
+            self.stdout.write(
+                f"{name}: {len(projected)} bytes, "
+                f"serializer {serializer_time * 1000:.2f} ms in {serializer_queries} queries, "
+                f"projection {projection_time * 1000:.2f} ms in {projection_queries} queries "
+                f"({serializer_time / projection_time:.1f}x)"
+            )
+
+    def measure(self, function, runs):
+        """
+        Return the best time of ``runs`` calls of ``function`` and how many
+        queries a call makes.
+        """
+        best = None
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(runs):
+                start = perf_counter()
+                function()
+                elapsed = perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+        return best, len(queries) // runs
@@ -0,0 +1,197 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from store.models import Product, Store
+
+OWNER = "owner"
+CUSTOMER = "customer"
+
+# who requests what, the paths are formatted with the sampled IDs
+ENDPOINTS = (
+    (None, "/api/store/stores/"),
+    (None, "/api/store/stores/?q={store_name}"),
+    (None, "/api/store/stores/?open_now=true"),
+    (None, "/api/store/stores/{store}/"),
+    (None, "/api/store/stores/{store}/menu/"),
+    (None, "/api/store/products/"),
+    (None, "/api/store/products/?store={store}"),
+    (None, "/api/store/products/?q={product_name}"),
+    (None, "/api/store/products/{product}/"),
+    (OWNER, "/api/store/stores/my_store/"),
+    (OWNER, "/api/store/stores/my_store/analytics/"),
+    (OWNER, "/api/store/products/my_products/"),
+    (OWNER, "/api/store/categories/"),
+    (OWNER, "/api/store/orders/my_store_orders/"),
+    (OWNER, "/api/store/orders/my_store_orders/?since="),
+    (OWNER, "/api/store/orders/my_store_orders/export/?format=csv"),
+    (OWNER, "/api/store/feedbacks/"),
+    (CUSTOMER, "/api/store/cart/"),
+    (CUSTOMER, "/api/store/cartitems/"),
+    (CUSTOMER, "/api/store/orders/my_orders/"),
+    (CUSTOMER, "/api/store/orders/my_orders/?since="),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Requests the read endpoints as a store owner, a customer and an "
+        "anonymous user, EXPLAINs every query they run and fails if any of "
+        "them scans a table sequentially. Run it against a database seeded "
+        "with realistic data, nothing it does is committed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--store",
+            type=int,
+            help="ID of the store to request as its owner, by default the one "
+            "with the most orders.",
+        )
+        parser.add_argument(
+            "--customer",
+            type=int,
+            help="ID of the customer to request as, by default the one with "
+            "the most orders.",
+        )
+        parser.add_argument(
+            "--min-rows",
+            type=int,
+            default=1000,
+            help="Ignore the sequential scans of tables with fewer rows "
+            "(default: 1000).",
+        )
+
+    def handle(self, *args, **options):
+        store = self.get_store(options["store"])
+        customer = self.get_customer(options["customer"])
+        product = Product.objects.filter(store=store).order_by("pk").first()
+        if product is None:
+            raise CommandError(f"Store {store.pk} has no products.")
+        ids = {
+            "store": store.pk,
+            "store_name": store.name.split()[0],
+            "product": product.pk,
+            "product_name": product.name.split()[0],
+        }
+        clients = {None: APIClient(), OWNER: APIClient(), CUSTOMER: APIClient()}
+        clients[OWNER].force_authenticate(store.user)
+        clients[CUSTOMER].force_authenticate(customer)
+
+        table_rows = self.get_table_rows()
+        failures = 0
+        # caching would hide the queries of the responses
+        with override_settings(
+            CACHES={
+                "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+            }
+        ), transaction.atomic():
+            # a sequential scan is then only planned where no index can serve
+            # the query, even for tables too small for the index to pay off
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            for who, path in ENDPOINTS:
+                path = path.format(**ids)
+                queries = self.request(clients[who], path)
+                scans = []
+                for sql in queries:
+                    scans.extend(
+                        relation
+                        for relation in self.get_sequential_scans(sql)
+                        if table_rows.get(relation, 0) >= options["min_rows"]
+                    )
+                label = f"{who or 'anonymous'} GET {path}: {len(queries)} queries"
+                if scans:
+                    failures += 1
+                    tables = ", ".join(sorted(set(scans)))
+                    self.stdout.write(
+                        self.style.ERROR(f"{label}, sequential scans of {tables}")
+                    )
+                else:
+                    self.stdout.write(f"{label}, no sequential scans")
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f"{failures} endpoints scan tables sequentially.")
+        self.stdout.write(self.style.SUCCESS("Every query is served by an index."))
+
+    def get_store(self, store_id):
+        stores = Store.objects.select_related("user")
+        if store_id is None:
+            stores = stores.annotate(order_count=Count("order")).order_by(
+                "-order_count", "pk"
+            )
+        else:
+            stores = stores.filter(pk=store_id)
+        store = stores.first()
+        if store is None:
+            raise CommandError("There is no store to request as its owner.")
+        return store
+
+    def get_customer(self, customer_id):
+        users = get_user_model().objects.all()
+        if customer_id is None:
+            users = users.annotate(order_count=Count("cart__order")).order_by(
+                "-order_count", "pk"
+            )
+        else:
+            users = users.filter(pk=customer_id)
+        customer = users.first()
+        if customer is None:
+            raise CommandError("There is no customer to request as.")
+        return customer
+
+    def request(self, client, path):
+        """
+        Return the SELECTs run to answer a GET of ``path``.
+        """
+        with CaptureQueriesContext(connection) as captured:
+            response = client.get(path)
+            if response.streaming:
+                b"".join(response.streaming_content)
+        if response.status_code != 200:
+            raise CommandError(f"GET {path} returned {response.status_code}.")
+        queries = []
+        for query in captured.captured_queries:
+            sql = query["sql"]
+            if sql.startswith("DECLARE"):
+                # the server-side cursors of iterator()
+                sql = sql[sql.index(" FOR ") + len(" FOR ") :]
+            if sql.startswith("SELECT"):
+                queries.append(sql)
+        return queries
+
+    def get_sequential_scans(self, sql):
+        """
+        Return the tables the plan of ``sql`` scans sequentially although
+        the planner avoids it wherever an index can be used instead (see
+        ``handle``).
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        nodes = [plan[0]["Plan"]]
+        relations = []
+        while nodes:
+            node = nodes.pop()
+            if node["Node Type"] == "Seq Scan":
+                relations.append(node["Relation Name"])
+            nodes.extend(node.get("Plans", ()))
+        return relations
+
+    def get_table_rows(self):
+        """
+        Return the estimated number of rows of every table.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relname, reltuples FROM pg_class WHERE relkind = 'r'"
+            )
+            return dict(cursor.fetchall())
@@ -0,0 +1,51 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from store.imports import import_products
+from store.models import Store
+from store.serializers import ProductImportSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports the products of a CSV or NDJSON file into a store and "
+        "reports the rows that couldn't be imported."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("store", type=int, help="ID of the store.")
+        parser.add_argument("path", help="CSV or NDJSON file of products.")
+        parser.add_argument(
+            "--format",
+            choices=list(ProductImportSerializer.EXTENSIONS.values()),
+            help="Format of the file, by default guessed from its extension.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            store = Store.objects.get(pk=options["store"])
+        except Store.DoesNotExist:
+            raise CommandError(f"Store {options['store']} does not exist.")
+        format = options["format"] or ProductImportSerializer.EXTENSIONS.get(
+            os.path.splitext(options["path"])[1].lower()
+        )
+        if format is None:
+            raise CommandError("Specify the --format of the file.")
+
+        try:
+            with open(options["path"], "rb") as file:
+                report = import_products(store.pk, file, format)
+        except (OSError, ValidationError) as error:
+            raise CommandError(error)
+
+        for error in report["errors"]:
+            self.stderr.write(f"Line {error['line']}: {json.dumps(error['errors'])}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {report['created']} products into {store.name}, "
+                f"{report['failed']} rows failed."
+            )
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from store.analytics import rebuild_sales_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the hourly and daily sales rollups of every store, or of "
+        "one store, from its orders. Orders can't be written meanwhile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--store", type=int, help="Only rebuild the rollups of this store."
+        )
+
+    def handle(self, *args, **options):
+        store_rollups, product_rollups = rebuild_sales_rollups(options["store"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {store_rollups} store and {product_rollups} product "
+                "sales rollups."
+            )
+        )
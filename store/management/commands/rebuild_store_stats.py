@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from store.models import Feedback, Product, Store
+
+
+def subquery_total(queryset, aggregate):
+    return Coalesce(
+        Subquery(
+            queryset.annotate(total=aggregate).values("total"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = "Recomputes the denormalized rating totals and product counts of every store."
+
+    def handle(self, *args, **options):
+        feedbacks = (
+            Feedback.objects.filter(order__store=OuterRef("pk"))
+            .order_by()
+            .values("order__store")
+        )
+        products = (
+            Product.objects.filter(store=OuterRef("pk")).order_by().values("store")
+        )
+        with transaction.atomic():
+            updated = Store.objects.update(
+                rating_sum=subquery_total(feedbacks, Sum("rating")),
+                rating_count=subquery_total(feedbacks, Count("pk")),
+                product_count=subquery_total(products, Count("pk")),
+                available_product_count=subquery_total(
+                    products, Count("pk", filter=Q(is_available=True))
+                ),
+            )
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats of {updated} stores."))
@@ -0,0 +1,78 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from store.images import get_executor, run_image_variant_update
+from store.models import Product, Store
+
+# rows changed more recently may have their render queued in a web worker
+PENDING_RENDER_TIME = timedelta(minutes=1)
+
+
+class Command(BaseCommand):
+    help = (
+        "Renders the resized variants of every store and product image that "
+        "doesn't have current ones: uploads from before variants existed, and "
+        "the renders a web worker lost when it stopped with them queued. The "
+        "variants of the default images are only rendered by it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Render the variants of every image again.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Render the missing variants again every this many seconds "
+            "instead of exiting.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                self.render(options["force"])
+                if options["interval"] is None:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+    def render(self, force):
+        executor = get_executor()
+        for model in (Store, Product):
+            rows = model.objects.exclude(image="")
+            if not force:
+                rows = rows.filter(updated_at__lt=timezone.now() - PENDING_RENDER_TIME)
+            rows = rows.values_list("pk", "image", "image_variants")
+            tasks = [
+                (model._meta.label, pk, image)
+                for pk, image, variants in rows.iterator()
+                if force or variants.get("source") != image
+            ]
+            if not tasks:
+                continue
+            if force:
+                model.objects.filter(pk__in=[pk for _, pk, _ in tasks]).update(
+                    image_variants={}
+                )
+            # rows sharing an image reuse its variants once they are rendered
+            images = set()
+            first, rest = [], []
+            for task in tasks:
+                (rest if task[2] in images else first).append(task)
+                images.add(task[2])
+            for batch in (first, rest):
+                if batch:
+                    # failures are logged by the workers
+                    list(executor.map(run_image_variant_update, *zip(*batch)))
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Rendered the image variants of {len(tasks)} "
+                    f"{model._meta.verbose_name_plural}."
+                )
+            )
@@ -0,0 +1,44 @@
+from django.db import models
+from django.db.models import BooleanField, ExpressionWrapper, F, Q
+from django.utils import timezone
+
+
+class CatalogManager(models.Manager):
+    """
+    Leaves the trigger-maintained ``search_vector`` column out of queries,
+    it is only ever read by the database.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().defer("search_vector")
+
+
+class StoreQuerySet(models.QuerySet):
+    @staticmethod
+    def open_at(moment=None):
+        """
+        Condition matching the stores open at ``moment`` (now by default),
+        compared in the configured TIME_ZONE.
+        """
+        now = timezone.localtime(moment).time()
+        same_day = Q(opening_time__lt=F("closing_time")) & Q(
+            opening_time__lte=now, closing_time__gt=now
+        )
+        # e.g. 10 PM to 6 AM
+        overnight = Q(opening_time__gt=F("closing_time")) & (
+            Q(opening_time__lte=now) | Q(closing_time__gt=now)
+        )
+        return same_day | overnight
+
+    def annotate_is_open(self, moment=None):
+        return self.annotate(
+            is_open_now=ExpressionWrapper(
+                self.open_at(moment), output_field=BooleanField()
+            )
+        )
+
+    def open_now(self):
+        return self.filter(self.open_at())
+
+
+StoreManager = CatalogManager.from_queryset(StoreQuerySet)
@@ -0,0 +1,52 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:16
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def populate_store_ratings(apps, schema_editor):
+    Feedback = apps.get_model("store", "Feedback")
+    Store = apps.get_model("store", "Store")
+    feedbacks = (
+        Feedback.objects.filter(order__store=OuterRef("pk"))
+        .order_by()
+        .values("order__store")
+    )
+    Store.objects.update(
+        rating_sum=Coalesce(
+            Subquery(
+                feedbacks.annotate(total=Sum("rating")).values("total"),
+                output_field=IntegerField(),
+            ),
+            0,
+        ),
+        rating_count=Coalesce(
+            Subquery(
+                feedbacks.annotate(total=Count("pk")).values("total"),
+                output_field=IntegerField(),
+            ),
+            0,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0031_alter_order_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='store',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='store',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_store_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:17
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('store', '0032_store_rating_sum_store_rating_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='category',
+            index=models.Index(fields=['store', '-updated_at', '-created_at', 'id'], name='category_store_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='feedback',
+            index=models.Index(fields=['-updated_at', '-created_at', 'id'], name='feedback_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['store', '-updated_at', '-created_at', 'id'], name='order_store_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['cart', '-updated_at', '-created_at', 'id'], name='order_cart_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(fields=['-updated_at', '-created_at', 'id'], name='product_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(fields=['store', '-updated_at', '-created_at', 'id'], name='product_store_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='store',
+            index=models.Index(fields=['-updated_at', '-created_at', 'id'], name='store_recent_idx'),
+        ),
+    ]
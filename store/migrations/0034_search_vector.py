@@ -0,0 +1,85 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:18
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+CREATE_SEARCH_TRIGGERS = """
+CREATE FUNCTION store_product_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(
+            (SELECT name FROM store_category WHERE id = NEW.category_id), ''
+        )), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER store_product_search_vector_update
+    BEFORE INSERT OR UPDATE OF name, description, category_id ON store_product
+    FOR EACH ROW EXECUTE FUNCTION store_product_search_vector();
+
+CREATE FUNCTION store_category_search_vector() RETURNS trigger AS $$
+BEGIN
+    -- re-runs store_product_search_vector for the renamed category's products
+    UPDATE store_product SET category_id = category_id WHERE category_id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER store_category_search_vector_update
+    AFTER UPDATE OF name ON store_category
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION store_category_search_vector();
+
+CREATE FUNCTION store_store_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER store_store_search_vector_update
+    BEFORE INSERT OR UPDATE OF name, description ON store_store
+    FOR EACH ROW EXECUTE FUNCTION store_store_search_vector();
+
+UPDATE store_product SET name = name;
+UPDATE store_store SET name = name;
+"""
+
+DROP_SEARCH_TRIGGERS = """
+DROP TRIGGER store_store_search_vector_update ON store_store;
+DROP FUNCTION store_store_search_vector();
+DROP TRIGGER store_category_search_vector_update ON store_category;
+DROP FUNCTION store_category_search_vector();
+DROP TRIGGER store_product_search_vector_update ON store_product;
+DROP FUNCTION store_product_search_vector();
+"""
+
+
+# the GIN indexes are built concurrently by 0046_search_vector_indexes, out
+# of a transaction, once the triggers and the backfill are committed
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0033_recent_ordering_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='store',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_SEARCH_TRIGGERS, DROP_SEARCH_TRIGGERS),
+    ]
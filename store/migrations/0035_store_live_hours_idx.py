@@ -0,0 +1,21 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:19
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('store', '0034_search_vector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='store',
+            index=models.Index(condition=models.Q(('is_live', True)), fields=['opening_time', 'closing_time'], name='store_live_hours_idx'),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:20
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_product_counts(apps, schema_editor):
+    Product = apps.get_model("store", "Product")
+    Store = apps.get_model("store", "Store")
+    products = Product.objects.filter(store=OuterRef("pk")).order_by().values("store")
+    Store.objects.update(
+        product_count=Coalesce(
+            Subquery(
+                products.annotate(total=Count("pk")).values("total"),
+                output_field=IntegerField(),
+            ),
+            0,
+        ),
+        available_product_count=Coalesce(
+            Subquery(
+                products.annotate(
+                    total=Count("pk", filter=Q(is_available=True))
+                ).values("total"),
+                output_field=IntegerField(),
+            ),
+            0,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('store', '0035_store_live_hours_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='store',
+            name='available_product_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='store',
+            name='product_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(
+            populate_product_counts, migrations.RunPython.noop, atomic=True
+        ),
+        AddIndexConcurrently(
+            model_name='store',
+            index=models.Index(condition=models.Q(('is_live', True), ('product_count__gt', 0)), fields=['-updated_at', '-created_at', 'id'], name='store_public_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:22
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0036_store_product_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='store',
+            name='catalog_updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddField(
+            model_name='store',
+            name='catalog_version',
+            field=models.PositiveBigIntegerField(default=1, editable=False),
+        ),
+    ]
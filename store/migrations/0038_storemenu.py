@@ -0,0 +1,24 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0037_store_catalog_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoreMenu',
+            fields=[
+                ('store', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='menu', serialize=False, to='store.store')),
+                ('catalog_version', models.PositiveBigIntegerField()),
+                ('content', models.BinaryField()),
+                ('compressed_content', models.BinaryField()),
+                ('built_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0038_storemenu'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='image_variants',
+            field=models.JSONField(default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='store',
+            name='image_variants',
+            field=models.JSONField(default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def populate_cart_stores(apps, schema_editor):
+    Cart = apps.get_model("store", "Cart")
+    CartItem = apps.get_model("store", "CartItem")
+    Cart.objects.update(
+        store=Subquery(
+            CartItem.objects.filter(cart=OuterRef("pk"))
+            .order_by("-updated_at")
+            .values("product__store")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0040_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='store',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='store.store'),
+        ),
+        migrations.RunPython(populate_cart_stores, migrations.RunPython.noop),
+    ]
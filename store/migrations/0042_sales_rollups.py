@@ -0,0 +1,49 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0041_cart_store'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('period_start', models.DateTimeField()),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('completed_orders', models.IntegerField(default=0)),
+                ('items_sold', models.IntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='store.product')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='store.store')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['store', 'granularity', 'period_start'], name='product_sales_store_idx')],
+                'constraints': [models.UniqueConstraint(fields=('product', 'granularity', 'period_start'), name='unique_product_sales_period')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StoreSalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('period_start', models.DateTimeField()),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('completed_orders', models.IntegerField(default=0)),
+                ('rejected_orders', models.IntegerField(default=0)),
+                ('items_sold', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('rating_count', models.IntegerField(default=0)),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='store.store')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('store', 'granularity', 'period_start'), name='unique_store_sales_period')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-17 01:56
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('store', '0042_sales_rollups'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['store', 'updated_at', 'id'], name='order_store_changes_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['cart', 'updated_at', 'id'], name='order_cart_changes_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.5 on 2026-10-17 02:03
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('store', '0043_order_changes_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='cartitem',
+            index=models.Index(fields=['cart', '-created_at'], name='cartitem_cart_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='feedback',
+            index=models.Index(fields=['order', 'customer'], name='feedback_order_customer_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['category', 'name'], name='product_menu_idx'),
+        ),
+    ]
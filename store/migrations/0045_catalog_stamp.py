@@ -0,0 +1,34 @@
+# Generated by Django 5.1.5 on 2026-10-17 02:28
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def create_catalog_stamp(apps, schema_editor):
+    CatalogStamp = apps.get_model("store", "CatalogStamp")
+    Store = apps.get_model("store", "Store")
+    updated_at = Store.objects.aggregate(updated_at=Max("catalog_updated_at"))
+    CatalogStamp.objects.create(
+        pk=1,
+        updated_at=updated_at["updated_at"] or django.utils.timezone.now(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0044_query_inventory_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogStamp',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=1)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(create_catalog_stamp, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.5 on 2026-10-17 03:10
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+# built by 0034_search_vector on the databases that migrated while it still
+# built them, hence IF NOT EXISTS
+INDEXES = [
+    ('product', 'store_product', 'product_search_vector_idx'),
+    ('store', 'store_store', 'store_search_vector_idx'),
+]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('store', '0045_catalog_stamp'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" '
+                    f'ON "{table}" USING gin ("search_vector")',
+                    f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"',
+                )
+                for _, table, name in INDEXES
+            ],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name=model_name,
+                    index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name=name),
+                )
+                for model_name, _, name in INDEXES
+            ],
+        ),
+    ]
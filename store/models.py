@@ -1,7 +1,8 @@
-from datetime import datetime
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
 from django.core.validators import (
     MaxValueValidator,
@@ -11,7 +12,10 @@ from django.core.validators import (
 from django.db import models
 from django.db.models import Avg
 from django.db.models.functions import Lower
+from django.utils import timezone
 
+from .images import delete_variants
+from .managers import CatalogManager, StoreManager
 from .validators import validate_file_size, validate_mobile_number
 
 
@@ -38,6 +42,8 @@ class Store(models.Model):
         default="store/store/images/default.jpg",
         validators=[validate_file_size],
     )
+    # resized copies of the image, written by the image variant workers
+    image_variants = models.JSONField(default=dict, editable=False)
     mobile_number = models.CharField(
         max_length=11, validators=[MinLengthValidator(11), validate_mobile_number]
     )
@@ -46,14 +52,51 @@ class Store(models.Model):
     opening_time = models.TimeField()
     closing_time = models.TimeField()
     is_live = models.BooleanField(default=False)
+    # kept up to date by the Feedback and Product signals, see store.signals
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    product_count = models.PositiveIntegerField(default=0, editable=False)
+    available_product_count = models.PositiveIntegerField(default=0, editable=False)
+    # bumped whenever the store, its categories or its products change
+    catalog_version = models.PositiveBigIntegerField(default=1, editable=False)
+    catalog_updated_at = models.DateTimeField(default=timezone.now, editable=False)
+    # maintained by a database trigger from name and description
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = StoreManager()
+
+    # written with UPDATE ... SET x = x + n or by background workers only,
+    # saving an instance must not overwrite them with the values it was
+    # loaded with
+    DATABASE_MAINTAINED_FIELDS = {
+        "rating_sum",
+        "rating_count",
+        "product_count",
+        "available_product_count",
+        "catalog_version",
+        "catalog_updated_at",
+        "search_vector",
+        "image_variants",
+    }
+
     def __str__(self):
         return f"{self.name} - {self.address.city}"
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            excluded = self.DATABASE_MAINTAINED_FIELDS | self.get_deferred_fields()
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in excluded
+            ]
+        super().save(*args, **kwargs)
+
     def delete(self, *args, **kwargs):
         if self.image and self.image.name != "store/store/images/default.jpg":
+            delete_variants(Store, self.image_variants, self.image.storage)
             self.image.delete(save=False)
         self.address.delete()
         super().delete(*args, **kwargs)
@@ -65,7 +108,11 @@ class Store(models.Model):
     @property
     def is_open(self):
         """Check if the store is currently open based on the opening and closing time."""
-        now = datetime.now().time()
+        if hasattr(self, "is_open_now"):
+            # annotated by StoreQuerySet.annotate_is_open
+            return self.is_open_now
+
+        now = timezone.localtime().time()
 
         if self.opening_time < self.closing_time:
             return (
@@ -76,6 +123,13 @@ class Store(models.Model):
                 now >= self.opening_time or now < self.closing_time
             )  # Overnight case (e.g., 10 PM to 6 AM)
 
+    @property
+    def rating(self):
+        """Average feedback rating of the store's orders, 0.0 if there is none."""
+        if not self.rating_count:
+            return 0.0
+        return self.rating_sum / self.rating_count
+
     def get_display_name(self):
         if self.address and hasattr(self.address, "city"):
             return f"{self.name} - {self.address.city}"
@@ -83,6 +137,57 @@ class Store(models.Model):
 
     class Meta:
         ordering = ["-updated_at", "-created_at"]
+        indexes = [
+            models.Index(
+                fields=["-updated_at", "-created_at", "id"], name="store_recent_idx"
+            ),
+            GinIndex(fields=["search_vector"], name="store_search_vector_idx"),
+            models.Index(
+                fields=["opening_time", "closing_time"],
+                condition=models.Q(is_live=True),
+                name="store_live_hours_idx",
+            ),
+            # the public store listing
+            models.Index(
+                fields=["-updated_at", "-created_at", "id"],
+                condition=models.Q(is_live=True, product_count__gt=0),
+                name="store_public_recent_idx",
+            ),
+        ]
+
+
+class StoreMenu(models.Model):
+    """
+    Pre-rendered menu document of a store, valid while ``catalog_version``
+    matches the store's.
+    """
+
+    store = models.OneToOneField(
+        Store, on_delete=models.CASCADE, primary_key=True, related_name="menu"
+    )
+    catalog_version = models.PositiveBigIntegerField()
+    content = models.BinaryField()
+    compressed_content = models.BinaryField()
+    built_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Menu of store {self.store_id} v{self.catalog_version}"
+
+
+class CatalogStamp(models.Model):
+    """
+    Version and time of the latest change to the catalog of any store, in a
+    single row. Unlike an aggregate of the stores' versions, it never goes
+    back, not even when a store is deleted.
+    """
+
+    ID = 1
+
+    version = models.PositiveBigIntegerField(default=1)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Catalog v{self.version}"
 
 
 class Category(models.Model):
@@ -97,6 +202,12 @@ class Category(models.Model):
     class Meta:
         verbose_name_plural = "Categories"
         ordering = ["-updated_at", "-created_at"]
+        indexes = [
+            models.Index(
+                fields=["store", "-updated_at", "-created_at", "id"],
+                name="category_store_recent_idx",
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 Lower("name"), "store", name="unique_store_category_case_insensitive"
@@ -117,20 +228,43 @@ class Product(models.Model):
         default="store/product/images/default.jpg",
         validators=[validate_file_size],
     )
+    # resized copies of the image, written by the image variant workers
+    image_variants = models.JSONField(default=dict, editable=False)
     is_available = models.BooleanField(default=True)
+    # maintained by a database trigger from name, category name and description
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CatalogManager()
+
     def __str__(self):
         return self.name
 
     def delete(self, *args, **kwargs):
         if self.image and self.image.name != "store/product/images/default.jpg":
+            delete_variants(Product, self.image_variants, self.image.storage)
             self.image.delete(save=False)
         super().delete(*args, **kwargs)
 
     class Meta:
         ordering = ["-updated_at", "-created_at"]
+        indexes = [
+            models.Index(
+                fields=["-updated_at", "-created_at", "id"], name="product_recent_idx"
+            ),
+            models.Index(
+                fields=["store", "-updated_at", "-created_at", "id"],
+                name="product_store_recent_idx",
+            ),
+            GinIndex(fields=["search_vector"], name="product_search_vector_idx"),
+            # the available products of the menu's categories, by name
+            models.Index(
+                fields=["category", "name"],
+                condition=models.Q(is_available=True),
+                name="product_menu_idx",
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 Lower("name"), "store", name="unique_store_product_case_insensitive"
@@ -140,6 +274,10 @@ class Product(models.Model):
 
 class Cart(models.Model):
     user = models.OneToOneField(get_user_model(), on_delete=models.CASCADE)
+    # the store of the products in the cart, a cart only holds one store's
+    store = models.ForeignKey(
+        Store, on_delete=models.SET_NULL, null=True, blank=True, editable=False
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -164,8 +302,19 @@ class CartItem(models.Model):
     def __str__(self):
         return f"{self.product.name} - {self.quantity} pcs"
 
+    @property
+    def line_total(self):
+        if hasattr(self, "annotated_line_total"):
+            return self.annotated_line_total
+        return self.product.price * self.quantity
+
     class Meta:
         ordering = ["-updated_at", "-created_at"]
+        indexes = [
+            models.Index(
+                fields=["cart", "-created_at"], name="cartitem_cart_recent_idx"
+            )
+        ]
         constraints = [
             models.UniqueConstraint("cart", "product", name="unique_cart_product")
         ]
@@ -211,6 +360,23 @@ class Order(models.Model):
 
     class Meta:
         ordering = ["-updated_at", "-created_at"]
+        indexes = [
+            models.Index(
+                fields=["store", "-updated_at", "-created_at", "id"],
+                name="order_store_recent_idx",
+            ),
+            models.Index(
+                fields=["cart", "-updated_at", "-created_at", "id"],
+                name="order_cart_recent_idx",
+            ),
+            # delta sync, changes oldest first
+            models.Index(
+                fields=["store", "updated_at", "id"], name="order_store_changes_idx"
+            ),
+            models.Index(
+                fields=["cart", "updated_at", "id"], name="order_cart_changes_idx"
+            ),
+        ]
 
 
 class OrderItem(models.Model):
@@ -248,3 +414,113 @@ class Feedback(models.Model):
 
     class Meta:
         ordering = ["-updated_at", "-created_at"]
+        indexes = [
+            models.Index(
+                fields=["-updated_at", "-created_at", "id"], name="feedback_recent_idx"
+            ),
+            # whether a customer gave feedback on an order, see my_orders
+            models.Index(
+                fields=["order", "customer"], name="feedback_order_customer_idx"
+            ),
+        ]
+
+
+class StoreSalesRollup(models.Model):
+    """
+    Sales of a store in an hour or a day, by the creation time of the orders,
+    kept up to date by the Order and Feedback signals, see store.analytics.
+    """
+
+    HOUR = "hour"
+    DAY = "day"
+    GRANULARITY_CHOICES = [
+        (HOUR, "Hour"),
+        (DAY, "Day"),
+    ]
+    store = models.ForeignKey(
+        Store, on_delete=models.CASCADE, related_name="sales_rollups"
+    )
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES)
+    # in the configured TIME_ZONE
+    period_start = models.DateTimeField()
+    # signed, the upserts insert the changes they add up as rows first, and
+    # a CHECK on those would reject the negative ones
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    completed_orders = models.IntegerField(default=0)
+    rejected_orders = models.IntegerField(default=0)
+    items_sold = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    rating_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.store_id} - {self.granularity} of {self.period_start}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["store", "granularity", "period_start"],
+                name="unique_store_sales_period",
+            )
+        ]
+
+
+class ProductSalesRollup(models.Model):
+    """
+    Sales of a product in an hour or a day, see StoreSalesRollup.
+    """
+
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="sales_rollups"
+    )
+    store = models.ForeignKey(Store, on_delete=models.CASCADE)
+    granularity = models.CharField(
+        max_length=4, choices=StoreSalesRollup.GRANULARITY_CHOICES
+    )
+    period_start = models.DateTimeField()
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    completed_orders = models.IntegerField(default=0)
+    items_sold = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.product_id} - {self.granularity} of {self.period_start}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "granularity", "period_start"],
+                name="unique_product_sales_period",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["store", "granularity", "period_start"],
+                name="product_sales_store_idx",
+            )
+        ]
+
+
+class IdempotencyKey(models.Model):
+    """
+    The response to a request sent with an Idempotency-Key header, replayed
+    to the user's retries of the request until it expires.
+    """
+
+    user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    # hash of the method, path and body of the request the key was used with
+    fingerprint = models.CharField(max_length=64)
+    # null until the response is known
+    status_code = models.PositiveSmallIntegerField(null=True)
+    # the response data as JSON text, jsonb wouldn't keep the order of its keys
+    response = models.TextField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.key} - {self.user}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint("user", "key", name="unique_user_idempotency_key")
+        ]
+        indexes = [models.Index(fields=["expires_at"], name="idempotency_expires_idx")]
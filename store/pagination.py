@@ -0,0 +1,227 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import timedelta
+from urllib import parse
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+class DefaultCursorPagination(CursorPagination):
+    """
+    Keyset pagination over the "-updated_at", "-created_at" ordering every
+    model shares, with "id" as the final tie-breaker.
+
+    CursorPagination only keeps the value of the first ordering field in its
+    cursors and steps over the rows sharing it with an offset, which is
+    capped. The cursors here keep the values of every ordering field, so a
+    page starts right after the row the previous one ended with. Orderings
+    must end with a unique field.
+    """
+
+    ordering = ("-updated_at", "-created_at", "id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [
+                term[1:] if term.startswith("-") else f"-{term}" for term in ordering
+            ]
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            values = self.decode_position(queryset, current_position)
+            queryset = queryset.filter(get_keyset_filter(ordering, values))
+
+        results = list(queryset[offset : offset + self.page_size + 1])
+        self.page = results[: self.page_size]
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering
+            )
+        else:
+            has_following_position = False
+            following_position = None
+
+        # as CursorPagination does
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None or offset > 0
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for term in ordering:
+            field_name = term.lstrip("-")
+            if isinstance(instance, dict):
+                values.append(instance[field_name])
+            else:
+                values.append(getattr(instance, field_name))
+        # str() keeps the microseconds of datetimes and json the exact floats
+        return json.dumps(values, separators=(",", ":"), default=str)
+
+    def decode_position(self, queryset, position):
+        """
+        Return the values of the ordering fields ``position`` holds.
+        """
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError(position)
+            return [
+                get_ordering_field(queryset, term.lstrip("-")).to_python(value)
+                for term, value in zip(self.ordering, values)
+            ]
+        except (ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+def get_ordering_field(queryset, name):
+    annotation = queryset.query.annotations.get(name)
+    if annotation is not None:
+        return annotation.output_field
+    return queryset.model._meta.get_field(name)
+
+
+def get_keyset_filter(ordering, values):
+    """
+    Return the filter of the rows that come after the row with ``values`` in
+    ``ordering``.
+    """
+    # (a, b) comes after (x, y) if a comes after x, or a = x and b after y
+    condition = None
+    for term, value in reversed(list(zip(ordering, values))):
+        field_name = term.lstrip("-")
+        lookup = "lt" if term.startswith("-") else "gt"
+        after = Q(**{f"{field_name}__{lookup}": value})
+        if condition is not None:
+            after |= Q(**{field_name: value}) & condition
+        condition = after
+    # the range on the first field alone is what an index can seek to
+    field_name = ordering[0].lstrip("-")
+    lookup = "lte" if ordering[0].startswith("-") else "gte"
+    return Q(**{f"{field_name}__{lookup}": values[0]}) & condition
+
+
+class ChangesPagination(BasePagination):
+    """
+    Delta sync: the rows created or changed after the ``since`` cursor, oldest
+    change first, and the cursor to ask for the next changes with. An empty
+    ``since`` starts from the beginning.
+
+    Rows are stamped with the time they are saved at, and their transaction
+    may commit after rows saved later were read. So the last page never moves
+    the cursor past ``settle_time`` ago, and the rows changed since then are
+    sent again by the next request. This only holds for transactions that
+    commit within ``settle_time`` of saving the rows: the orders are changed
+    by requests, each in its own transaction (ATOMIC_REQUESTS), which must
+    stay well below it. A change committed later than that is missed by the
+    clients that synced in between, until the row changes again.
+    """
+
+    cursor_query_param = "since"
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    settle_time = timedelta(seconds=5)
+
+    @classmethod
+    def is_requested(cls, request):
+        return cls.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.position = self.decode_cursor(request)
+        if self.position is not None:
+            updated_at, pk = self.position
+            # the range on updated_at alone is what the index can seek to
+            queryset = queryset.filter(updated_at__gte=updated_at).filter(
+                Q(updated_at__gt=updated_at) | Q(id__gt=pk)
+            )
+        page_size = self.get_page_size(request)
+        rows = list(queryset.order_by("updated_at", "id")[: page_size + 1])
+        self.has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if rows:
+            self.position = self.get_position(rows[-1])
+        if not self.has_more:
+            settled = (timezone.now() - self.settle_time, 0)
+            if self.position is None or self.position > settled:
+                self.position = settled
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "cursor": self.encode_cursor(self.position),
+                "has_more": self.has_more,
+                "results": data,
+            }
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_position(self, row):
+        if isinstance(row, dict):
+            return row["updated_at"], row["id"]
+        return row.updated_at, row.pk
+
+    def decode_cursor(self, request):
+        encoded = request.query_params[self.cursor_query_param]
+        if not encoded:
+            return None
+        try:
+            querystring = urlsafe_b64decode(encoded.encode("ascii")).decode("ascii")
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            updated_at = parse_datetime(tokens["t"][0])
+            pk = int(tokens["i"][0])
+        except (TypeError, ValueError, KeyError, IndexError):
+            updated_at = None
+        if updated_at is None or timezone.is_naive(updated_at):
+            raise ValidationError({self.cursor_query_param: "Invalid cursor."})
+        return updated_at, pk
+
+    def encode_cursor(self, position):
+        updated_at, pk = position
+        querystring = parse.urlencode({"t": updated_at.isoformat(), "i": pk})
+        return urlsafe_b64encode(querystring.encode("ascii")).decode("ascii")
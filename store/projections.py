@@ -0,0 +1,344 @@
+"""
+Read-only fast paths for the list endpoints.
+
+Each projection produces the same JSON as its serializer counterpart, but
+from ``.values()`` rows instead of model instances and nested serializers.
+Everything that doesn't depend on the row (URL prefixes, the time zone,
+...) is worked out once per response.
+"""
+
+from collections import defaultdict
+from functools import partial
+
+from django.conf import settings
+from django.utils import timezone
+
+from .images import get_variant_urls
+from .models import Feedback, OrderItem, Product, Store
+
+
+def make_datetime_mapper():
+    current_timezone = timezone.get_current_timezone()
+
+    def to_representation(value):
+        # same output as rest_framework.fields.DateTimeField
+        if value is None:
+            return None
+        value = value.astimezone(current_timezone).isoformat()
+        if value.endswith("+00:00"):
+            value = value[:-6] + "Z"
+        return value
+
+    return to_representation
+
+
+def make_image_mapper(model, request=None):
+    """
+    Return the URL of a stored image like rest_framework.fields.ImageField,
+    absolute when there is a request to build it from.
+    """
+    url = model._meta.get_field("image").storage.url
+
+    def to_representation(name):
+        if not name:
+            return None
+        if request is not None:
+            return request.build_absolute_uri(url(name))
+        return url(name)
+
+    return to_representation
+
+
+def make_image_variants_mapper(model):
+    # same output as serializers.ImageVariantsField
+    return partial(
+        get_variant_urls,
+        storage=model._meta.get_field("image").storage,
+        prefix=settings.BASE_URL,
+    )
+
+
+def full_name(first_name, last_name):
+    # same as User.get_full_name()
+    return f"{first_name} {last_name}".strip()
+
+
+class ValuesProjection:
+    """
+    Base class of the projections, ``project()`` turns a queryset into the
+    rows ``represent()`` expects.
+    """
+
+    lookups = ()
+
+    def __init__(self, context=None):
+        self.context = context or {}
+        self.datetime = make_datetime_mapper()
+
+    def project(self, queryset):
+        # annotations are kept, the paginator may order by them
+        return queryset.prefetch_related(None).values(
+            *self.lookups, *queryset.query.annotations
+        )
+
+    def represent(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+    def to_representation(self, row):
+        raise NotImplementedError
+
+
+class StoreProjection(ValuesProjection):
+    """
+    Counterpart of StoreSerializer, expects querysets annotated with
+    ``is_open_now``.
+    """
+
+    lookups = (
+        "id",
+        "user__first_name",
+        "user__last_name",
+        "name",
+        "email",
+        "image",
+        "image_variants",
+        "mobile_number",
+        "delivery_fee",
+        "description",
+        "opening_time",
+        "closing_time",
+        "address__city",
+        "address__province",
+        "is_live",
+        "created_at",
+        "updated_at",
+        "rating_sum",
+        "rating_count",
+    )
+
+    def __init__(self, context=None):
+        super().__init__(context)
+        self.image = make_image_mapper(Store, self.context.get("request"))
+        self.image_variants = make_image_variants_mapper(Store)
+
+    def to_representation(self, row):
+        rating_count = row["rating_count"]
+        return {
+            "id": row["id"],
+            "user": full_name(row["user__first_name"], row["user__last_name"]),
+            "name": row["name"],
+            "email": row["email"],
+            "image": self.image(row["image"]),
+            "image_variants": self.image_variants(row["image"], row["image_variants"]),
+            "mobile_number": row["mobile_number"],
+            "delivery_fee": row["delivery_fee"],
+            "description": row["description"],
+            "opening_time": row["opening_time"].isoformat(),
+            "closing_time": row["closing_time"].isoformat(),
+            "address": {
+                "city": row["address__city"],
+                "province": row["address__province"],
+            },
+            "is_open": row["is_open_now"],
+            "is_live": row["is_live"],
+            "created_at": self.datetime(row["created_at"]),
+            "updated_at": self.datetime(row["updated_at"]),
+            "rating": row["rating_sum"] / rating_count if rating_count else 0.0,
+            "display_name": f"{row['name']} - {row['address__city']}",
+        }
+
+
+class ProductProjection(ValuesProjection):
+    """
+    Counterpart of ListAndRetrieveProductSerializer.
+    """
+
+    lookups = (
+        "id",
+        "store__name",
+        "store__address__city",
+        "category_id",
+        "category__name",
+        "name",
+        "description",
+        "price",
+        "image",
+        "image_variants",
+        "is_available",
+        "created_at",
+        "updated_at",
+    )
+
+    def __init__(self, context=None):
+        super().__init__(context)
+        # ListAndRetrieveProductSerializer prefixes the relative URL
+        self.image = make_image_mapper(Product)
+        self.image_variants = make_image_variants_mapper(Product)
+
+    def to_representation(self, row):
+        return {
+            "id": row["id"],
+            "store": f"{row['store__name']} - {row['store__address__city']}",
+            "category": {"id": row["category_id"], "name": row["category__name"]},
+            "image_variants": self.image_variants(row["image"], row["image_variants"]),
+            "name": row["name"],
+            "description": row["description"],
+            "price": row["price"],
+            "image": f"{settings.BASE_URL}{self.image(row['image'])}",
+            "is_available": row["is_available"],
+            "created_at": self.datetime(row["created_at"]),
+            "updated_at": self.datetime(row["updated_at"]),
+        }
+
+
+class OrderProjection(ValuesProjection):
+    """
+    Counterpart of OrderSerializer, the items and feedbacks of a page of
+    orders are read with one query each.
+    """
+
+    lookups = (
+        "id",
+        "store_id",
+        "store__name",
+        "store__delivery_fee",
+        "store__image",
+        "store__address__city",
+        "status",
+        "total_price",
+        "created_at",
+        "updated_at",
+        "type",
+        "pick_up_datetime",
+        "cart__user_id",
+        "cart__user__first_name",
+        "cart__user__last_name",
+        "cart__user__address",
+    )
+
+    def __init__(self, context=None):
+        super().__init__(context)
+        # OrderStoreSerializer doesn't quote the image name
+        self.store_image_prefix = f"{settings.BASE_URL}{settings.MEDIA_URL}"
+        self.with_feedback_flag = self.context.get("action") == "my_orders"
+
+    def represent(self, rows):
+        rows = list(rows)
+        order_ids = [row["id"] for row in rows]
+
+        items = defaultdict(list)
+        for item in OrderItem.objects.filter(order_id__in=order_ids).values(
+            "order_id",
+            "id",
+            "product_id",
+            "product__name",
+            "product__price",
+            "quantity",
+            "price_per_item",
+        ):
+            items[item["order_id"]].append(
+                {
+                    "id": item["id"],
+                    "product": {
+                        "id": item["product_id"],
+                        "name": item["product__name"],
+                        "price": item["product__price"],
+                    },
+                    "quantity": item["quantity"],
+                    "price_per_item": item["price_per_item"],
+                }
+            )
+
+        feedbacks = defaultdict(list)
+        for feedback in Feedback.objects.filter(order_id__in=order_ids).values(
+            "order_id",
+            "id",
+            "customer__first_name",
+            "customer__last_name",
+            "rating",
+            "description",
+        ):
+            feedbacks[feedback["order_id"]].append(
+                {
+                    "id": feedback["id"],
+                    "customer": full_name(
+                        feedback["customer__first_name"],
+                        feedback["customer__last_name"],
+                    ),
+                    "rating": feedback["rating"],
+                    "description": feedback["description"],
+                }
+            )
+
+        return [
+            self.to_representation(row, items[row["id"]], feedbacks[row["id"]])
+            for row in rows
+        ]
+
+    def to_representation(self, row, items, feedbacks):
+        data = {
+            "id": row["id"],
+            "store": {
+                "id": row["store_id"],
+                "name": row["store__name"],
+                "delivery_fee": row["store__delivery_fee"],
+                "image": f"{self.store_image_prefix}{row['store__image']}",
+                "display_name": f"{row['store__name']} - {row['store__address__city']}",
+            },
+            "status": row["status"],
+            "total_price": row["total_price"],
+            "items": items,
+            "created_at": self.datetime(row["created_at"]),
+            "updated_at": self.datetime(row["updated_at"]),
+            "feedbacks": feedbacks,
+            "type": row["type"],
+            "pick_up_datetime": self.datetime(row["pick_up_datetime"]),
+            "user": {
+                "id": row["cart__user_id"],
+                "name": full_name(
+                    row["cart__user__first_name"], row["cart__user__last_name"]
+                ),
+                "address": row["cart__user__address"],
+            },
+        }
+        if self.with_feedback_flag:
+            data["has_submitted_feedback"] = row["has_submitted_feedback"]
+        return data
+
+
+class ProjectionMixin:
+    """
+    Paginated responses rendered by the view's ``projection_class`` instead
+    of its serializer.
+    """
+
+    projection_class = None
+    # paginates instead when the request asks for changes
+    changes_pagination_class = None
+
+    def get_projection(self):
+        return self.projection_class(context=self.get_serializer_context())
+
+    def get_projected_response(self, queryset):
+        projection = self.get_projection()
+        changes_pagination_class = self.changes_pagination_class
+        if changes_pagination_class is not None and (
+            changes_pagination_class.is_requested(self.request)
+        ):
+            paginator = changes_pagination_class()
+            page = paginator.paginate_queryset(
+                projection.project(queryset), self.request, view=self
+            )
+            return paginator.get_paginated_response(projection.represent(page))
+        page = self.paginate_queryset(projection.project(queryset))
+        return self.get_paginated_response(projection.represent(page))
+
+
+class ProjectedListMixin(ProjectionMixin):
+    """
+    Serve ``list`` through the view's projection.
+    """
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.get_projected_response(queryset)
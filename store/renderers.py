@@ -0,0 +1,94 @@
+import csv
+import io
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# rows written to the buffer before it is handed to the response
+ROWS_PER_CHUNK = 200
+
+
+class StreamingRenderer(BaseRenderer):
+    """
+    A renderer of rows, either all at once with ``render`` (for errors and
+    other regular responses) or a chunk at a time with ``render_stream``.
+    """
+
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        rows = [data] if isinstance(data, dict) else data
+        return b"".join(self.render_stream(rows))
+
+    def render_stream(self, rows, columns=None):
+        raise NotImplementedError
+
+
+class CSVRenderer(StreamingRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            # error details come as lists of messages
+            data = {
+                key: "; ".join(map(str, value)) if isinstance(value, list) else value
+                for key, value in data.items()
+            }
+        return super().render(data, accepted_media_type, renderer_context)
+
+    def render_stream(self, rows, columns=None):
+        """
+        Yield the CSV of ``rows``, dicts of ``columns`` (by default the keys
+        of the first row), as encoded chunks starting with the header.
+        """
+        rows = iter(rows)
+        if columns is None:
+            first = next(rows, None)
+            if first is None:
+                return
+            columns = list(first)
+            rows = prepend(first, rows)
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, columns, extrasaction="ignore")
+        writer.writeheader()
+        yield from flush_buffer(buffer)
+        for count, row in enumerate(rows, start=1):
+            writer.writerow(row)
+            if count % ROWS_PER_CHUNK == 0:
+                yield from flush_buffer(buffer)
+        yield from flush_buffer(buffer)
+
+
+class NDJSONRenderer(StreamingRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render_stream(self, rows, columns=None):
+        """
+        Yield ``rows`` as newline delimited JSON, in encoded chunks.
+        """
+        encoder = JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+        buffer = io.StringIO()
+        for count, row in enumerate(rows, start=1):
+            buffer.write(encoder.encode(row))
+            buffer.write("\n")
+            if count % ROWS_PER_CHUNK == 0:
+                yield from flush_buffer(buffer)
+        yield from flush_buffer(buffer)
+
+
+def prepend(first, rows):
+    yield first
+    yield from rows
+
+
+def flush_buffer(buffer):
+    content = buffer.getvalue()
+    if content:
+        buffer.seek(0)
+        buffer.truncate()
+        yield content.encode()
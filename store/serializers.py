@@ -1,7 +1,14 @@
+import os
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
 from django.conf import settings
+from django.db import models
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from .images import get_variant_urls
 from .models import (
     Address,
     Cart,
@@ -12,9 +19,48 @@ from .models import (
     OrderItem,
     Product,
     Store,
+    StoreSalesRollup,
 )
 
 
+class ImageVariantsField(serializers.Field):
+    """
+    The URLs of the resized variants of the instance's image, null until they
+    are rendered.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        return get_variant_urls(
+            instance.image.name,
+            instance.image_variants,
+            instance.image.storage,
+            prefix=settings.BASE_URL,
+        )
+
+
+class UploadedImageField(serializers.ImageField):
+    """
+    An ImageField that trusts the header check of ImageUploadHandler instead
+    of decoding the upload again.
+    """
+
+    def to_internal_value(self, data):
+        if getattr(data, "image_header", None) is None:
+            return super().to_internal_value(data)
+        return serializers.FileField.to_internal_value(self, data)
+
+
+IMAGE_UPLOAD_FIELD_MAPPING = {
+    **serializers.ModelSerializer.serializer_field_mapping,
+    models.ImageField: UploadedImageField,
+}
+
+
 class CreateAddressSerializer(serializers.ModelSerializer):
     class Meta:
         model = Address
@@ -25,6 +71,9 @@ class StoreSerializer(serializers.ModelSerializer):
     address = CreateAddressSerializer()
     user = serializers.StringRelatedField()
     rating = serializers.FloatField(read_only=True)
+    image_variants = ImageVariantsField()
+
+    serializer_field_mapping = IMAGE_UPLOAD_FIELD_MAPPING
 
     class Meta:
         model = Store
@@ -34,6 +83,7 @@ class StoreSerializer(serializers.ModelSerializer):
             "name",
             "email",
             "image",
+            "image_variants",
             "mobile_number",
             "delivery_fee",
             "description",
@@ -63,7 +113,7 @@ class StoreSerializer(serializers.ModelSerializer):
 
         if is_live:
             store = self.instance
-            if store and not store.product_set.exists():
+            if store and not store.product_count:
                 raise ValidationError(
                     {
                         "is_live": "A store must have at least one product before going live."
@@ -102,6 +152,66 @@ class StoreSerializer(serializers.ModelSerializer):
         return data
 
 
+class MenuStoreSerializer(serializers.ModelSerializer):
+    address = CreateAddressSerializer()
+    rating = serializers.FloatField(read_only=True)
+    image_variants = ImageVariantsField()
+
+    class Meta:
+        model = Store
+        fields = (
+            "id",
+            "name",
+            "email",
+            "image",
+            "image_variants",
+            "mobile_number",
+            "delivery_fee",
+            "description",
+            "opening_time",
+            "closing_time",
+            "address",
+            "rating",
+        )
+
+    def to_representation(self, instance: Store):
+        data = super().to_representation(instance)
+        data["display_name"] = instance.get_display_name()
+        data["image"] = f"{settings.BASE_URL}{data.get('image')}"
+        return data
+
+
+class MenuProductSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
+    class Meta:
+        model = Product
+        fields = ["id", "name", "description", "price", "image", "image_variants"]
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data["image"] = f"{settings.BASE_URL}{data.get('image')}"
+        return data
+
+
+class MenuCategorySerializer(serializers.ModelSerializer):
+    products = MenuProductSerializer(many=True, source="available_products")
+
+    class Meta:
+        model = Category
+        fields = ["id", "name", "products"]
+
+
+def get_context_store_id(context):
+    """
+    Return the ID of the requester's store, from the serializer context.
+    """
+    store_id = context.get("store_id")
+    if store_id is None:
+        raise ValidationError({"store": "You must own a store!"})
+    return store_id
+
+
 class CategorySerializer(serializers.ModelSerializer):
     store = serializers.StringRelatedField()
 
@@ -112,13 +222,12 @@ class CategorySerializer(serializers.ModelSerializer):
 
     def validate(self, attrs):
         attrs = super().validate(attrs)
-        user = self.context["user"]
-        store = Store.objects.get(user=user)
-        if Category.objects.filter(store=store, name=attrs.get("name")).exists():
+        store_id = get_context_store_id(self.context)
+        if Category.objects.filter(store_id=store_id, name=attrs.get("name")).exists():
             raise ValidationError(
                 {"name": "A category with that name already exists in your store"}
             )
-        attrs["store"] = store
+        attrs["store_id"] = store_id
         return attrs
 
 
@@ -131,10 +240,11 @@ class ProductCategorySerializer(serializers.ModelSerializer):
 class ListAndRetrieveProductSerializer(serializers.ModelSerializer):
     store = serializers.StringRelatedField()
     category = ProductCategorySerializer()
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Product
-        fields = "__all__"
+        exclude = ["search_vector"]
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
@@ -145,24 +255,56 @@ class ListAndRetrieveProductSerializer(serializers.ModelSerializer):
 class ProductSerializer(serializers.ModelSerializer):
     store = serializers.StringRelatedField()
 
+    serializer_field_mapping = IMAGE_UPLOAD_FIELD_MAPPING
+
     class Meta:
         model = Product
-        fields = "__all__"
+        exclude = ["search_vector", "image_variants"]
         read_only_fields = ["store"]
 
     def validate(self, attrs):
         attrs = super().validate(attrs)
-        user = self.context["user"]
-        store = Store.objects.get(user=user)
+        store_id = get_context_store_id(self.context)
         product_name = attrs.get("name")
-        existing_products = Product.objects.filter(store=store, name=product_name)
+        existing_products = Product.objects.filter(
+            store_id=store_id, name=product_name
+        )
         if self.instance:
             existing_products = existing_products.exclude(pk=self.instance.pk)
         if existing_products.exists():
             raise ValidationError(
                 {"name": "A product with that name already exists in your store"}
             )
-        attrs["store"] = store
+        attrs["store_id"] = store_id
+        return attrs
+
+
+class ProductImportRowSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=255)
+    description = serializers.CharField()
+    price = serializers.DecimalField(
+        max_digits=8, decimal_places=2, min_value=Decimal("0.01")
+    )
+    category = serializers.CharField(max_length=128)
+    is_available = serializers.BooleanField(default=True)
+
+
+class ProductImportSerializer(serializers.Serializer):
+    CSV = "csv"
+    NDJSON = "ndjson"
+    EXTENSIONS = {".csv": CSV, ".ndjson": NDJSON, ".jsonl": NDJSON}
+
+    file = serializers.FileField()
+    format = serializers.ChoiceField(choices=[CSV, NDJSON], required=False)
+
+    def validate(self, attrs):
+        if "format" not in attrs:
+            extension = os.path.splitext(attrs["file"].name)[1].lower()
+            if extension not in self.EXTENSIONS:
+                raise ValidationError(
+                    {"format": "Specify the format, csv or ndjson, of the file."}
+                )
+            attrs["format"] = self.EXTENSIONS[extension]
         return attrs
 
 
@@ -174,10 +316,11 @@ class CartItemStoreSerializer(serializers.ModelSerializer):
 
 class CartItemProductSerializer(serializers.ModelSerializer):
     store = CartItemStoreSerializer()
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Product
-        fields = ["id", "name", "price", "image", "store"]
+        fields = ["id", "name", "price", "image", "image_variants", "store"]
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
@@ -187,6 +330,9 @@ class CartItemProductSerializer(serializers.ModelSerializer):
 
 class ListAndRetrieveCartItemSerializer(serializers.ModelSerializer):
     product = CartItemProductSerializer()
+    line_total = serializers.DecimalField(
+        max_digits=10, decimal_places=2, read_only=True
+    )
 
     class Meta:
         model = CartItem
@@ -200,6 +346,10 @@ class UpdateCartItemSerializer(serializers.ModelSerializer):
 
 
 class CartItemSerializer(serializers.ModelSerializer):
+    product = serializers.PrimaryKeyRelatedField(
+        queryset=Product.objects.filter(is_available=True).select_related("store")
+    )
+
     class Meta:
         model = CartItem
         fields = "__all__"
@@ -210,6 +360,48 @@ class CartItemSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class BulkCartItemSerializer(serializers.Serializer):
+    product = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, max_value=99)
+
+
+class BulkCartSerializer(serializers.Serializer):
+    MERGE = "merge"
+    REPLACE = "replace"
+
+    items = BulkCartItemSerializer(many=True, allow_empty=True)
+    mode = serializers.ChoiceField(choices=[MERGE, REPLACE], default=MERGE)
+
+    def validate_items(self, items):
+        quantities = {}
+        for item in items:
+            quantities[item["product"]] = min(
+                quantities.get(item["product"], 0) + item["quantity"], 99
+            )
+        products = {
+            product.pk: product
+            for product in Product.objects.filter(pk__in=quantities).only(
+                "pk", "name", "store_id", "is_available"
+            )
+        }
+        missing = [pk for pk in quantities if pk not in products]
+        if missing:
+            raise ValidationError(
+                f"Invalid products: {', '.join(map(str, missing))}."
+            )
+        unavailable = [
+            product.name for product in products.values() if not product.is_available
+        ]
+        if unavailable:
+            raise ValidationError(f"No longer available: {', '.join(unavailable)}.")
+        if len({product.store_id for product in products.values()}) > 1:
+            raise ValidationError("All products must be from the same store.")
+        return [
+            {"product": products[pk], "quantity": quantity}
+            for pk, quantity in quantities.items()
+        ]
+
+
 class OrderItemProductSerializer(serializers.ModelSerializer):
     class Meta(CartItemProductSerializer.Meta):
         fields = ["id", "name", "price"]
@@ -277,6 +469,10 @@ class OrderSerializer(serializers.ModelSerializer):
 
 
 class CreateOrderSerializer(serializers.ModelSerializer):
+    store = serializers.PrimaryKeyRelatedField(
+        queryset=Store.objects.select_related("address")
+    )
+
     class Meta:
         model = Order
         fields = [
@@ -292,16 +488,72 @@ class UpdateOrderStatusSerializer(serializers.ModelSerializer):
         fields = ["status"]
 
 
+class DateRangeSerializer(serializers.Serializer):
+    """
+    The ``from`` and ``to`` dates of a query, both included, validated into
+    the bounds of the range [start, end) of times in the current time zone.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # "from" is a keyword, so the fields can't be declared as attributes
+        fields["from"] = serializers.DateField(required=False)
+        fields["to"] = serializers.DateField(required=False)
+        return fields
+
+    def validate(self, attrs):
+        start, end = attrs.pop("from", None), attrs.pop("to", None)
+        if start is not None and end is not None and start > end:
+            raise ValidationError({"to": "Must not be before from."})
+        if start is not None:
+            start = timezone.make_aware(datetime.combine(start, time.min))
+        if end is not None:
+            end = timezone.make_aware(
+                datetime.combine(end + timedelta(days=1), time.min)
+            )
+        return {**attrs, "start": start, "end": end}
+
+
+class SalesAnalyticsSerializer(DateRangeSerializer):
+    DEFAULT_DAYS = 30
+    MAX_HOURLY_DAYS = 31
+
+    granularity = serializers.ChoiceField(
+        choices=StoreSalesRollup.GRANULARITY_CHOICES, default=StoreSalesRollup.DAY
+    )
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if attrs["end"] is None:
+            attrs["end"] = timezone.make_aware(
+                datetime.combine(timezone.localdate() + timedelta(days=1), time.min)
+            )
+        if attrs["start"] is None:
+            attrs["start"] = attrs["end"] - timedelta(days=self.DEFAULT_DAYS)
+        if (
+            attrs["granularity"] == StoreSalesRollup.HOUR
+            and attrs["end"] - attrs["start"] > timedelta(days=self.MAX_HOURLY_DAYS)
+        ):
+            raise ValidationError(
+                {
+                    "granularity": "Hourly analytics span at most "
+                    f"{self.MAX_HOURLY_DAYS} days."
+                }
+            )
+        return attrs
+
+
 class CartSerializer(serializers.ModelSerializer):
     class Meta:
         model = Cart
-        fields = "__all__"
+        exclude = ["store"]
 
     def to_representation(self, instance: Cart):
         data = super().to_representation(instance)
         data["cart_item_count"] = instance.cart_item_count
-        if instance.cartitem_set.count() > 0:
-            store: Store = instance.cartitem_set.first().product.store
+        data["subtotal"] = instance.subtotal
+        if instance.cart_item_count and instance.store is not None:
+            store: Store = instance.store
             data["store"] = StoreSerializer(store).data
             data["store"][
                 "image"
@@ -0,0 +1,211 @@
+import gzip
+
+from django.db import connection, transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+
+from .models import (
+    Cart,
+    CartItem,
+    Category,
+    Order,
+    OrderItem,
+    Product,
+    Store,
+    StoreMenu,
+)
+from .serializers import MenuCategorySerializer, MenuStoreSerializer
+
+
+def build_store_menu(store: Store) -> StoreMenu:
+    """
+    Render the menu of a store, its categories with their available products,
+    and save it for the store's current catalog version.
+    """
+    categories = (
+        Category.objects.filter(store=store)
+        .order_by("name")
+        .prefetch_related(
+            Prefetch(
+                "product_set",
+                queryset=Product.objects.filter(is_available=True).order_by("name"),
+                to_attr="available_products",
+            )
+        )
+    )
+    content = JSONRenderer().render(
+        {
+            "catalog_version": store.catalog_version,
+            "store": MenuStoreSerializer(store).data,
+            "categories": MenuCategorySerializer(
+                [category for category in categories if category.available_products],
+                many=True,
+            ).data,
+        }
+    )
+    menu, _ = StoreMenu.objects.update_or_create(
+        store=store,
+        defaults={
+            "catalog_version": store.catalog_version,
+            "content": content,
+            "compressed_content": gzip.compress(content, mtime=0),
+        },
+    )
+    return menu
+
+
+@transaction.atomic
+def checkout(user, validated_data) -> Order:
+    """
+    Turn the user's cart into an order of the store in ``validated_data``.
+
+    The cart and its items are locked for the whole checkout and read along
+    with their products at once, so it takes the same queries however many
+    items there are. The returned order has its items, feedbacks, store and
+    user in memory, ready for OrderSerializer.
+    """
+    store: Store = validated_data["store"]
+    cart = Cart.objects.select_for_update().get(user=user)
+    cart.user = user
+    cart_items = list(
+        CartItem.objects.select_for_update(of=("self",))
+        .filter(cart=cart)
+        .select_related("product")
+        .order_by("id")
+    )
+    if not cart_items:
+        raise ValidationError({"cart": "Your cart does not contain any items."})
+
+    products = [item.product for item in cart_items]
+    if any(product.store_id != store.pk for product in products):
+        raise ValidationError(
+            {"store": "Your cart contains products of another store."}
+        )
+    unavailable = [product.name for product in products if not product.is_available]
+    if unavailable:
+        raise ValidationError(
+            {"cart": f"No longer available: {', '.join(unavailable)}."}
+        )
+
+    delivery_fee = 0 if validated_data.get("type") == Order.PICK_UP else store.delivery_fee
+    order_items = [
+        OrderItem(
+            product=item.product,
+            quantity=item.quantity,
+            price_per_item=item.product.price * item.quantity,
+        )
+        for item in cart_items
+    ]
+    order = Order.objects.create(
+        cart=cart,
+        total_price=sum(item.price_per_item for item in order_items) + delivery_fee,
+        **validated_data,
+    )
+    for item in order_items:
+        item.order = order
+    OrderItem.objects.bulk_create(order_items)
+    CartItem.objects.filter(pk__in=[item.pk for item in cart_items]).delete()
+
+    # what OrderSerializer would otherwise query for
+    order._prefetched_objects_cache = {"items": order_items, "feedbacks": []}
+    return order
+
+
+@transaction.atomic
+def update_cart(user, items, replace=False) -> Cart:
+    """
+    Merge ``items``, a list of products with quantities of a single store,
+    into the user's cart, or replace its content with them.
+
+    A cart only holds the products of one store: when ``items`` are of
+    another store than the cart's, the items already in the cart are dropped
+    and the cart switches to that store. Otherwise quantities of products
+    already in the cart are added up when merging, capped at 99.
+    """
+    cart = Cart.objects.select_for_update().get(user=user)
+    store_ids = {item["product"].store_id for item in items}
+    existing = {}
+    if store_ids and cart.store_id not in store_ids:
+        # a cart only holds the products of one store
+        CartItem.objects.filter(cart=cart).delete()
+        (cart.store_id,) = store_ids
+    else:
+        existing = {item.product_id: item for item in CartItem.objects.filter(cart=cart)}
+
+    now = timezone.now()
+    created, updated = [], []
+    for item in items:
+        product, quantity = item["product"], item["quantity"]
+        cart_item = existing.pop(product.pk, None)
+        if cart_item is None:
+            created.append(CartItem(cart=cart, product=product, quantity=quantity))
+            continue
+        quantity = quantity if replace else min(cart_item.quantity + quantity, 99)
+        if cart_item.quantity != quantity:
+            cart_item.quantity = quantity
+            cart_item.updated_at = now
+            updated.append(cart_item)
+
+    if replace and existing:
+        CartItem.objects.filter(pk__in=[item.pk for item in existing.values()]).delete()
+    CartItem.objects.bulk_update(updated, ["quantity", "updated_at"])
+    CartItem.objects.bulk_create(created)
+    cart.save(update_fields=["store", "updated_at"])
+    return cart
+
+
+ADD_TO_CART_SQL = """
+WITH cart AS (
+    SELECT id, store_id FROM store_cart WHERE user_id = %(user)s FOR UPDATE
+), cleared AS (
+    DELETE FROM store_cartitem
+    USING cart
+    WHERE store_cartitem.cart_id = cart.id
+        AND cart.store_id IS DISTINCT FROM %(store)s
+), switched AS (
+    UPDATE store_cart
+    SET store_id = %(store)s, updated_at = %(now)s
+    FROM cart
+    WHERE store_cart.id = cart.id
+)
+INSERT INTO store_cartitem (cart_id, product_id, quantity, created_at, updated_at)
+SELECT id, %(product)s, LEAST(%(quantity)s, 99), %(now)s, %(now)s FROM cart
+ON CONFLICT (cart_id, product_id) DO UPDATE
+SET quantity = LEAST(store_cartitem.quantity + EXCLUDED.quantity, 99),
+    updated_at = EXCLUDED.updated_at
+RETURNING id, cart_id, quantity, created_at
+"""
+
+
+def add_to_cart(user, product: Product, quantity) -> CartItem:
+    """
+    Add a quantity of a product to the user's cart in a single statement,
+    which locks the cart, empties it if it holds another store's products and
+    inserts the item or adds to its quantity, capped at 99.
+    """
+    now = timezone.now()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            ADD_TO_CART_SQL,
+            {
+                "user": user.pk,
+                "store": product.store_id,
+                "product": product.pk,
+                "quantity": quantity,
+                "now": now,
+            },
+        )
+        row = cursor.fetchone()
+    if row is None:
+        raise Cart.DoesNotExist()
+    pk, cart_id, quantity, created_at = row
+    return CartItem(
+        pk=pk,
+        cart_id=cart_id,
+        product=product,
+        quantity=quantity,
+        created_at=created_at,
+        updated_at=now,
+    )
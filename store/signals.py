@@ -2,10 +2,25 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.core.mail import send_mail
-from django.db.models.signals import post_delete, post_save
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest, Now
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
 from django.dispatch import receiver
+from django.utils import timezone
 
-from .models import Cart, Order, Store
+from .access import STORE_OWNER, invalidate_access_context
+from .analytics import record_order_rating, record_order_status_change
+from .cache import get_or_create_catalog_stamp, invalidate_catalog
+from .images import schedule_image_variants
+from .models import Cart, CatalogStamp, Category, Feedback, Order, Product, Store
+from .sse import ORDER_CREATED, ORDER_STATUS_CHANGED, publish_order_event
 
 
 @receiver(post_save, sender=get_user_model())
@@ -17,14 +32,48 @@ def create_cart_for_new_user(sender, instance, created, **kwargs):
         Cart.objects.create(user=instance)
 
 
+@receiver(pre_save, sender=get_user_model())
+def remember_previous_user_claims(sender, instance, update_fields=None, **kwargs):
+    """
+    Remember the claimed flags and the name of a user before they are saved.
+    """
+    instance._previous_claims = None
+    instance._previous_name = None
+    if instance.pk is None or (
+        update_fields is not None
+        and not {"is_active", "is_staff", "first_name", "last_name"} & update_fields
+    ):
+        return
+    stored = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list("is_active", "is_staff", "first_name", "last_name")
+        .first()
+    )
+    if stored is not None:
+        instance._previous_claims = stored[:2]
+        instance._previous_name = stored[2:]
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_changed_user_claims(sender, instance, created, **kwargs):
+    """
+    Refuse the tokens of a user who was deactivated or whose staff status
+    changed.
+    """
+    previous = getattr(instance, "_previous_claims", None)
+    if previous is not None and previous != (instance.is_active, instance.is_staff):
+        invalidate_access_context(instance.pk)
+
+
 @receiver(post_save, sender=Store)
 def add_user_to_store_owner(sender, instance: Store, created, **kwargs):
     """
     Add the user to the "Store Owner" group after their store is created.
     """
     if created:
-        store_owner = Group.objects.get(name="Store Owner")
+        store_owner = Group.objects.get(name=STORE_OWNER)
         instance.user.groups.add(store_owner)
+        invalidate_access_context(instance.user_id)
 
 
 @receiver(post_delete, sender=Store)
@@ -33,18 +82,300 @@ def remove_user_to_store_owner(sender, instance: Store, **kwargs):
     Remove the user from the "Store Owner" group after their store is deleted.
     """
     try:
-        store_owner = Group.objects.get(name="Store Owner")
+        store_owner = Group.objects.get(name=STORE_OWNER)
         instance.user.groups.remove(store_owner)
     except Group.DoesNotExist:
         pass
+    invalidate_access_context(instance.user_id)
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+def invalidate_group_members_access(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """
+    Invalidate the access context of the users whose groups changed.
+    """
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        user_ids = [instance.pk]
+    elif action == "pre_clear":
+        user_ids = instance.user_set.values_list("pk", flat=True)
+    else:
+        user_ids = pk_set
+    for user_id in user_ids:
+        invalidate_access_context(user_id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def invalidate_group_access(sender, instance: Group, **kwargs):
+    """
+    Invalidate the access context of the members of a renamed or deleted
+    group.
+    """
+    for user_id in instance.user_set.values_list("pk", flat=True):
+        invalidate_access_context(user_id)
+
+
+def get_stored_values(instance, *fields):
+    """
+    Return the stored ``fields`` of an existing row, or None once it is gone.
+    Inside a transaction the row stays locked until it ends, so concurrent
+    saves of the same row read each other's values instead of the same ones
+    and the changes derived from them are applied once.
+    """
+    queryset = type(instance)._base_manager.filter(pk=instance.pk)
+    if transaction.get_connection().in_atomic_block:
+        queryset = queryset.select_for_update()
+    return queryset.values_list(*fields).first()
+
+
+def update_store_rating(order_id, rating_delta, count_delta):
+    """
+    Apply a rating change to the store that received the given order and to
+    its sales rollups.
+    """
+    Store.objects.filter(order=order_id).update(
+        rating_sum=F("rating_sum") + rating_delta,
+        rating_count=F("rating_count") + count_delta,
+    )
+    record_order_rating(order_id, rating_delta, count_delta)
+
+
+@receiver(pre_save, sender=Feedback)
+def remember_previous_feedback(sender, instance: Feedback, **kwargs):
+    """
+    Remember the stored order and rating of an existing feedback so the store
+    rating can be corrected after it is saved.
+    """
+    instance._previous_rating = None
+    if instance.pk:
+        instance._previous_rating = get_stored_values(instance, "order_id", "rating")
+
+
+@receiver(post_save, sender=Feedback)
+def add_feedback_to_store_rating(sender, instance: Feedback, created, **kwargs):
+    """
+    Add the feedback's rating to the store rating totals.
+    """
+    previous = getattr(instance, "_previous_rating", None)
+    if created or previous is None:
+        update_store_rating(instance.order_id, instance.rating, 1)
+        return
+
+    previous_order_id, previous_rating = previous
+    if previous_order_id == instance.order_id:
+        if previous_rating != instance.rating:
+            update_store_rating(instance.order_id, instance.rating - previous_rating, 0)
+    else:
+        update_store_rating(previous_order_id, -previous_rating, -1)
+        update_store_rating(instance.order_id, instance.rating, 1)
+
+
+@receiver(pre_delete, sender=Feedback)
+def remove_feedback_from_store_rating(sender, instance: Feedback, **kwargs):
+    """
+    Remove the stored rating of the feedback from the store rating totals.
+    """
+    stored = get_stored_values(instance, "order_id", "rating")
+    if stored:
+        order_id, rating = stored
+        update_store_rating(order_id, -rating, -1)
+
+
+def update_store_product_counts(store_id, product_delta, available_delta):
+    """
+    Apply a change in the number of (available) products to a store.
+    """
+    Store.objects.filter(pk=store_id).update(
+        product_count=F("product_count") + product_delta,
+        available_product_count=F("available_product_count") + available_delta,
+    )
+
+
+@receiver(pre_save, sender=Product)
+def remember_previous_product(sender, instance: Product, **kwargs):
+    """
+    Remember the stored store and availability of an existing product so the
+    store's product counts can be corrected after it is saved.
+    """
+    instance._previous_counts = None
+    if instance.pk:
+        instance._previous_counts = get_stored_values(
+            instance, "store_id", "is_available"
+        )
+
+
+@receiver(post_save, sender=Product)
+def add_product_to_store_counts(sender, instance: Product, created, **kwargs):
+    """
+    Count the product in its store's product counts.
+    """
+    previous = getattr(instance, "_previous_counts", None)
+    if created or previous is None:
+        update_store_product_counts(instance.store_id, 1, int(instance.is_available))
+        return
+
+    previous_store_id, previous_is_available = previous
+    if previous_store_id == instance.store_id:
+        available_delta = int(instance.is_available) - int(previous_is_available)
+        if available_delta:
+            update_store_product_counts(instance.store_id, 0, available_delta)
+    else:
+        update_store_product_counts(previous_store_id, -1, -int(previous_is_available))
+        update_store_product_counts(instance.store_id, 1, int(instance.is_available))
+
+
+@receiver(pre_delete, sender=Product)
+def remove_product_from_store_counts(sender, instance: Product, **kwargs):
+    """
+    Remove the product from the product counts of the store it is stored in.
+    """
+    stored = get_stored_values(instance, "store_id", "is_available")
+    if stored:
+        store_id, is_available = stored
+        update_store_product_counts(store_id, -1, -int(is_available))
+
+
+def touch_store_catalog(store_id):
+    """
+    Bump the catalog version of a store and invalidate its cached responses,
+    and bump the catalog stamp once the current transaction commits.
+    """
+    Store.objects.filter(pk=store_id).update(
+        catalog_version=F("catalog_version") + 1, catalog_updated_at=Now()
+    )
+    invalidate_catalog(store_id)
+    transaction.on_commit(bump_catalog_stamp)
+
+
+def bump_catalog_stamp():
+    # after the commit so the single row isn't locked for the rest of the
+    # transaction; its time never goes back even if an earlier bump waited
+    bumped = CatalogStamp.objects.filter(pk=CatalogStamp.ID).update(
+        version=F("version") + 1, updated_at=Greatest("updated_at", Now())
+    )
+    if not bumped:
+        get_or_create_catalog_stamp()
+
+
+@receiver(post_save, sender=Store)
+@receiver(post_delete, sender=Store)
+def touch_changed_store_catalog(sender, instance: Store, **kwargs):
+    """
+    Bump the catalog version of a changed store.
+    """
+    touch_store_catalog(instance.pk)
+
+
+@receiver(post_save, sender=get_user_model())
+def touch_renamed_owner_catalog(sender, instance, created, **kwargs):
+    """
+    Bump the catalog version of the store of an owner whose name changed,
+    the stores are listed with their owner's name.
+    """
+    previous = getattr(instance, "_previous_name", None)
+    if previous is None or previous == (instance.first_name, instance.last_name):
+        return
+    for store_id in Store.objects.filter(user=instance).values_list("pk", flat=True):
+        touch_store_catalog(store_id)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def touch_store_item_catalog(sender, instance, **kwargs):
+    """
+    Bump the catalog version of the store of a changed category or product.
+    """
+    touch_store_catalog(instance.store_id)
+
+
+@receiver(post_save, sender=Feedback)
+@receiver(post_delete, sender=Feedback)
+def touch_feedback_catalog(sender, instance: Feedback, **kwargs):
+    """
+    Bump the catalog version of the store whose rating changed.
+    """
+    touch_store_catalog(instance.order.store_id)
+
+
+@receiver(post_save, sender=Feedback)
+@receiver(post_delete, sender=Feedback)
+def touch_feedback_order(sender, instance: Feedback, **kwargs):
+    """
+    Mark the order of a changed feedback as changed, orders are synced with
+    their feedbacks.
+    """
+    # the time of the save like auto_now, Now() is the start of the
+    # transaction and would fall further behind its commit, see
+    # ChangesPagination
+    Order.objects.filter(pk=instance.order_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Store)
+@receiver(post_save, sender=Product)
+def render_image_variants(sender, instance, **kwargs):
+    """
+    Render the variants of a new or replaced store or product image.
+    """
+    schedule_image_variants(instance)
+
+
+@receiver(pre_save, sender=Order)
+def remember_previous_order_status(sender, instance: Order, **kwargs):
+    """
+    Remember the stored status of an existing order so its sales can be
+    moved between the rollups after it is saved.
+    """
+    instance._previous_status = None
+    if instance.pk:
+        stored = get_stored_values(instance, "status")
+        instance._previous_status = stored and stored[0]
+
+
+@receiver(post_save, sender=Order)
+def add_order_to_sales_rollups(sender, instance: Order, **kwargs):
+    """
+    Count the order in the sales rollups once it is completed or rejected.
+    """
+    record_order_status_change(
+        instance.pk, getattr(instance, "_previous_status", None), instance.status
+    )
+
+
+@receiver(post_save, sender=Order)
+def publish_order_change(sender, instance: Order, created, **kwargs):
+    """
+    Send new orders and status changes to the event streams of the store.
+    """
+    if created:
+        publish_order_event(instance, ORDER_CREATED)
+    elif getattr(instance, "_previous_status", None) not in (None, instance.status):
+        publish_order_event(instance, ORDER_STATUS_CHANGED)
+
+
+@receiver(pre_delete, sender=Order)
+def remove_order_from_sales_rollups(sender, instance: Order, **kwargs):
+    """
+    Remove the order from the sales rollups, while its items still exist.
+    """
+    stored = get_stored_values(instance, "status")
+    if stored:
+        record_order_status_change(instance.pk, stored[0], None)
 
 
 @receiver(post_save, sender=Order)
 def send_email_on_order_update(sender, instance: Order, created, **kwargs):
     """
     Send email to user each time their order updates to a particular status.
+    The email is queued in the outbox along with the order change, see
+    core.mail.
     """
-    if not created:
+    if not created and instance.status != getattr(instance, "_previous_status", None):
         if instance.status in [
             Order.ACCEPTED,
             Order.REJECTED,
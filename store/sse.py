@@ -0,0 +1,307 @@
+"""
+Server-sent events of the orders of a store, for the owners' dashboards.
+
+Order changes are published with NOTIFY in the transaction that makes them,
+so only committed changes are sent. Each ASGI process LISTENs on a single
+database connection and fans the notifications out to the event streams of
+the store they belong to; an idle stream is a queue and a task waiting on
+it, it holds no database connection and runs no query.
+
+The streams start with a ``ready`` event once the connection is listening,
+sent again each time it is listening after a reconnect, for the dashboards
+to reload the orders they may have missed meanwhile.
+"""
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from urllib.parse import parse_qs
+
+import psycopg
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .access import get_access_context
+from .authentication import ClaimsJWTAuthentication, OrderEventsToken
+from .models import Order
+from .projections import make_datetime_mapper
+
+logger = logging.getLogger(__name__)
+
+ORDER_EVENTS_PATH = "/api/store/orders/my_store_orders/events/"
+ORDER_EVENTS_CHANNEL = "store_order_events"
+ORDER_CREATED = "order.created"
+ORDER_STATUS_CHANGED = "order.status_changed"
+# comment lines sent to idle streams so proxies don't time them out
+HEARTBEAT_INTERVAL = 25
+# a stream falling further behind than this is closed, the client reconnects
+MAX_PENDING_EVENTS = 100
+RECONNECT_DELAY = 5
+# milliseconds, how long EventSource waits before reconnecting
+CLIENT_RETRY = 5000
+
+
+def publish_order_event(order: Order, event):
+    """
+    Notify the event streams of the order's store, once the current
+    transaction commits.
+    """
+    to_datetime = make_datetime_mapper()
+    payload = json.dumps(
+        {
+            "event": event,
+            "store": order.store_id,
+            "order": {
+                "id": order.pk,
+                "status": order.status,
+                "type": order.type,
+                "total_price": order.total_price,
+                "created_at": to_datetime(order.created_at),
+                "updated_at": to_datetime(order.updated_at),
+            },
+        },
+        cls=JSONEncoder,
+    )
+    with connection.cursor() as cursor:
+        # delivered on commit, and not at all on rollback
+        cursor.execute("SELECT pg_notify(%s, %s)", [ORDER_EVENTS_CHANNEL, payload])
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+class Subscription:
+    def __init__(self, store_id):
+        self.store_id = store_id
+        self.events = asyncio.Queue(maxsize=MAX_PENDING_EVENTS)
+        self.overflowed = False
+
+    def push(self, event):
+        try:
+            self.events.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class OrderEventBroker:
+    """
+    Listens for the order events of every store on one connection, while
+    there are subscriptions, and hands them to the subscriptions of their
+    store.
+    """
+
+    def __init__(self):
+        self.subscriptions = defaultdict(set)
+        self.listener = None
+        self.listening = asyncio.Event()
+
+    def subscribe(self, store_id):
+        subscription = Subscription(store_id)
+        self.subscriptions[store_id].add(subscription)
+        if self.listening.is_set():
+            subscription.push(format_event("ready", {"store": store_id}))
+        if self.listener is None or self.listener.done():
+            self.listener = asyncio.create_task(self.listen())
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscriptions = self.subscriptions[subscription.store_id]
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self.subscriptions[subscription.store_id]
+        if not self.subscriptions and self.listener is not None:
+            self.listener.cancel()
+            self.listener = None
+            self.listening.clear()
+
+    def dispatch(self, payload):
+        try:
+            message = json.loads(payload)
+            event = format_event(message["event"], message["order"])
+            subscriptions = self.subscriptions.get(message["store"], ())
+        except (ValueError, TypeError, KeyError):
+            logger.warning("Ignoring malformed order event %r", payload)
+            return
+        for subscription in subscriptions:
+            subscription.push(event)
+
+    def push_ready(self):
+        """
+        Tell every stream the connection is listening, the events of the
+        changes made before may have been missed.
+        """
+        for store_id, subscriptions in self.subscriptions.items():
+            event = format_event("ready", {"store": store_id})
+            for subscription in subscriptions:
+                subscription.push(event)
+
+    async def listen(self):
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    **get_listen_connection_params(), autocommit=True
+                ) as listen_connection:
+                    await listen_connection.execute(f"LISTEN {ORDER_EVENTS_CHANNEL}")
+                    self.listening.set()
+                    self.push_ready()
+                    async for notify in listen_connection.notifies():
+                        self.dispatch(notify.payload)
+            except Exception:
+                # whatever went wrong, the streams are still waiting for events
+                logger.exception("Lost the order events connection, reconnecting")
+                await asyncio.sleep(RECONNECT_DELAY)
+            finally:
+                self.listening.clear()
+
+
+def get_listen_connection_params():
+    params = connection.get_connection_params()
+    # the sync cursor factory and adapters of Django's connections
+    params.pop("cursor_factory", None)
+    params.pop("context", None)
+    return params
+
+
+broker = OrderEventBroker()
+
+
+def get_owned_store_id(headers, query_string):
+    """
+    Authenticate the JWT of the request and return the ID of the store the
+    user owns, or None if they don't own one. The token is an access token
+    in the Authorization header, or an OrderEventsToken in the ``token``
+    parameter, as EventSource can't send headers.
+    """
+    authentication = ClaimsJWTAuthentication()
+    try:
+        header = headers.get(b"authorization")
+        raw_token = None if header is None else authentication.get_raw_token(header)
+        if raw_token is not None:
+            validated_token = authentication.get_validated_token(raw_token)
+        else:
+            raw_token = parse_qs(query_string.decode()).get("token", [None])[0]
+            if raw_token is None:
+                raise AuthenticationFailed(
+                    "Authentication credentials were not provided."
+                )
+            validated_token = OrderEventsToken(raw_token)
+        user = authentication.get_user(validated_token)
+        context = get_access_context(user)
+        return context.store_id if context.is_store_owner else None
+    finally:
+        close_old_connections()
+
+
+async def send_response(send, status, headers, body=b"", more_body=False):
+    await send(
+        {"type": "http.response.start", "status": status, "headers": headers}
+    )
+    await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+
+async def send_json(send, status, data, headers=()):
+    await send_response(
+        send,
+        status,
+        [(b"content-type", b"application/json"), *headers],
+        json.dumps(data).encode(),
+    )
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def order_events(scope, receive, send):
+    """
+    ASGI application streaming the order events of the requester's store.
+    """
+    headers = dict(scope["headers"])
+    cors_headers = []
+    origin = headers.get(b"origin", b"").decode()
+    if origin in settings.CORS_ALLOWED_ORIGINS:
+        cors_headers = [
+            (b"access-control-allow-origin", origin.encode()),
+            (b"vary", b"Origin"),
+        ]
+
+    if scope["method"] != "GET":
+        await send_json(
+            send,
+            405,
+            {"detail": f'Method "{scope["method"]}" not allowed.'},
+            [(b"allow", b"GET"), *cors_headers],
+        )
+        return
+    try:
+        store_id = await sync_to_async(get_owned_store_id)(
+            headers, scope["query_string"]
+        )
+    except (AuthenticationFailed, InvalidToken, TokenError) as error:
+        detail = getattr(error, "detail", str(error))
+        if isinstance(detail, dict):
+            detail = detail.get("detail", detail)
+        await send_json(send, 401, {"detail": detail}, cors_headers)
+        return
+    if store_id is None:
+        await send_json(send, 403, {"store": "You must own a store!"}, cors_headers)
+        return
+
+    subscription = broker.subscribe(store_id)
+    disconnected = asyncio.create_task(wait_for_disconnect(receive))
+    try:
+        await send_response(
+            send,
+            200,
+            [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+                *cors_headers,
+            ],
+            f"retry: {CLIENT_RETRY}\n\n".encode(),
+            more_body=True,
+        )
+        while not disconnected.done() and not subscription.overflowed:
+            next_event = asyncio.ensure_future(subscription.events.get())
+            done, _ = await asyncio.wait(
+                {next_event, disconnected},
+                timeout=HEARTBEAT_INTERVAL,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if next_event in done:
+                body = next_event.result()
+            else:
+                next_event.cancel()
+                body = b": heartbeat\n\n"
+            if not disconnected.done():
+                await send(
+                    {"type": "http.response.body", "body": body, "more_body": True}
+                )
+        if not disconnected.done():
+            await send({"type": "http.response.body", "body": b""})
+    finally:
+        broker.unsubscribe(subscription)
+        disconnected.cancel()
+
+
+class OrderEventsMiddleware:
+    """
+    Serve ORDER_EVENTS_PATH with ``order_events`` and everything else with
+    the wrapped application.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == ORDER_EVENTS_PATH:
+            return await order_events(scope, receive, send)
+        return await self.application(scope, receive, send)
@@ -0,0 +1,81 @@
+import datetime
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+
+from store.access import STORE_OWNER
+from store.models import Address, Category, Order, OrderItem, Product, Store
+
+
+def make_user(email, **fields):
+    return get_user_model().objects.create_user(
+        email=email,
+        password="Secret123!",
+        first_name=email.split("@")[0],
+        last_name="Tester",
+        birth_date=datetime.date(1990, 1, 1),
+        address="Cebu City",
+        mobile_number="09123456789",
+        **fields,
+    )
+
+
+def make_store(name, **fields):
+    Group.objects.get_or_create(name=STORE_OWNER)
+    slug = name.lower().replace(" ", "-")
+    # the signals add the owner to the Store Owner group
+    return Store.objects.create(
+        user=make_user(f"{slug}@example.com"),
+        address=Address.objects.create(city="Cebu City", province="Cebu"),
+        name=name,
+        email=f"{slug}@store.example.com",
+        mobile_number="09123456789",
+        delivery_fee=Decimal("50.00"),
+        description=f"{name} serves pizza and chicken",
+        opening_time=datetime.time(0),
+        closing_time=datetime.time(23, 59),
+        is_live=True,
+        **fields,
+    )
+
+
+def make_products(store, names, category_name="Mains"):
+    category = Category.objects.create(store=store, name=category_name)
+    return [
+        Product.objects.create(
+            store=store,
+            category=category,
+            name=name,
+            description=f"Freshly made {name}",
+            price=Decimal("99.50"),
+        )
+        for name in names
+    ]
+
+
+def make_order(store, customer, quantities, **fields):
+    """
+    An order of ``customer`` from their cart, with ``quantities`` of each
+    product at its current price.
+    """
+    order = Order.objects.create(
+        store=store,
+        cart=customer.cart,
+        total_price=sum(
+            (product.price * quantity for product, quantity in quantities.items()),
+            store.delivery_fee,
+        ),
+        **fields,
+    )
+    OrderItem.objects.bulk_create(
+        OrderItem(
+            order=order,
+            product=product,
+            quantity=quantity,
+            # the line total, like checkout stores it
+            price_per_item=product.price * quantity,
+        )
+        for product, quantity in quantities.items()
+    )
+    return order
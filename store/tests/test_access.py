@@ -0,0 +1,30 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase
+
+from store.access import STORE_OWNER, access_context_key, get_access_context
+
+from .factories import make_store
+
+
+class AccessContextTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_context_cached_late_by_a_request_is_not_read_after_a_change(self):
+        store = make_store("Pizzeria")
+        user = get_user_model().objects.get(pk=store.user_id)
+        self.assertTrue(get_access_context(user).is_store_owner)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user.groups.remove(Group.objects.get(name=STORE_OWNER))
+        # a request that read the user and its groups before the change
+        # committed caches them after the change dropped the cached ones
+        cache.set(
+            access_context_key(user.pk, user.auth_version),
+            ([STORE_OWNER], store.pk),
+        )
+
+        user = get_user_model().objects.get(pk=store.user_id)
+        self.assertFalse(get_access_context(user).is_store_owner)
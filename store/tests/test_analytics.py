@@ -0,0 +1,177 @@
+from decimal import Decimal
+
+from django.core import mail
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from store.models import (
+    Feedback,
+    Order,
+    ProductSalesRollup,
+    Store,
+    StoreSalesRollup,
+)
+
+from .factories import make_order, make_products, make_store, make_user
+
+
+class SalesRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = make_store("Pizzeria")
+        cls.pizza, cls.cola = make_products(cls.store, ["Pizza", "Cola"])
+        cls.customer = make_user("customer@example.com")
+
+    def setUp(self):
+        self.order = make_order(
+            self.store, self.customer, {self.pizza: 2, self.cola: 1}
+        )
+
+    def get_store_rollup(self):
+        rollup = StoreSalesRollup.objects.filter(
+            store=self.store, granularity=StoreSalesRollup.DAY
+        ).first()
+        if rollup is None:
+            return None
+        return {
+            "revenue": rollup.revenue,
+            "completed_orders": rollup.completed_orders,
+            "rejected_orders": rollup.rejected_orders,
+            "items_sold": rollup.items_sold,
+            "rating_sum": rollup.rating_sum,
+            "rating_count": rollup.rating_count,
+        }
+
+    def get_product_rollups(self):
+        return dict(
+            ProductSalesRollup.objects.filter(
+                granularity=StoreSalesRollup.DAY
+            ).values_list("product_id", "items_sold")
+        )
+
+    def set_status(self, status):
+        self.order.status = status
+        self.order.save()
+
+    def test_new_orders_are_not_counted(self):
+        self.assertIsNone(self.get_store_rollup())
+
+    def test_completing_an_order_counts_its_sales(self):
+        self.set_status(Order.COMPLETED)
+
+        rollup = self.get_store_rollup()
+        self.assertEqual(rollup["revenue"], Decimal("348.50"))
+        self.assertEqual(rollup["completed_orders"], 1)
+        self.assertEqual(rollup["rejected_orders"], 0)
+        self.assertEqual(rollup["items_sold"], 3)
+        self.assertEqual(
+            self.get_product_rollups(), {self.pizza.pk: 2, self.cola.pk: 1}
+        )
+        self.assertEqual(
+            StoreSalesRollup.objects.filter(store=self.store).count(), 2
+        )
+
+    def test_saving_an_order_again_does_not_count_it_twice(self):
+        self.set_status(Order.COMPLETED)
+        self.order.save()
+        Order.objects.get(pk=self.order.pk).save()
+
+        self.assertEqual(self.get_store_rollup()["completed_orders"], 1)
+        self.assertEqual(self.get_store_rollup()["items_sold"], 3)
+
+    def test_rejecting_a_completed_order_moves_it(self):
+        self.set_status(Order.COMPLETED)
+        self.set_status(Order.REJECTED)
+
+        rollup = self.get_store_rollup()
+        self.assertEqual(rollup["revenue"], Decimal("0"))
+        self.assertEqual(rollup["completed_orders"], 0)
+        self.assertEqual(rollup["rejected_orders"], 1)
+        self.assertEqual(rollup["items_sold"], 0)
+        self.assertEqual(
+            self.get_product_rollups(), {self.pizza.pk: 0, self.cola.pk: 0}
+        )
+
+    def test_deleting_a_completed_order_removes_it(self):
+        self.set_status(Order.COMPLETED)
+        # a stale copy, the stored status is the one counted
+        stale = Order.objects.get(pk=self.order.pk)
+        stale.status = Order.NEW
+        stale.delete()
+
+        rollup = self.get_store_rollup()
+        self.assertEqual(rollup["revenue"], Decimal("0"))
+        self.assertEqual(rollup["completed_orders"], 0)
+        self.assertEqual(rollup["items_sold"], 0)
+
+    def test_feedback_ratings_are_added_changed_and_removed(self):
+        self.set_status(Order.COMPLETED)
+        feedback = Feedback.objects.create(
+            customer=self.customer, order=self.order, rating=4
+        )
+        self.assert_rating(4, 1)
+
+        feedback.rating = 2
+        feedback.save()
+        self.assert_rating(2, 1)
+
+        # a stale copy, the stored rating is the one replaced
+        stale = Feedback.objects.get(pk=feedback.pk)
+        feedback.rating = 5
+        feedback.save()
+        stale.rating = 3
+        stale.save()
+        self.assert_rating(3, 1)
+
+        stale.delete()
+        self.assert_rating(0, 0)
+
+    def assert_rating(self, rating_sum, rating_count):
+        store = Store.objects.get(pk=self.store.pk)
+        self.assertEqual(
+            (store.rating_sum, store.rating_count), (rating_sum, rating_count)
+        )
+        rollup = self.get_store_rollup()
+        self.assertEqual(
+            (rollup["rating_sum"], rollup["rating_count"]), (rating_sum, rating_count)
+        )
+
+
+class UpdateOrderStatusTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = make_store("Pizzeria")
+        (cls.pizza,) = make_products(cls.store, ["Pizza"])
+        cls.customer = make_user("customer@example.com")
+
+    def setUp(self):
+        self.order = make_order(self.store, self.customer, {self.pizza: 1})
+
+    def update_status(self, user, status):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.patch(
+            f"/api/store/orders/{self.order.pk}/update_order_status/",
+            {"status": status},
+            format="json",
+        )
+
+    def test_repeated_status_changes_are_counted_and_sent_once(self):
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.update_status(self.store.user, Order.COMPLETED)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data["status"], Order.COMPLETED)
+
+        rollup = StoreSalesRollup.objects.get(
+            store=self.store, granularity=StoreSalesRollup.DAY
+        )
+        self.assertEqual(rollup.completed_orders, 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_orders_of_other_stores_are_not_found(self):
+        other = make_store("Burger Place")
+        response = self.update_status(other.user, Order.COMPLETED)
+        self.assertEqual(response.status_code, 404)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, Order.NEW)
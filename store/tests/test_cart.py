@@ -0,0 +1,150 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from store.models import Cart, CartItem, Order, OrderItem
+
+from .factories import make_products, make_store, make_user
+
+
+class CartItemTests(TestCase):
+    def test_anonymous_requests_are_refused(self):
+        client = APIClient()
+        for method, url in (
+            ("get", "/api/store/cartitems/"),
+            ("post", "/api/store/cartitems/"),
+            ("post", "/api/store/cartitems/bulk/"),
+        ):
+            with self.subTest(method=method, url=url):
+                response = getattr(client, method)(url, {}, format="json")
+                self.assertEqual(response.status_code, 401)
+
+
+class AddToCartTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = make_store("Pizzeria")
+        cls.pizza, cls.cola = make_products(cls.store, ["Pizza", "Cola"])
+        cls.other_store = make_store("Burger Place")
+        (cls.burger,) = make_products(cls.other_store, ["Burger"])
+
+    def setUp(self):
+        self.customer = make_user("customer@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+
+    def add(self, product, quantity):
+        return self.client.post(
+            "/api/store/cartitems/",
+            {"product": product.pk, "quantity": quantity},
+            format="json",
+        )
+
+    def get_cart(self):
+        return dict(
+            CartItem.objects.filter(cart__user=self.customer).values_list(
+                "product_id", "quantity"
+            )
+        )
+
+    def test_quantities_of_a_product_are_added_up(self):
+        response = self.add(self.pizza, 2)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["quantity"], 2)
+        self.assertEqual(response.data["product"]["id"], self.pizza.pk)
+
+        response = self.add(self.pizza, 3)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["quantity"], 5)
+        self.add(self.cola, 1)
+        self.assertEqual(self.get_cart(), {self.pizza.pk: 5, self.cola.pk: 1})
+        self.assertEqual(Cart.objects.get(user=self.customer).store_id, self.store.pk)
+
+    def test_quantities_are_capped(self):
+        self.add(self.pizza, 60)
+        response = self.add(self.pizza, 60)
+        self.assertEqual(response.data["quantity"], 99)
+        self.assertEqual(self.get_cart(), {self.pizza.pk: 99})
+
+    def test_products_of_another_store_replace_the_cart(self):
+        self.add(self.pizza, 2)
+        self.add(self.cola, 1)
+        response = self.add(self.burger, 1)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.get_cart(), {self.burger.pk: 1})
+        self.assertEqual(
+            Cart.objects.get(user=self.customer).store_id, self.other_store.pk
+        )
+
+    def test_unavailable_products_are_refused(self):
+        self.cola.is_available = False
+        self.cola.save()
+        response = self.add(self.cola, 1)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("product", response.data)
+        self.assertEqual(self.get_cart(), {})
+
+
+class CheckoutTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = make_store("Pizzeria")
+        cls.products = make_products(
+            cls.store, [f"Pizza {number}" for number in range(50)]
+        )
+
+    def fill_cart(self, customer, products):
+        CartItem.objects.bulk_create(
+            CartItem(cart=customer.cart, product=product, quantity=2)
+            for product in products
+        )
+
+    def checkout(self, customer):
+        client = APIClient()
+        client.force_authenticate(customer)
+        return client.post(
+            "/api/store/orders/",
+            {"store": self.store.pk, "type": Order.DELIVERY},
+            format="json",
+        )
+
+    def count_checkout_queries(self, customer):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.checkout(customer)
+        self.assertEqual(response.status_code, 201)
+        return len(queries)
+
+    def test_checkout_queries_do_not_grow_with_the_items(self):
+        one_item = make_user("one@example.com")
+        self.fill_cart(one_item, self.products[:1])
+        fifty_items = make_user("fifty@example.com")
+        self.fill_cart(fifty_items, self.products)
+
+        self.assertEqual(
+            self.count_checkout_queries(one_item),
+            self.count_checkout_queries(fifty_items),
+        )
+        order = Order.objects.get(cart__user=fifty_items)
+        self.assertEqual(order.items.count(), 50)
+        self.assertFalse(CartItem.objects.filter(cart__user=fifty_items).exists())
+
+    def test_unavailable_products_are_refused(self):
+        customer = make_user("customer@example.com")
+        self.fill_cart(customer, self.products[:2])
+        self.products[1].is_available = False
+        self.products[1].save()
+
+        response = self.checkout(customer)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["cart"], "No longer available: Pizza 1.")
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(CartItem.objects.filter(cart__user=customer).count(), 2)
+
+    def test_empty_carts_are_refused(self):
+        response = self.checkout(make_user("customer@example.com"))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("cart", response.data)
+        self.assertFalse(OrderItem.objects.exists())
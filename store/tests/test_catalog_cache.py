@@ -0,0 +1,114 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from django.utils.http import parse_http_date
+from rest_framework.test import APIClient
+
+from store.models import CatalogStamp, Store
+
+from .factories import make_products, make_store, make_user
+
+
+class CatalogStampTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        for name in ("Pizzeria", "Burger Barn"):
+            with self.captureOnCommitCallbacks(execute=True):
+                make_products(make_store(name), ["Cola"])
+
+    def test_deleting_the_latest_changed_store_changes_the_stamp(self):
+        Store.objects.filter(name="Burger Barn").update(
+            catalog_updated_at=timezone.now() + timedelta(hours=1)
+        )
+        response = self.client.get("/api/store/products/")
+        etag = response.headers["ETag"]
+        last_modified = parse_http_date(response.headers["Last-Modified"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Store.objects.filter(name="Burger Barn").delete()
+
+        response = self.client.get("/api/store/products/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertGreaterEqual(
+            parse_http_date(response.headers["Last-Modified"]), last_modified
+        )
+
+    def test_missing_stamp_row_is_created_again(self):
+        CatalogStamp.objects.all().delete()
+        response = self.client.get("/api/store/products/")
+        etag = response.headers["ETag"]
+        self.assertTrue(CatalogStamp.objects.exists())
+
+        CatalogStamp.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            Store.objects.get(name="Pizzeria").save()
+        self.assertTrue(CatalogStamp.objects.exists())
+
+        cache.clear()
+        response = self.client.get("/api/store/products/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_store_etags_change_every_minute_for_staff_too(self):
+        staff = make_user("staff@example.com", is_staff=True)
+        self.client.force_authenticate(staff)
+        now = timezone.now()
+        response = self.client.get("/api/store/stores/")
+        etag = response.headers["ETag"]
+
+        next_minute = now + timedelta(minutes=1)
+        with mock.patch("django.utils.timezone.now", return_value=next_minute):
+            response = self.client.get("/api/store/stores/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.store = make_store("Pizzeria")
+            make_products(self.store, ["Cola", "Fries"])
+
+    def get_owner_name(self):
+        response = self.client.get("/api/store/stores/")
+        self.assertEqual(response.status_code, 200)
+        return response.data["results"][0]["user"]
+
+    def test_renaming_the_owner_refreshes_the_store_list(self):
+        self.assertEqual(self.get_owner_name(), "pizzeria Tester")
+        response = self.client.get("/api/store/stores/")
+        etag = response.headers["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.store.user.first_name = "Maria"
+            self.store.user.save()
+        self.assertEqual(self.get_owner_name(), "Maria Tester")
+        response = self.client.get("/api/store/stores/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_saving_the_owner_unchanged_keeps_the_catalog(self):
+        version = Store.objects.get(pk=self.store.pk).catalog_version
+        self.store.user.save(update_fields=["last_login"])
+        self.store.user.save()
+        self.assertEqual(Store.objects.get(pk=self.store.pk).catalog_version, version)
+
+    def test_responses_are_cached_per_host(self):
+        response = self.client.get("/api/store/products/?page_size=1")
+        self.assertTrue(response.data["next"].startswith("http://testserver/"))
+        etag = response.headers["ETag"]
+
+        response = self.client.get(
+            "/api/store/products/?page_size=1",
+            HTTP_HOST="api.example.com",
+            HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertTrue(response.data["next"].startswith("http://api.example.com/"))
@@ -0,0 +1,94 @@
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from store.models import Feedback, Order
+from store.pagination import ChangesPagination
+
+from .factories import make_order, make_products, make_store, make_user
+
+URL = "/api/store/orders/my_store_orders/"
+
+
+class ChangesPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = make_store("Pizzeria")
+        (cls.pizza,) = make_products(cls.store, ["Pizza"])
+        cls.customer = make_user("customer@example.com")
+        orders = [
+            make_order(cls.store, cls.customer, {cls.pizza: 1}) for _ in range(5)
+        ]
+        # changed a minute ago, the last three in the same transaction
+        changed_at = timezone.now() - timedelta(minutes=1)
+        for number, order in enumerate(orders):
+            Order.objects.filter(pk=order.pk).update(
+                updated_at=changed_at + timedelta(seconds=min(number, 2))
+            )
+        cls.ids = [order.pk for order in orders]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.store.user)
+
+    def sync(self, cursor="", page_size=2):
+        pages = []
+        while True:
+            # a cursor that doesn't move would be followed forever
+            self.assertLess(len(pages), 10)
+            response = self.client.get(URL, {"since": cursor, "page_size": page_size})
+            self.assertEqual(response.status_code, 200)
+            pages.append([order["id"] for order in response.data["results"]])
+            cursor = response.data["cursor"]
+            if not response.data["has_more"]:
+                return pages, cursor
+
+    def test_cursor_round_trips(self):
+        pages, cursor = self.sync()
+        self.assertEqual(pages, [self.ids[:2], self.ids[2:4], self.ids[4:]])
+
+        pages, cursor = self.sync(cursor)
+        self.assertEqual(pages, [[]])
+
+        Order.objects.filter(pk=self.ids[1]).update(
+            status=Order.ACCEPTED, updated_at=timezone.now() - timedelta(seconds=30)
+        )
+        pages, _ = self.sync(cursor)
+        self.assertEqual(pages, [[self.ids[1]]])
+
+    def test_recent_changes_are_sent_again_until_settled(self):
+        _, cursor = self.sync()
+        order = Order.objects.get(pk=self.ids[3])
+        Feedback.objects.create(customer=self.customer, order=order, rating=5)
+
+        # changed within the settle time, it may be committed before changes
+        # that were saved earlier, so the cursor stays before it
+        pages, cursor = self.sync(cursor)
+        self.assertEqual(pages, [[order.pk]])
+        pages, cursor = self.sync(cursor)
+        self.assertEqual(pages, [[order.pk]])
+
+        # once settled, it is sent a last time and the cursor moves past it
+        settled = timezone.now() + ChangesPagination.settle_time
+        with mock.patch("django.utils.timezone.now", return_value=settled):
+            pages, cursor = self.sync(cursor)
+            self.assertEqual(pages, [[order.pk]])
+            pages, _ = self.sync(cursor)
+            self.assertEqual(pages, [[]])
+
+    def test_invalid_cursors_are_refused(self):
+        for cursor in (
+            "abc",
+            "%%%",
+            urlsafe_b64encode(b"t=yesterday&i=1").decode(),
+            urlsafe_b64encode(b"t=2026-01-01T00:00:00&i=1").decode(),
+            urlsafe_b64encode(b"t=2026-01-01T00:00:00%2B00:00&i=x").decode(),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(URL, {"since": cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data, {"since": "Invalid cursor."})
@@ -0,0 +1,112 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from store.exports import ORDER_ITEM_COLUMNS
+from store.models import Order
+
+from .factories import make_order, make_products, make_store, make_user
+
+URL = "/api/store/orders/my_store_orders/export/"
+
+
+class ExportOrdersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = make_store("Pizzeria")
+        cls.pizza, cls.cola = make_products(cls.store, ["Pizza", "Cola"])
+        cls.customer = make_user("customer@example.com")
+        cls.old_order = make_order(cls.store, cls.customer, {cls.cola: 1})
+        Order.objects.filter(pk=cls.old_order.pk).update(
+            created_at=timezone.now() - timedelta(days=3)
+        )
+        cls.order = make_order(
+            cls.store, cls.customer, {cls.pizza: 2, cls.cola: 1}, status=Order.ACCEPTED
+        )
+        # not exported with the store's orders
+        other_store = make_store("Burger Place")
+        (burger,) = make_products(other_store, ["Burger"])
+        make_order(other_store, cls.customer, {burger: 1})
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.store.user)
+
+    def export(self, **params):
+        response = self.client.get(URL, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_csv_has_a_row_per_order_item(self):
+        response, content = self.export(format="csv")
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertEqual(
+            response["Content-Disposition"],
+            f'attachment; filename="orders-{self.store.pk}.csv"',
+        )
+        reader = csv.DictReader(io.StringIO(content))
+        self.assertEqual(reader.fieldnames, list(ORDER_ITEM_COLUMNS))
+        rows = list(reader)
+        self.assertEqual(
+            [(row["order_id"], row["product"], row["quantity"]) for row in rows],
+            [
+                (str(self.old_order.pk), "Cola", "1"),
+                (str(self.order.pk), "Pizza", "2"),
+                (str(self.order.pk), "Cola", "1"),
+            ],
+        )
+        row = rows[1]
+        self.assertEqual(row["status"], Order.ACCEPTED)
+        self.assertEqual(row["customer"], "customer Tester")
+        self.assertEqual(row["customer_email"], "customer@example.com")
+        self.assertEqual(row["total_price"], "348.50")
+        self.assertEqual(row["price_per_item"], "199.00")
+        self.assertEqual(row["pick_up_datetime"], "")
+
+    def test_ndjson_has_a_line_per_order(self):
+        response, content = self.export(format="ndjson")
+        self.assertEqual(
+            response["Content-Type"], "application/x-ndjson; charset=utf-8"
+        )
+        orders = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(
+            [order["id"] for order in orders], [self.old_order.pk, self.order.pk]
+        )
+        order = orders[1]
+        self.assertEqual(
+            order["customer"],
+            {
+                "id": self.customer.pk,
+                "name": "customer Tester",
+                "email": "customer@example.com",
+            },
+        )
+        self.assertEqual(
+            [
+                (item["product"]["name"], item["quantity"], item["price_per_item"])
+                for item in order["items"]
+            ],
+            [("Pizza", 2, 199.0), ("Cola", 1, 99.5)],
+        )
+
+    def test_orders_created_in_a_date_range(self):
+        today = timezone.localdate()
+        _, content = self.export(format="ndjson", **{"from": today, "to": today})
+        orders = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([order["id"] for order in orders], [self.order.pk])
+
+        response = self.client.get(
+            URL, {"format": "csv", "from": today, "to": today - timedelta(days=1)}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_only_store_owners_export(self):
+        self.client.force_authenticate(self.customer)
+        response = self.client.get(URL, {"format": "csv"})
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from store.models import CartItem, IdempotencyKey, Order
+
+from .factories import make_products, make_store, make_user
+
+URL = "/api/store/orders/"
+
+
+class IdempotencyKeyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = make_store("Pizzeria")
+        cls.pizza, cls.cola = make_products(cls.store, ["Pizza", "Cola"])
+
+    def setUp(self):
+        self.customer = make_user("customer@example.com")
+        self.fill_cart(self.customer)
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+
+    def fill_cart(self, customer):
+        CartItem.objects.create(cart=customer.cart, product=self.pizza, quantity=1)
+
+    def checkout(self, key="checkout-1", type=Order.DELIVERY):
+        return self.client.post(
+            URL,
+            {"store": self.store.pk, "type": type},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retries_replay_the_response(self):
+        first = self.checkout()
+        self.assertEqual(first.status_code, 201)
+        self.assertNotIn("Idempotent-Replayed", first.headers)
+
+        retry = self.checkout()
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.headers["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_key_reused_with_another_request(self):
+        self.checkout()
+        response = self.checkout(type=Order.PICK_UP)
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_failed_requests_are_not_kept(self):
+        CartItem.objects.all().delete()
+        self.assertEqual(self.checkout().status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        self.fill_cart(self.customer)
+        response = self.checkout()
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("Idempotent-Replayed", response.headers)
+
+    def test_expired_keys_are_used_again(self):
+        self.checkout()
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.fill_cart(self.customer)
+
+        response = self.checkout()
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("Idempotent-Replayed", response.headers)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_keys_belong_to_their_user(self):
+        self.checkout()
+        other = make_user("other@example.com")
+        self.fill_cart(other)
+        self.client.force_authenticate(other)
+
+        response = self.checkout()
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("Idempotent-Replayed", response.headers)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_invalid_keys_are_refused(self):
+        for key in ("", "k" * 256):
+            with self.subTest(length=len(key)):
+                response = self.checkout(key=key)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("Idempotency-Key", response.data)
+        self.assertFalse(Order.objects.exists())
@@ -0,0 +1,99 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from store.images import get_default_image, update_image_variants
+from store.models import Product
+
+from .factories import make_products, make_store
+
+
+def make_image(size=(800, 600), format="PNG"):
+    buffer = BytesIO()
+    Image.new("RGB", size, "red").save(buffer, format)
+    return buffer.getvalue()
+
+
+# it would close the connection of the test's transaction
+@mock.patch("store.images.close_old_connections")
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        default_storage.save(
+            get_default_image(Product), ContentFile(make_image(format="JPEG"))
+        )
+        self.store = make_store("Pizzeria")
+        self.pizza, self.cola = make_products(self.store, ["Pizza", "Cola"])
+
+    def upload(self, product, name="pizza.png"):
+        product.image = ContentFile(make_image(), name=name)
+        product.save()
+        return product.image.name
+
+    def test_variants_of_an_upload(self, close_old_connections):
+        name = self.upload(self.pizza)
+        update_image_variants("store.Product", self.pizza.pk, name)
+
+        variants = Product.objects.get(pk=self.pizza.pk).image_variants
+        self.assertEqual(variants["source"], name)
+        sizes = {
+            size: (variants[size]["width"], variants[size]["height"])
+            for size in ("thumbnail", "card", "detail")
+        }
+        self.assertEqual(
+            sizes,
+            {"thumbnail": (160, 120), "card": (480, 360), "detail": (800, 600)},
+        )
+        for extension in ("webp", "jpg"):
+            self.assertTrue(default_storage.exists(variants["card"][extension]))
+        self.assertTrue(variants["placeholder"].startswith("data:image/webp;base64,"))
+
+    def test_replaced_image_variants_are_not_recorded(self, close_old_connections):
+        name = self.upload(self.pizza)
+        self.upload(self.pizza, "pizza-2.png")
+        update_image_variants("store.Product", self.pizza.pk, name)
+        self.assertEqual(Product.objects.get(pk=self.pizza.pk).image_variants, {})
+
+    def test_default_image_variants_are_shared(self, close_old_connections):
+        name = get_default_image(Product)
+        # only the command renders them
+        update_image_variants("store.Product", self.cola.pk, name, render=False)
+        self.assertEqual(Product.objects.get(pk=self.cola.pk).image_variants, {})
+
+        update_image_variants("store.Product", self.pizza.pk, name)
+        update_image_variants("store.Product", self.cola.pk, name, render=False)
+        self.assertEqual(
+            Product.objects.get(pk=self.cola.pk).image_variants,
+            Product.objects.get(pk=self.pizza.pk).image_variants,
+        )
+
+    def test_command_renders_the_variants_left_missing(self, close_old_connections):
+        name = self.upload(self.pizza)
+        Product.objects.update(updated_at=timezone.now() - timedelta(minutes=5))
+        # its render may still be queued in the web worker that saved it
+        self.upload(self.cola, "cola.png")
+
+        with mock.patch(
+            "store.management.commands.render_image_variants.get_executor",
+            return_value=SimpleNamespace(map=map),
+        ):
+            call_command("render_image_variants", stdout=StringIO())
+
+        self.assertEqual(
+            Product.objects.get(pk=self.pizza.pk).image_variants["source"], name
+        )
+        self.assertEqual(Product.objects.get(pk=self.cola.pk).image_variants, {})
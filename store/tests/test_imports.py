@@ -0,0 +1,55 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from store.imports import NAME_TAKEN, ProductImport
+from store.models import Product, Store
+
+from .factories import make_products, make_store
+
+CSV = b"""name,description,price,category
+Cola,Cold,45.00,Drinks
+Pizza,Hot,299.00,Mains
+Fries,Salty,abc,Sides
+"""
+
+
+class ImportProductsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = make_store("Pizzeria")
+
+    def test_import_into_the_owned_store(self):
+        client = APIClient()
+        client.force_authenticate(self.store.user)
+        response = client.post(
+            "/api/store/products/import/",
+            {"file": SimpleUploadedFile("products.csv", CSV)},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual([error["line"] for error in response.data["errors"]], [4])
+        self.store.refresh_from_db()
+        self.assertEqual(self.store.product_count, 2)
+
+    def test_names_taken_during_the_import_are_reported(self):
+        product_import = ProductImport(self.store.pk)
+        # created by another request after the import read the names
+        make_products(self.store, ["COLA"], category_name="Drinks")
+
+        columns = ("name", "description", "price", "category")
+        rows = [
+            (2, dict(zip(columns, ("Cola", "Cold", "45.00", "Drinks")))),
+            (3, dict(zip(columns, ("Pizza", "Hot", "299.00", "Mains")))),
+        ]
+        report = product_import.run(rows)
+
+        self.assertEqual(report["created"], 1)
+        self.assertEqual(
+            report["errors"], [{"line": 2, "errors": {"name": [NAME_TAKEN]}}]
+        )
+        self.assertEqual(
+            Store.objects.get(pk=self.store.pk).product_count,
+            Product.objects.filter(store=self.store).count(),
+        )
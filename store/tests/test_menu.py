@@ -0,0 +1,36 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .factories import make_products, make_store
+
+
+class StoreMenuTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = make_store("Pizzeria")
+        make_products(cls.store, ["Cola"])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = f"/api/store/stores/{self.store.pk}/menu/"
+
+    def test_non_numeric_store(self):
+        response = self.client.get("/api/store/stores/pizzeria/menu/")
+        self.assertEqual(response.status_code, 404)
+
+    def test_gzip(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="br, gzip;q=0.5")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+
+    def test_gzip_refused(self):
+        for accept_encoding in ("gzip;q=0", "gzip; q=0.0, br", "*;q=0", ""):
+            with self.subTest(accept_encoding=accept_encoding):
+                response = self.client.get(
+                    self.url, HTTP_ACCEPT_ENCODING=accept_encoding
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn("Content-Encoding", response.headers)
+                self.assertEqual(response.json()["store"]["id"], self.store.pk)
@@ -0,0 +1,108 @@
+import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from store.models import Product, Store
+from store.pagination import DefaultCursorPagination
+
+from .factories import make_products, make_store
+
+
+# the rows sharing a position must not be stepped over with offsets, which
+# CursorPagination caps
+@mock.patch.object(DefaultCursorPagination, "offset_cutoff", 1)
+class DefaultCursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        store = make_store("Pizzeria")
+        make_products(store, [f"Pizza {number}" for number in range(7)])
+        # rows saved in one transaction share their timestamps
+        now = timezone.now()
+        Product.objects.update(created_at=now, updated_at=now)
+        cls.ids = sorted(Product.objects.values_list("pk", flat=True))
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get_pages(self, url, link):
+        pages = []
+        while url:
+            # a paginator stuck on a page would link to it forever
+            self.assertLess(len(pages), 10)
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([product["id"] for product in response.data["results"]])
+            url = response.data[link]
+        return pages
+
+    def test_pages_through_rows_sharing_timestamps(self):
+        pages = self.get_pages("/api/store/products/?page_size=3", "next")
+        self.assertEqual(pages, [self.ids[:3], self.ids[3:6], self.ids[6:]])
+
+    def test_pages_back_through_rows_sharing_timestamps(self):
+        response = self.client.get("/api/store/products/?page_size=3")
+        response = self.client.get(response.data["next"])
+        pages = self.get_pages(response.data["next"], "previous")
+        self.assertEqual(pages, [self.ids[6:], self.ids[3:6], self.ids[:3]])
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/store/products/?cursor=cD1bMV0%3D")
+        self.assertEqual(response.status_code, 404)
+
+    def test_pages_through_tied_search_ranks(self):
+        pages = self.get_pages("/api/store/products/?q=pizza&page_size=3", "next")
+        self.assertEqual(pages, [self.ids[:3], self.ids[3:6], self.ids[6:]])
+
+
+@mock.patch.object(DefaultCursorPagination, "offset_cutoff", 1)
+class OpenStoresOrderingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        stores = [make_store(f"Store {number}") for number in range(5)]
+        for store in stores:
+            make_products(store, ["Pizza"])
+        # opening and closing at the same time, never open
+        closed = [stores[1].pk, stores[3].pk]
+        Store.objects.filter(pk__in=closed).update(
+            opening_time=datetime.time(12), closing_time=datetime.time(12)
+        )
+        # all tied on the paginator's ordering but the id
+        now = timezone.now()
+        Store.objects.update(created_at=now, updated_at=now)
+        cls.open_ids = sorted(store.pk for store in stores if store.pk not in closed)
+        cls.closed_ids = sorted(closed)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def get_pages(self, url):
+        pages = []
+        while url:
+            self.assertLess(len(pages), 10)
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append(
+                [(store["id"], store["is_open"]) for store in response.data["results"]]
+            )
+            url = response.data["next"]
+        return pages
+
+    def test_pages_through_open_stores_first(self):
+        pages = self.get_pages("/api/store/stores/?ordering=-is_open_now&page_size=2")
+        expected = [(pk, True) for pk in self.open_ids] + [
+            (pk, False) for pk in self.closed_ids
+        ]
+        self.assertEqual(pages, [expected[:2], expected[2:4], expected[4:]])
+
+    def test_pages_through_closed_stores_first(self):
+        pages = self.get_pages("/api/store/stores/?ordering=is_open_now&page_size=2")
+        expected = [(pk, False) for pk in self.closed_ids] + [
+            (pk, True) for pk in self.open_ids
+        ]
+        self.assertEqual(pages, [expected[:2], expected[2:4], expected[4:]])
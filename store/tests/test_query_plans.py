@@ -0,0 +1,102 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from store.management.commands.check_query_plans import Command
+from store.models import CartItem, Feedback, Order, OrderItem
+
+from .factories import make_products, make_store, make_user
+
+STORES = 3
+PRODUCTS = 20
+ORDERS = 10
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        customer = make_user("customer@example.com")
+        for number in range(STORES):
+            store = make_store(f"Store {number}")
+            products = make_products(
+                store, [f"Dish {number}-{index}" for index in range(PRODUCTS)]
+            )
+            for index in range(ORDERS):
+                order = Order.objects.create(
+                    store=store,
+                    cart=customer.cart,
+                    total_price=Decimal("199.00"),
+                    status=Order.COMPLETED if index % 2 else Order.NEW,
+                )
+                OrderItem.objects.bulk_create(
+                    OrderItem(
+                        order=order,
+                        product=product,
+                        quantity=2,
+                        price_per_item=product.price,
+                    )
+                    for product in products[index : index + 3]
+                )
+                if order.status == Order.COMPLETED:
+                    Feedback.objects.create(customer=customer, order=order, rating=4)
+        customer.cart.store = store
+        customer.cart.save()
+        CartItem.objects.bulk_create(
+            CartItem(cart=customer.cart, product=product, quantity=1)
+            for product in products[:5]
+        )
+        cls.store = store
+        cls.customer = customer
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def setUp(self):
+        cache.clear()
+        # a sequential scan is then only planned where no index can serve
+        # the query, whatever the size of the tables
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assertNoSequentialScans(self, queries):
+        command = Command()
+        for query in queries:
+            sql = query["sql"]
+            if sql.startswith("SELECT"):
+                with self.subTest(sql=sql):
+                    self.assertEqual(command.get_sequential_scans(sql), [])
+
+    def test_read_endpoints(self):
+        stdout = StringIO()
+        call_command(
+            "check_query_plans",
+            store=self.store.pk,
+            customer=self.customer.pk,
+            min_rows=0,
+            stdout=stdout,
+        )
+        self.assertIn("Every query is served by an index.", stdout.getvalue())
+
+    def test_next_pages(self):
+        owner = APIClient()
+        owner.force_authenticate(self.store.user)
+        for client, path in (
+            (APIClient(), "/api/store/stores/"),
+            (APIClient(), "/api/store/products/"),
+            (APIClient(), f"/api/store/products/?store={self.store.pk}"),
+            (APIClient(), "/api/store/products/?q=dish"),
+            (owner, "/api/store/orders/my_store_orders/"),
+            (owner, "/api/store/feedbacks/"),
+        ):
+            with self.subTest(path=path):
+                response = client.get(path, {"page_size": 2})
+                self.assertEqual(response.status_code, 200)
+                with CaptureQueriesContext(connection) as captured:
+                    response = client.get(response.data["next"])
+                self.assertEqual(response.status_code, 200)
+                self.assertNoSequentialScans(captured.captured_queries)
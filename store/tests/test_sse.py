@@ -0,0 +1,170 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest import mock
+
+import psycopg
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from store.access import STORE_OWNER
+from store.authentication import ClaimsAccessToken, OrderEventsToken
+from store.sse import (
+    ORDER_EVENTS_CHANNEL,
+    OrderEventBroker,
+    Subscription,
+    get_owned_store_id,
+)
+
+from .factories import make_store, make_user
+
+
+class OrderEventBrokerTests(SimpleTestCase):
+    def test_malformed_events_are_ignored(self):
+        broker = OrderEventBroker()
+        subscription = Subscription(1)
+        broker.subscriptions[1].add(subscription)
+        for payload in (
+            "{",
+            "[]",
+            '"order.created"',
+            '{"event": "order.created", "store": 1}',
+            '{"event": "order.created", "order": {}, "store": [1]}',
+        ):
+            with self.subTest(payload=payload), self.assertLogs("store.sse"):
+                broker.dispatch(payload)
+        self.assertTrue(subscription.events.empty())
+
+        broker.dispatch(
+            json.dumps({"event": "order.created", "order": {"id": 1}, "store": 1})
+        )
+        self.assertEqual(subscription.events.qsize(), 1)
+
+
+class FakeListenConnection:
+    def __init__(self, payloads, lost):
+        self.payloads = payloads
+        self.lost = lost
+        self.queries = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, query):
+        self.queries.append(query)
+
+    async def notifies(self):
+        for payload in self.payloads:
+            yield SimpleNamespace(payload=payload)
+        if self.lost:
+            raise psycopg.OperationalError("server closed the connection")
+        await asyncio.Event().wait()
+
+
+@mock.patch("store.sse.RECONNECT_DELAY", 0)
+@mock.patch("store.sse.get_listen_connection_params", return_value={})
+class OrderEventBrokerListenTests(SimpleTestCase):
+    async def test_streams_are_ready_again_after_a_reconnect(self, params):
+        payload = json.dumps(
+            {"event": "order.created", "order": {"id": 1}, "store": 1}
+        )
+        connections = [
+            FakeListenConnection([payload], lost=True),
+            FakeListenConnection([], lost=False),
+        ]
+        broker = OrderEventBroker()
+        with mock.patch(
+            "psycopg.AsyncConnection.connect", side_effect=connections
+        ), self.assertLogs("store.sse", "ERROR"):
+            subscription = broker.subscribe(1)
+            try:
+                events = [
+                    await asyncio.wait_for(subscription.events.get(), 1)
+                    for _ in range(3)
+                ]
+                # subscribed while listening, ready right away
+                late_subscription = broker.subscribe(1)
+                self.assertEqual(late_subscription.events.qsize(), 1)
+            finally:
+                broker.unsubscribe(subscription)
+                broker.unsubscribe(late_subscription)
+
+        self.assertEqual(
+            [event.split(b"\n")[0] for event in events],
+            [b"event: ready", b"event: order.created", b"event: ready"],
+        )
+        for connection in connections:
+            self.assertEqual(connection.queries, [f"LISTEN {ORDER_EVENTS_CHANNEL}"])
+        self.assertIsNone(broker.listener)
+
+
+# it would close the connection of the test's transaction
+@mock.patch("store.sse.close_old_connections")
+class GetOwnedStoreIdTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def get_owned_store_id(self, user, token_class=ClaimsAccessToken, header=True):
+        # as the signals left it, with its current auth version
+        user = get_user_model().objects.get(pk=user.pk)
+        token = token_class.for_user(user)
+        if header:
+            return get_owned_store_id(
+                {b"authorization": f"JWT {token}".encode()}, b""
+            )
+        return get_owned_store_id({}, f"token={token}".encode())
+
+    def test_store_owner(self, close_old_connections):
+        store = make_store("Pizzeria")
+        self.assertEqual(self.get_owned_store_id(store.user), store.pk)
+
+    def test_user_no_longer_in_the_store_owner_group(self, close_old_connections):
+        store = make_store("Pizzeria")
+        store.user.groups.remove(Group.objects.get(name=STORE_OWNER))
+        self.assertIsNone(self.get_owned_store_id(store.user))
+
+    def test_order_events_token_in_the_url(self, close_old_connections):
+        store = make_store("Pizzeria")
+        self.assertEqual(
+            self.get_owned_store_id(store.user, OrderEventsToken, header=False),
+            store.pk,
+        )
+
+    def test_access_token_in_the_url_is_refused(self, close_old_connections):
+        store = make_store("Pizzeria")
+        with self.assertRaises(TokenError):
+            self.get_owned_store_id(store.user, header=False)
+
+    def test_order_events_token_is_refused_by_other_views(self, close_old_connections):
+        store = make_store("Pizzeria")
+        with self.assertRaises(InvalidToken):
+            self.get_owned_store_id(store.user, OrderEventsToken)
+
+        user = get_user_model().objects.get(pk=store.user.pk)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"JWT {OrderEventsToken.for_user(user)}")
+        response = client.get("/api/store/orders/my_store_orders/")
+        self.assertEqual(response.status_code, 401)
+
+    def test_issue_order_events_token(self, close_old_connections):
+        store = make_store("Pizzeria")
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.get(pk=store.user.pk))
+        response = client.post("/api/store/orders/my_store_orders/events/token/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            get_owned_store_id({}, f"token={response.data['token']}".encode()),
+            store.pk,
+        )
+
+        client.force_authenticate(make_user("customer@example.com"))
+        response = client.post("/api/store/orders/my_store_orders/events/token/")
+        self.assertEqual(response.status_code, 403)
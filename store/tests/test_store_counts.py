@@ -0,0 +1,127 @@
+from django.test import TestCase
+
+from store.models import Feedback, Order, Product, Store
+
+from .factories import make_order, make_products, make_store, make_user
+
+
+class StoreProductCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = make_store("Pizzeria")
+        cls.other_store = make_store("Burger Place")
+        cls.pizza, cls.pasta = make_products(cls.store, ["Pizza", "Pasta"])
+
+    def assert_counts(self, store, product_count, available_product_count):
+        store = Store.objects.get(pk=store.pk)
+        self.assertEqual(
+            (store.product_count, store.available_product_count),
+            (product_count, available_product_count),
+        )
+
+    def test_new_products_are_counted(self):
+        self.assert_counts(self.store, 2, 2)
+        self.assert_counts(self.other_store, 0, 0)
+
+    def test_availability_toggles(self):
+        self.pizza.is_available = False
+        self.pizza.save()
+        self.assert_counts(self.store, 2, 1)
+
+        # saved again, unchanged
+        self.pizza.save()
+        self.assert_counts(self.store, 2, 1)
+
+        self.pizza.is_available = True
+        self.pizza.save()
+        self.assert_counts(self.store, 2, 2)
+
+    def test_stale_copies_apply_the_stored_availability(self):
+        stale = Product.objects.get(pk=self.pizza.pk)
+        self.pizza.is_available = False
+        self.pizza.save()
+        # still available in memory, the stored row is not
+        stale.is_available = False
+        stale.save()
+        self.assert_counts(self.store, 2, 1)
+
+        stale.is_available = True
+        stale.delete()
+        self.assert_counts(self.store, 1, 1)
+
+    def test_moving_to_another_store(self):
+        self.pasta.is_available = False
+        self.pasta.save()
+        self.pasta.store = self.other_store
+        self.pasta.save()
+        self.assert_counts(self.store, 1, 1)
+        self.assert_counts(self.other_store, 1, 0)
+
+        self.pizza.store = self.other_store
+        self.pizza.is_available = False
+        self.pizza.save()
+        self.assert_counts(self.store, 0, 0)
+        self.assert_counts(self.other_store, 2, 0)
+
+    def test_deleted_products_are_removed(self):
+        self.pizza.delete()
+        self.assert_counts(self.store, 1, 1)
+        Product.objects.filter(pk=self.pasta.pk).delete()
+        self.assert_counts(self.store, 0, 0)
+
+
+class StoreRatingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.store = make_store("Pizzeria")
+        cls.other_store = make_store("Burger Place")
+        (pizza,) = make_products(cls.store, ["Pizza"])
+        (burger,) = make_products(cls.other_store, ["Burger"])
+        cls.customer = make_user("customer@example.com")
+        cls.order = make_order(
+            cls.store, cls.customer, {pizza: 1}, status=Order.COMPLETED
+        )
+        cls.other_order = make_order(
+            cls.other_store, cls.customer, {burger: 1}, status=Order.COMPLETED
+        )
+
+    def assert_rating(self, store, rating_sum, rating_count):
+        store = Store.objects.get(pk=store.pk)
+        self.assertEqual(
+            (store.rating_sum, store.rating_count), (rating_sum, rating_count)
+        )
+
+    def test_rating_follows_the_feedbacks(self):
+        first = Feedback.objects.create(
+            customer=self.customer, order=self.order, rating=5
+        )
+        Feedback.objects.create(customer=self.customer, order=self.order, rating=2)
+        self.assert_rating(self.store, 7, 2)
+
+        first.rating = 4
+        first.save()
+        self.assert_rating(self.store, 6, 2)
+
+        first.order = self.other_order
+        first.save()
+        self.assert_rating(self.store, 2, 1)
+        self.assert_rating(self.other_store, 4, 1)
+
+        Feedback.objects.filter(order=self.order).delete()
+        self.assert_rating(self.store, 0, 0)
+
+    def test_stale_copies_replace_the_stored_rating(self):
+        feedback = Feedback.objects.create(
+            customer=self.customer, order=self.order, rating=3
+        )
+        stale = Feedback.objects.get(pk=feedback.pk)
+        feedback.rating = 5
+        feedback.save()
+
+        stale.rating = 1
+        stale.save()
+        self.assert_rating(self.store, 1, 1)
+
+        # the stored rating is 1, not the 5 of this copy
+        feedback.delete()
+        self.assert_rating(self.store, 0, 0)
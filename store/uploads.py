@@ -0,0 +1,130 @@
+"""
+Upload handling of the store and product image endpoints.
+
+Files are spooled to disk as they arrive, an upload is rejected as soon as
+it grows past ``MAX_FILE_SIZE`` or its header shows it isn't an image we
+accept. Only the header is read, the image itself is decoded later by the
+image variant workers.
+"""
+
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from PIL import Image, UnidentifiedImageError
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .validators import MAX_FILE_SIZE
+
+IMAGE_FORMATS = {"JPEG", "MPO", "PNG", "WEBP", "GIF"}
+MAX_IMAGE_PIXELS = 40_000_000
+# bytes read at most to find the dimensions, JPEG headers can carry big EXIF
+# blocks before them
+MAX_HEADER_SIZE = 256 * 1024
+# multipart boundaries and part headers around the file and the other fields
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = "File size must not exceed 5MB."
+    default_code = "upload_too_large"
+
+
+def read_image_header(data):
+    """
+    Return the format and size of the image ``data`` starts with, or None if
+    more data is needed to tell.
+    """
+    try:
+        # opening only parses the header, nothing is decoded
+        with Image.open(BytesIO(data)) as image:
+            return image.format, image.size
+    except (UnidentifiedImageError, OSError):
+        return None
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """
+    Write uploads to temporary files, rejecting them early when they are too
+    large or aren't images in one of ``IMAGE_FORMATS``.
+
+    The checked files get an ``image_header`` of their format and size, see
+    ``serializers.UploadedImageField``.
+    """
+
+    def handle_raw_input(
+        self, input_data, META, content_length, boundary, encoding=None
+    ):
+        # the other fields are bounded by DATA_UPLOAD_MAX_MEMORY_SIZE
+        limit = MAX_FILE_SIZE + MULTIPART_OVERHEAD
+        if settings.DATA_UPLOAD_MAX_MEMORY_SIZE is not None:
+            limit += settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        if content_length > limit:
+            raise UploadTooLarge()
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.header = b""
+        self.image_header = None
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > MAX_FILE_SIZE:
+            self.upload_interrupted()
+            raise UploadTooLarge()
+        if self.image_header is None:
+            self.header += raw_data
+            self.check_header(complete=len(self.header) >= MAX_HEADER_SIZE)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if self.image_header is None:
+            self.check_header(complete=True)
+        self.header = b""
+        file = super().file_complete(file_size)
+        file.image_header = self.image_header
+        return file
+
+    def check_header(self, complete):
+        try:
+            self.image_header = read_image_header(self.header)
+        except Image.DecompressionBombError:
+            self.reject_dimensions()
+        if self.image_header is None:
+            if complete:
+                self.reject(
+                    "Upload a valid image. The file you uploaded was either not "
+                    "an image or a corrupted image."
+                )
+            return
+
+        format, (width, height) = self.image_header
+        if format not in IMAGE_FORMATS:
+            self.reject(f"Unsupported image format {format}.")
+        if width * height > MAX_IMAGE_PIXELS:
+            self.reject_dimensions()
+
+    def reject_dimensions(self):
+        self.reject(f"Image dimensions must not exceed {MAX_IMAGE_PIXELS:,} pixels.")
+
+    def reject(self, message):
+        self.upload_interrupted()
+        raise ValidationError({self.field_name: [message]})
+
+
+class ImageUploadMixin:
+    """
+    Handle the uploads of the viewset's ``image_upload_actions`` with
+    ImageUploadHandler.
+    """
+
+    image_upload_actions = ("create", "update", "partial_update")
+
+    def initialize_request(self, request, *args, **kwargs):
+        action = self.action_map.get(request.method.lower())
+        if action in self.image_upload_actions:
+            request.upload_handlers = [ImageUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
@@ -8,7 +8,9 @@ def validate_mobile_number(phone: str):
         raise ValidationError("Phone number must contain only digits.")
 
 
+MAX_FILE_SIZE = 5 * 1024 * 1024
+
+
 def validate_file_size(file):
-    max_size = 5 * 1024 * 1024
-    if file.size > max_size:
+    if file.size > MAX_FILE_SIZE:
         raise ValidationError("File size must not exceed 5MB.")
@@ -1,73 +1,142 @@
 from decimal import Decimal
 
-from django.db import transaction
-from django.db.models import Avg, Count, Exists, FloatField, OuterRef, Value
+from django.db.models import (
+    Count,
+    DecimalField,
+    Exists,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Sum,
+    Value,
+)
 from django.db.models.functions import Coalesce
 from django.db.models.query import Prefetch
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils import timezone
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.mixins import CreateModelMixin, ListModelMixin
 from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 
-from .models import Cart, CartItem, Category, Feedback, Order, OrderItem, Product, Store
+from .access import AccessContextMixin
+from .analytics import get_store_sales
+from .authentication import OrderEventsToken
+from .cache import CatalogCacheMixin
+from .filters import CatalogOrderingFilter, ProductFilter, StoreFilter
+from .idempotency import idempotent
+from .exports import (
+    ORDER_ITEM_COLUMNS,
+    get_store_order_items,
+    iter_order_item_rows,
+    iter_orders,
+)
+from .imports import import_products
+from .models import (
+    Cart,
+    CartItem,
+    Category,
+    Feedback,
+    Order,
+    Product,
+    Store,
+    StoreMenu,
+)
+from .pagination import ChangesPagination, DefaultCursorPagination
+from .projections import (
+    OrderProjection,
+    ProductProjection,
+    ProjectedListMixin,
+    ProjectionMixin,
+    StoreProjection,
+)
+from .renderers import CSVRenderer, NDJSONRenderer
 from .permissions import IsCartItemOwner, IsCategoryOwner, IsProductOwner, IsStoreOwner
 from .serializers import (
+    BulkCartSerializer,
     CartItemSerializer,
     CartSerializer,
     CategorySerializer,
     CreateOrderSerializer,
+    DateRangeSerializer,
     FeedbackSerializer,
     ListAndRetrieveCartItemSerializer,
     ListAndRetrieveProductSerializer,
     OrderSerializer,
+    ProductImportSerializer,
     ProductSerializer,
+    SalesAnalyticsSerializer,
     StoreSerializer,
     UpdateCartItemSerializer,
     UpdateOrderStatusSerializer,
 )
-
-
-class StoreViewSet(ModelViewSet):
+from .services import add_to_cart, build_store_menu, checkout, update_cart
+from .uploads import ImageUploadMixin
+
+
+def accepts_gzip(request):
+    """
+    Return whether the request's Accept-Encoding allows gzip, by name or as
+    ``*``, with a q-value above 0.
+    """
+    qvalues = {}
+    for coding in request.headers.get("Accept-Encoding", "").split(","):
+        name, *params = (part.strip() for part in coding.split(";"))
+        qvalue = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    qvalue = float(value)
+                except ValueError:
+                    qvalue = 0.0
+        qvalues[name.lower()] = qvalue
+    return qvalues.get("gzip", qvalues.get("*", 0.0)) > 0
+
+
+class StoreViewSet(
+    AccessContextMixin,
+    ImageUploadMixin,
+    CatalogCacheMixin,
+    ProjectedListMixin,
+    ModelViewSet,
+):
     serializer_class = StoreSerializer
+    projection_class = StoreProjection
+    pagination_class = DefaultCursorPagination
+    filter_backends = [DjangoFilterBackend, CatalogOrderingFilter]
+    filterset_class = StoreFilter
+    ordering_fields = ["is_open_now"]
 
     def get_queryset(self):
-        queryset = Store.objects.prefetch_related("user__groups").select_related(
-            "user", "address"
-        )
-
-        # Annotate rating for all queries
-        queryset = queryset.annotate(
-            rating=Coalesce(
-                Avg("order__feedbacks__rating"),
-                Value(0.0),
-                output_field=FloatField(),
-            )
+        queryset = (
+            Store.objects.prefetch_related("user__groups")
+            .select_related("user", "address")
+            .annotate_is_open()
         )
 
         if self.action in ["list", "retrieve"] and not self.request.user.is_staff:
-            queryset = queryset.annotate(product_count=Count("product")).filter(
-                product_count__gt=0, is_live=True
-            )
+            queryset = queryset.filter(product_count__gt=0, is_live=True)
             if self.request.user.is_authenticated:
                 queryset = queryset.exclude(user=self.request.user)
         return queryset
 
     def get_permissions(self):
-        user_groups = self.get_user_groups()
-        if self.action == "my_store":
-            if "Store Owner" not in user_groups:
-                raise PermissionDenied({"store": "You must own a store!"})
+        if self.action in ["my_store", "my_store_analytics"]:
+            self.get_owned_store_id()
         if self.action == "create":
             if self.request.user.is_staff:
                 raise PermissionDenied({"store": "Admins cannot create a store!"})
-            if "Store Owner" in user_groups:
+            if self.get_access_context().is_store_owner:
                 raise PermissionDenied({"store": "You're already a store owner!"})
             self.permission_classes = [IsAuthenticated]
-        if self.action in ["list", "retrieve"]:
+        if self.action in ["list", "retrieve", "menu"]:
             self.permission_classes = [AllowAny]
         if self.action in ["partial_update", "update", "destroy"]:
             self.permission_classes = [IsStoreOwner | IsAdminUser]
@@ -78,26 +147,109 @@ class StoreViewSet(ModelViewSet):
             return {"user": self.request.user}
         return super().get_serializer_context()
 
-    def get_user_groups(self):
+    def get_cache_variant(self):
         user = self.request.user
-        user_groups = getattr(user, "_cached_groups", None)
-        if user_groups is None:
-            user_groups = set(user.groups.values_list("name", flat=True))
-            setattr(user, "_cached_groups", user_groups)
-        return user_groups
+        if user.is_staff:
+            return None
+        variant = "public"
+        if self.get_access_context().is_store_owner:
+            # owners don't see their own store in the list
+            variant = f"owner:{user.pk}"
+        # stores are serialized with whether they are open, only reuse
+        # responses within the same minute
+        return f"{variant}:{timezone.localtime():%Y%m%d%H%M}"
+
+    def get_cache_store_id(self):
+        pk = self.kwargs.get("pk", "")
+        if self.action == "retrieve" and pk.isdigit():
+            return int(pk)
+        return super().get_cache_store_id()
+
+    def get_catalog_stamp(self):
+        stamp = super().get_catalog_stamp()
+        if stamp is None:
+            return None
+        # whether the stores are open changes without them being modified,
+        # for staff too, whose responses have no variant
+        token, last_modified = stamp
+        this_minute = timezone.now().replace(second=0, microsecond=0)
+        return (
+            f"{token}:{this_minute:%Y%m%d%H%M}",
+            max(last_modified or this_minute, this_minute),
+        )
 
     @action(detail=False, methods=["GET"])
     def my_store(self, request):
-        store = Store.objects.annotate(
-            rating=Coalesce(
-                Avg("order__feedbacks__rating"), Value(0.0), output_field=FloatField()
-            )
-        ).get(user=request.user)
+        store = (
+            Store.objects.select_related("user", "address")
+            .annotate_is_open()
+            .get(user=request.user)
+        )
         return Response(self.get_serializer(store).data, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=["GET"], url_path="my_store/analytics")
+    def my_store_analytics(self, request):
+        serializer = SalesAnalyticsSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        sales = get_store_sales(
+            self.get_owned_store_id(), **serializer.validated_data
+        )
+        return Response(
+            {"granularity": serializer.validated_data["granularity"], **sales},
+            status=status.HTTP_200_OK,
+        )
 
-class CategoryViewSet(ModelViewSet):
+    @action(detail=True, methods=["GET"])
+    def menu(self, request, pk=None):
+        """
+        The store with its categories and their available products, served
+        from the snapshot of the store's current catalog version.
+        """
+        if not pk.isdigit():
+            raise NotFound()
+        gzip = accepts_gzip(request)
+        store = (
+            Store.objects.select_related("address", "menu")
+            .defer("menu__content" if gzip else "menu__compressed_content")
+            .filter(pk=pk)
+            .first()
+        )
+        user = request.user
+        if store is None or not (
+            (store.is_live and store.product_count)
+            or user.is_staff
+            or store.user_id == user.pk
+        ):
+            raise NotFound()
+
+        etag = f'"menu-{store.pk}-{store.catalog_version}{"-gzip" if gzip else ""}"'
+        not_modified = self.get_not_modified_response(
+            request, etag, store.catalog_updated_at
+        )
+        if not_modified is not None:
+            return not_modified
+
+        try:
+            menu = store.menu
+        except StoreMenu.DoesNotExist:
+            menu = None
+        if menu is None or menu.catalog_version != store.catalog_version:
+            menu = build_store_menu(store)
+
+        if gzip:
+            response = HttpResponse(
+                menu.compressed_content, content_type="application/json"
+            )
+            response.headers["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(menu.content, content_type="application/json")
+        patch_vary_headers(response, ["Accept-Encoding"])
+        return self.add_validators(response, etag, store.catalog_updated_at)
+
+
+class CategoryViewSet(AccessContextMixin, ModelViewSet):
     serializer_class = CategorySerializer
+    pagination_class = DefaultCursorPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -110,37 +262,37 @@ class CategoryViewSet(ModelViewSet):
 
     def get_permissions(self):
         if self.action == "create":
-            user_groups = self.get_user_groups()
-            if "Store Owner" not in user_groups:
-                raise PermissionDenied({"store": "You must own a store!"})
+            self.get_owned_store_id()
         if self.action in ["partial_update", "update", "destroy"]:
             self.permission_classes = [IsCategoryOwner | IsAdminUser]
         return super().get_permissions()
 
     def get_serializer_context(self):
-        return {"user": self.request.user}
-
-    def get_user_groups(self):
-        user = self.request.user
-        user_groups = getattr(user, "_cached_groups", None)
-        if user_groups is None:
-            user_groups = set(user.groups.values_list("name", flat=True))
-            setattr(user, "_cached_groups", user_groups)
-        return user_groups
-
-
-class ProductViewSet(ModelViewSet):
+        return {
+            "user": self.request.user,
+            "store_id": self.get_access_context().store_id,
+        }
+
+
+class ProductViewSet(
+    AccessContextMixin,
+    ImageUploadMixin,
+    CatalogCacheMixin,
+    ProjectedListMixin,
+    ModelViewSet,
+):
     queryset = Product.objects.prefetch_related(
         Prefetch("store__user__groups")
     ).select_related("store__user", "store__address", "category")
     serializer_class = ProductSerializer
-    filterset_fields = ["store"]
+    projection_class = ProductProjection
+    pagination_class = DefaultCursorPagination
+    filter_backends = [DjangoFilterBackend, CatalogOrderingFilter]
+    filterset_class = ProductFilter
 
     def get_permissions(self):
-        if self.action in ["create", "my_products"]:
-            user_groups = self.get_user_groups()
-            if "Store Owner" not in user_groups:
-                raise PermissionDenied({"store": "You must own a store!"})
+        if self.action in ["create", "my_products", "import_products"]:
+            self.get_owned_store_id()
         if self.action in ["list", "retrieve"]:
             self.permission_classes = [AllowAny]
         if self.action in ["partial_update", "update", "destroy"]:
@@ -150,6 +302,8 @@ class ProductViewSet(ModelViewSet):
     def get_serializer_class(self):
         if self.action in ["list", "retrieve", "my_products"]:
             self.serializer_class = ListAndRetrieveProductSerializer
+        if self.action == "import_products":
+            self.serializer_class = ProductImportSerializer
         return super().get_serializer_class()
 
     def create(self, request, *args, **kwargs):
@@ -183,31 +337,59 @@ class ProductViewSet(ModelViewSet):
         return Response(response_serializer.data, status=status.HTTP_200_OK)
 
     def get_serializer_context(self):
-        return {"user": self.request.user}
-
-    def get_user_groups(self):
-        user = self.request.user
-        user_groups = getattr(user, "_cached_groups", None)
-        if user_groups is None:
-            user_groups = set(user.groups.values_list("name", flat=True))
-            setattr(user, "_cached_groups", user_groups)
-        return user_groups
+        return {
+            "user": self.request.user,
+            "store_id": self.get_access_context().store_id,
+        }
+
+    def get_cache_store_id(self):
+        store = self.request.query_params.get("store", "")
+        if self.action == "list" and store.isdigit():
+            return int(store)
+        return super().get_cache_store_id()
+
+    def get_catalog_stamp(self):
+        pk = self.kwargs.get("pk", "")
+        if self.action != "retrieve" or not pk.isdigit():
+            return super().get_catalog_stamp()
+        stamp = (
+            Product.objects.filter(pk=pk)
+            .values_list("store_id", "store__catalog_version", "store__catalog_updated_at")
+            .first()
+        )
+        if stamp is None:
+            return None
+        store_id, version, updated_at = stamp
+        return f"{store_id}:{version}", updated_at
 
     @action(detail=False, methods=["GET"])
     def my_products(self, request):
-        products = self.get_queryset().filter(store__user=request.user)
-        return Response(
-            self.get_serializer(products, many=True).data, status=status.HTTP_200_OK
+        products = self.get_queryset().filter(store_id=self.get_owned_store_id())
+        return self.get_projected_response(products)
+
+    @action(detail=False, methods=["POST"], url_path="import")
+    def import_products(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        report = import_products(
+            self.get_owned_store_id(),
+            serializer.validated_data["file"],
+            serializer.validated_data["format"],
         )
+        return Response(report, status=status.HTTP_200_OK)
 
 
 class CartViewSet(GenericViewSet, ListModelMixin):
-    queryset = Cart.objects.prefetch_related(
-        Prefetch(
-            "cartitem_set",
-            queryset=CartItem.objects.select_related("product__store__address"),
-        )
-    ).annotate(cart_item_count=Count("cartitem"))
+    queryset = Cart.objects.select_related("store__user", "store__address").annotate(
+        cart_item_count=Count("cartitem"),
+        subtotal=Coalesce(
+            Sum(
+                F("cartitem__quantity") * F("cartitem__product__price"),
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+            Value(Decimal("0.00")),
+        ),
+    )
     serializer_class = CartSerializer
 
     def get_queryset(self):
@@ -219,11 +401,19 @@ class CartViewSet(GenericViewSet, ListModelMixin):
 
 class CartItemViewSet(ModelViewSet):
     serializer_class = CartItemSerializer
-    permission_classes = [IsCartItemOwner]
+    permission_classes = [IsAuthenticated, IsCartItemOwner]
 
     def get_queryset(self):
-        queryset = CartItem.objects.prefetch_related("cart__user").filter(
-            cart__user=self.request.user
+        queryset = (
+            CartItem.objects.prefetch_related("cart__user")
+            .select_related("product__store")
+            .filter(cart__user=self.request.user)
+            .annotate(
+                annotated_line_total=ExpressionWrapper(
+                    F("quantity") * F("product__price"),
+                    output_field=DecimalField(max_digits=10, decimal_places=2),
+                )
+            )
         )
         return queryset.order_by("-created_at")
 
@@ -232,38 +422,21 @@ class CartItemViewSet(ModelViewSet):
             return ListAndRetrieveCartItemSerializer
         if self.action in ["partial_update", "update"]:
             return UpdateCartItemSerializer
+        if self.action == "bulk":
+            return BulkCartSerializer
         else:
             return CartItemSerializer
 
+    @idempotent
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        user_cart = Cart.objects.get(user=self.request.user)
-        new_product = serializer.validated_data.get("product")
-        new_store = new_product.store  # Assuming the Product model has a store field
-
-        # Fetch existing cart items
-        existing_cart_items = CartItem.objects.filter(cart=user_cart)
-
-        if existing_cart_items.exists():
-            existing_store = (
-                existing_cart_items.first().product.store
-            )  # Get store of existing items
-
-            if existing_store != new_store:
-                # If the new product belongs to a different store, clear the cart
-                existing_cart_items.delete()
-
-        with transaction.atomic():
-            cartitem, created = CartItem.objects.get_or_create(
-                cart=user_cart,
-                product=new_product,
-                defaults={"quantity": serializer.validated_data.get("quantity")},
-            )
-            if not created:
-                cartitem.quantity += serializer.validated_data.get("quantity")
-                cartitem.save()
+        cartitem = add_to_cart(
+            self.request.user,
+            serializer.validated_data["product"],
+            serializer.validated_data["quantity"],
+        )
 
         response_serializer = ListAndRetrieveCartItemSerializer(
             cartitem, context=self.get_serializer_context()
@@ -295,12 +468,36 @@ class CartItemViewSet(ModelViewSet):
     def get_serializer_context(self):
         return {"user": self.request.user}
 
+    @action(detail=False, methods=["POST"])
+    @idempotent
+    def bulk(self, request: Request):
+        """
+        Merge a list of products with quantities into the cart, or replace
+        the cart's items with them with ``"mode": "replace"``.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        update_cart(
+            request.user,
+            serializer.validated_data["items"],
+            replace=serializer.validated_data["mode"] == BulkCartSerializer.REPLACE,
+        )
+        cart_items = ListAndRetrieveCartItemSerializer(
+            self.get_queryset(), many=True, context=self.get_serializer_context()
+        )
+        return Response(cart_items.data, status=status.HTTP_200_OK)
 
-class OrderViewSet(GenericViewSet, CreateModelMixin):
+
+class OrderViewSet(
+    AccessContextMixin, ProjectionMixin, GenericViewSet, CreateModelMixin
+):
     queryset = Order.objects.select_related(
         "cart__user", "store__address"
     ).prefetch_related("items__product", "feedbacks__customer")
     serializer_class = OrderSerializer
+    projection_class = OrderProjection
+    pagination_class = DefaultCursorPagination
+    changes_pagination_class = ChangesPagination
 
     def get_serializer_class(self):
         if self.action == "create":
@@ -310,60 +507,16 @@ class OrderViewSet(GenericViewSet, CreateModelMixin):
     def get_serializer_context(self):
         return {"action": self.action}
 
+    @idempotent
     def create(self, request, *args, **kwargs):
-        cart = self.request.user.cart
-        cart_items = CartItem.objects.filter(cart=cart)
-        if not cart_items.exists():
-            raise ValidationError({"cart": "Your cart does not contain any items."})
-
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-
-        print("validated_data", serializer.validated_data)
-        store = serializer.validated_data.get("store")
-        
-        # set delivery_fee to 0 for Pick Up order
-        if serializer.validated_data.get("type") == "Pick Up":
-            store.delivery_fee = 0
-            
-        total_price = (
-            sum(item.product.price * item.quantity for item in cart_items)
-            + store.delivery_fee
-        )
-        order = Order.objects.create(
-            cart=cart,
-            total_price=total_price,
-            **serializer.validated_data,
-        )
-
-        # Create OrderItem instances from CartItems
-        order_items = [
-            OrderItem(
-                order=order,
-                product=item.product,
-                quantity=item.quantity,
-                price_per_item=Decimal(item.product.price * item.quantity),
-            )
-            for item in cart_items
-        ]
-        OrderItem.objects.bulk_create(order_items)
-
-        # Delete all CartItems from the cart
-        cart_items.delete()
-
+        order = checkout(request.user, serializer.validated_data)
         headers = self.get_success_headers(serializer.data)
         return Response(
             OrderSerializer(order).data, status=status.HTTP_201_CREATED, headers=headers
         )
 
-    def get_user_groups(self):
-        user = self.request.user
-        user_groups = getattr(user, "_cached_groups", None)
-        if user_groups is None:
-            user_groups = set(user.groups.values_list("name", flat=True))
-            setattr(user, "_cached_groups", user_groups)
-        return user_groups
-
     @action(detail=False, methods=["GET"])
     def my_orders(self, request: Request):
         user = request.user
@@ -375,61 +528,96 @@ class OrderViewSet(GenericViewSet, CreateModelMixin):
             .filter(cart__user=user)
             .annotate(has_submitted_feedback=Exists(feedback_subquery))
         )
-        return Response(
-            self.get_serializer(orders, many=True).data, status=status.HTTP_200_OK
-        )
+        return self.get_projected_response(orders)
 
     @action(detail=False, methods=["GET"])
     def my_store_orders(self, request: Request):
-        user_groups = self.get_user_groups()
-        if "Store Owner" not in user_groups:
-            raise PermissionDenied({"store": "You must own a store!"})
-        store = Store.objects.get(user=request.user)
-        orders = self.get_queryset().filter(store=store)
-        return Response(
-            self.get_serializer(orders, many=True).data, status=status.HTTP_200_OK
+        orders = self.get_queryset().filter(store_id=self.get_owned_store_id())
+        return self.get_projected_response(orders)
+
+    @action(detail=False, methods=["POST"], url_path="my_store_orders/events/token")
+    def order_events_token(self, request: Request):
+        """
+        A short-lived token for the ``token`` parameter of the order event
+        stream, see store.sse.
+        """
+        self.get_owned_store_id()
+        token = OrderEventsToken.for_user(request.user)
+        return Response({"token": str(token)}, status=status.HTTP_200_OK)
+
+    @action(
+        detail=False,
+        methods=["GET"],
+        url_path="my_store_orders/export",
+        renderer_classes=[CSVRenderer, NDJSONRenderer],
+    )
+    def export_my_store_orders(self, request: Request):
+        store_id = self.get_owned_store_id()
+        serializer = DateRangeSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        items = get_store_order_items(store_id, **serializer.validated_data)
+
+        renderer = request.accepted_renderer
+        if renderer.format == NDJSONRenderer.format:
+            rows = iter_orders(items)
+        else:
+            rows = iter_order_item_rows(items)
+        # the rows are read from the database as the response is sent
+        response = StreamingHttpResponse(
+            renderer.render_stream(rows, ORDER_ITEM_COLUMNS),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="orders-{store_id}.{renderer.format}"'
         )
+        # let proxies pass the chunks on as they come
+        response["X-Accel-Buffering"] = "no"
+        return response
 
     @action(
         detail=True, methods=["PATCH"], serializer_class=UpdateOrderStatusSerializer
     )
     def update_order_status(self, request: Request, pk=None):
-        user_groups = self.get_user_groups()
-        if "Store Owner" not in user_groups:
-            raise PermissionDenied({"store": "You must own a store!"})
+        store_id = self.get_owned_store_id()
+        if not pk.isdigit():
+            raise NotFound()
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        order = Order.objects.get(pk=pk)
+        # locked, so concurrent changes of the status count in the rollups,
+        # emails and events once
+        order = (
+            Order.objects.select_for_update()
+            .filter(pk=pk, store_id=store_id)
+            .first()
+        )
+        if order is None:
+            raise NotFound()
         order.status = serializer.validated_data["status"]
         order.save()
         return Response(OrderSerializer(order).data, status=status.HTTP_200_OK)
 
 
-class FeedbackViewSet(GenericViewSet, CreateModelMixin):
+class FeedbackViewSet(
+    AccessContextMixin, GenericViewSet, CreateModelMixin, ListModelMixin
+):
     queryset = Feedback.objects.select_related(
         "customer", "order__store", "order__cart"
     )
     serializer_class = FeedbackSerializer
+    pagination_class = DefaultCursorPagination
 
     def get_queryset(self):
         queryset = super().get_queryset()
         if not self.request.user.is_staff:
-            queryset = queryset.filter(order__store=self.request.user.store)
+            queryset = queryset.filter(
+                order__store_id=self.get_access_context().store_id
+            )
         return queryset
 
     def get_permissions(self):
         if self.action == "list":
-            if "Store Owner" not in self.get_user_groups():
-                raise PermissionDenied("You must own a store!")
+            self.get_owned_store_id("You must own a store!")
         return super().get_permissions()
 
     def get_serializer_context(self):
         return {"customer": self.request.user}
-
-    def get_user_groups(self):
-        user = self.request.user
-        user_groups = getattr(user, "_cached_groups", None)
-        if user_groups is None:
-            user_groups = set(user.groups.values_list("name", flat=True))
-            setattr(user, "_cached_groups", user_groups)
-        return user_groups